@@ -0,0 +1,81 @@
+import argparse
+import multiprocessing
+import os
+import sys
+
+from gui_components.batch_conversion import (
+    BATCH_DEFAULT_PATTERN,
+    BATCH_FORMATS,
+    BATCH_MANIFEST_NAME,
+    run_batch,
+)
+
+
+def default_data_dir():
+    user_profile = os.environ.get("USERPROFILE") or os.path.expanduser("~")
+    return os.path.join(user_profile, ".flim-labs", "data")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert or summarize every intensity tracing (IT02) and time tagger (ITT1) "
+        "file of one or more folders, in parallel and resumable"
+    )
+    parser.add_argument(
+        "roots", nargs="*",
+        help="folders searched recursively (default: the .flim-labs/data folder)",
+    )
+    parser.add_argument(
+        "--format", default="summary", choices=BATCH_FORMATS,
+        help="'summary' only records per file statistics in the manifest, the other formats "
+        "write one converted file per recording (default: summary)",
+    )
+    parser.add_argument(
+        "--output", default=None,
+        help="folder receiving the converted files, with the same relative paths "
+        "(default: next to each recording)",
+    )
+    parser.add_argument(
+        "--manifest", default=None,
+        help=f"manifest file (default: {BATCH_MANIFEST_NAME} in the output folder or the first root)",
+    )
+    parser.add_argument(
+        "--pattern", default=BATCH_DEFAULT_PATTERN,
+        help=f"file name pattern (default: {BATCH_DEFAULT_PATTERN})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: one per CPU core)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="process files again even if the manifest marks them done",
+    )
+    args = parser.parse_args(argv)
+    args.roots = args.roots or [default_data_dir()]
+    for root in args.roots:
+        if not os.path.isdir(root):
+            parser.error(f"{root} is not a folder")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be >= 1")
+    return args
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    args = parse_args()
+    try:
+        totals = run_batch(
+            args.roots,
+            args.format,
+            output_dir=args.output,
+            manifest_path=args.manifest,
+            pattern=args.pattern,
+            workers=args.workers,
+            force=args.force,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted, run the same command again to resume")
+        sys.exit(1)
+    print(" ".join(f"{status}={count}" for status, count in totals.items()))
+    sys.exit(1 if totals["error"] > 0 else 0)
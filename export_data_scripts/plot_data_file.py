@@ -1,5 +1,6 @@
 import struct
 import json
+import numpy as np
 import matplotlib.pyplot as plt
 
 
@@ -24,7 +25,190 @@ def get_channel_name(channel_id, channel_names_dict=None):
         return f"{custom_name} (Ch{channel_id + 1})"
     return f"Channel {channel_id + 1}"
 
-times = []
+# Vectorized IT02 record decoding, copied from gui_components/it02_decoder.py
+# so that the script stays standalone.
+# Record: f64 time, u8 bitmask, one u32 count per set bit.
+RECORD_HEADER_BYTES = 9
+# Records per coarse step of the offset scan (2 ** JUMP_LEVELS)
+JUMP_LEVELS = 5
+POPCOUNT_TABLE = np.array([bin(mask).count("1") for mask in range(256)], dtype=np.int64)
+
+
+def record_size_table(n_channels):
+    # bitmask -> record size, bits beyond the file channels are ignored
+    channels_mask = (1 << n_channels) - 1
+    return RECORD_HEADER_BYTES + 4 * POPCOUNT_TABLE[np.arange(256) & channels_mask]
+
+
+def count_offset_table(n_channels):
+    # [channel position, bitmask] -> byte offset of the channel count in the record
+    offsets = np.zeros((n_channels, 256), dtype=np.int64)
+    for position in range(n_channels):
+        lower_bits = (1 << position) - 1
+        offsets[position] = RECORD_HEADER_BYTES + 4 * POPCOUNT_TABLE[np.arange(256) & lower_bits]
+    return offsets
+
+
+def fixed_stride_run(buf, start, size_table):
+    # Number of consecutive records from `start` sharing the same bitmask
+    mask = buf[start + 8]
+    stride = size_table[mask]
+    count = (len(buf) - start) // stride
+    if count == 0:
+        return 0, stride
+    masks = buf[start + 8 : start + 8 + (count - 1) * stride + 1 : stride]
+    mismatch = np.flatnonzero(masks != mask)
+    return (count if len(mismatch) == 0 else mismatch[0]), stride
+
+
+def scan_record_offsets(buf, start, size_table):
+    # Offsets of every complete record of buf starting at `start`, following
+    # the record chain with jump tables (2 ** k records per jump)
+    n = len(buf)
+    end = n - RECORD_HEADER_BYTES + 1
+    if start >= end:
+        return np.empty(0, dtype=np.int64)
+    terminal = n - start
+    next_offset = np.full(terminal + 1, terminal, dtype=np.int32)
+    next_offset[: end - start] = (
+        np.arange(end - start, dtype=np.int32)
+        + size_table.astype(np.int32)[buf[start + 8 : end + 8]]
+    )
+    np.minimum(next_offset, terminal, out=next_offset)
+    jumps = [next_offset]
+    for _ in range(JUMP_LEVELS):
+        jumps.append(jumps[-1][jumps[-1]])
+    coarse = []
+    p = 0
+    coarse_jump = jumps[-1]
+    while p != terminal:
+        coarse.append(p)
+        p = coarse_jump[p]
+    offsets = np.array(coarse, dtype=np.int32)
+    for level in range(JUMP_LEVELS - 1, -1, -1):
+        expanded = np.empty(2 * len(offsets), dtype=np.int32)
+        expanded[0::2] = offsets
+        expanded[1::2] = jumps[level][offsets]
+        offsets = expanded
+    offsets = offsets[offsets < end - start]
+    return offsets.astype(np.int64) + start
+
+
+def record_offsets(buf, size_table):
+    # Offsets of the complete records of buf
+    start = 0
+    parts = []
+    while len(buf) - start >= RECORD_HEADER_BYTES:
+        run, stride = fixed_stride_run(buf, start, size_table)
+        if run >= (1 << JUMP_LEVELS):
+            parts.append(start + stride * np.arange(run, dtype=np.int64))
+            start += run * stride
+            continue
+        parts.append(scan_record_offsets(buf, start, size_table))
+        break
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.concatenate(parts)
+    return offsets[offsets + size_table[buf[offsets + 8]] <= len(buf)]
+
+
+def gather_records(buf, offsets, n_channels, count_offsets):
+    # (times_ns f64, counts (n_channels, n) u32) of the records at `offsets`
+    times_ns = buf[offsets[:, None] + np.arange(8)].view("<f8").reshape(-1)
+    masks = buf[offsets + 8]
+    counts = np.zeros((n_channels, len(offsets)), dtype=np.uint32)
+    for position in range(n_channels):
+        has_count = np.flatnonzero(masks & (1 << position))
+        if len(has_count) == 0:
+            continue
+        count_starts = offsets[has_count] + count_offsets[position][masks[has_count]]
+        counts[position, has_count] = (
+            buf[count_starts[:, None] + np.arange(4)].view("<u4").reshape(-1)
+        )
+    return times_ns, counts
+
+
+def iter_chunks(f, number_of_channels, chunk_bytes=1 << 22):
+    # Yields NumPy blocks (times, counts[channels]) of the complete records
+    # read from the current file position, reading chunk_bytes at a time.
+    size_table = record_size_table(number_of_channels)
+    count_offsets = count_offset_table(number_of_channels)
+    pending = np.empty(0, dtype=np.uint8)
+    while True:
+        data = f.read(chunk_bytes)
+        if not data:
+            break
+        buf = np.concatenate((pending, np.frombuffer(data, dtype=np.uint8)))
+        offsets = record_offsets(buf, size_table)
+        if len(offsets) == 0:
+            pending = buf
+            continue
+        pending = buf[int(offsets[-1] + size_table[buf[offsets[-1] + 8]]) :]
+        yield gather_records(buf, offsets, number_of_channels, count_offsets)
+
+
+# Columns of the plotted min/max envelope. Buckets are merged two by two
+# while the recording does not fit, memory does not depend on the file size.
+PLOT_COLUMNS = 4096
+
+
+class TraceEnvelope:
+    # Min/max counts per bucket of bins, from the first bin with data
+    def __init__(self, number_of_channels, bin_width_ns):
+        self.bin_width_ns = bin_width_ns
+        self.first_bin = None
+        self.last_time = None
+        self.bucket_bins = 1
+        self.max = np.zeros((number_of_channels, 2 * PLOT_COLUMNS), dtype=np.uint32)
+        self.min = np.full((number_of_channels, 2 * PLOT_COLUMNS), np.iinfo(np.uint32).max, dtype=np.uint32)
+        self.records = np.zeros(2 * PLOT_COLUMNS, dtype=np.int64)
+
+    def fold(self):
+        # Bucket pairs become one bucket twice as wide
+        self.max[:, :PLOT_COLUMNS] = self.max.reshape(len(self.max), PLOT_COLUMNS, 2).max(axis=2)
+        self.min[:, :PLOT_COLUMNS] = self.min.reshape(len(self.min), PLOT_COLUMNS, 2).min(axis=2)
+        self.records[:PLOT_COLUMNS] = self.records.reshape(PLOT_COLUMNS, 2).sum(axis=1)
+        self.max[:, PLOT_COLUMNS:] = 0
+        self.min[:, PLOT_COLUMNS:] = np.iinfo(np.uint32).max
+        self.records[PLOT_COLUMNS:] = 0
+        self.bucket_bins *= 2
+
+    def add(self, times, counts):
+        if len(times) == 0:
+            return
+        bins = (times / self.bin_width_ns).astype(np.int64)
+        if self.first_bin is None:
+            self.first_bin = bins[0]
+        self.last_time = times[-1]
+        buckets = (bins - self.first_bin) // self.bucket_bins
+        while buckets[-1] >= len(self.records):
+            self.fold()
+            buckets //= 2
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ids = buckets[starts]
+        self.max[:, ids] = np.maximum(self.max[:, ids], np.maximum.reduceat(counts, starts, axis=1))
+        self.min[:, ids] = np.minimum(self.min[:, ids], np.minimum.reduceat(counts, starts, axis=1))
+        self.records[ids] += np.diff(np.append(starts, len(buckets)))
+
+    def lines(self):
+        # (times, channel_lines) up to the last bin with data: one point per
+        # bin while buckets are single bins (missing bins are zero), otherwise
+        # a min/max pair per bucket
+        bin_width_ns = self.bin_width_ns
+        last_bin = int(self.last_time / bin_width_ns)
+        n = (last_bin - self.first_bin) // self.bucket_bins + 1
+        bucket_starts = self.first_bin + np.arange(n, dtype=np.int64) * self.bucket_bins
+        if self.bucket_bins == 1:
+            return bucket_starts * bin_width_ns, self.max[:, :n]
+        bucket_bins = np.minimum(self.bucket_bins, last_bin - bucket_starts + 1)
+        times = np.empty(2 * n)
+        times[0::2] = bucket_starts * bin_width_ns
+        times[1::2] = (bucket_starts + bucket_bins - 1) * bin_width_ns
+        channel_lines = np.empty((len(self.max), 2 * n), dtype=np.uint32)
+        # Buckets with a missing bin reach zero
+        channel_lines[:, 0::2] = np.where(self.records[:n] < bucket_bins, 0, self.min[:, :n])
+        channel_lines[:, 1::2] = self.max[:, :n]
+        return times, channel_lines
 
 with open(file_path, 'rb') as f:
     if f.read(4) != b'IT02':
@@ -44,47 +228,31 @@ with open(file_path, 'rb') as f:
     if "bin_width_micros" in metadata and metadata["bin_width_micros"] is not None:
         print("Bin width: " + str(metadata["bin_width_micros"]) + "\u00B5s")
 
-    channel_lines = [[] for _ in range(len(metadata["channels"]))]
-
     number_of_channels = len(metadata["channels"])
     bin_width_seconds = metadata["bin_width_micros"] / 1000000
+    bin_width_ns = metadata["bin_width_micros"] * 1000
 
     # READING DATA
-    while True:
-        time_data = f.read(8)
-        if not time_data or len(time_data) < 8:
-            break
-        (time,) = struct.unpack('d', time_data)
-        times.append(time)
-        
-        bitmask_data = f.read(1)
-        if not bitmask_data:
-            break
-        (bitmask,) = struct.unpack('B', bitmask_data)
-        
-        for bit_position in range(number_of_channels):
-            if (bitmask & (1 << bit_position)) != 0:
-                count_data = f.read(4)
-                if not count_data or len(count_data) < 4:
-                    break
-                (count,) = struct.unpack('I', count_data)
-                channel_lines[bit_position].append(count)
-            else:
-                channel_lines[bit_position].append(0)
-    
+    envelope = TraceEnvelope(number_of_channels, bin_width_ns)
+    # The last record is held back until the end of the file
+    last_record = None
+    for times_chunk, counts_chunk in iter_chunks(f, number_of_channels):
+        if last_record is not None:
+            envelope.add(*last_record)
+        envelope.add(times_chunk[:-1], counts_chunk[:, :-1])
+        last_record = (times_chunk[-1:], counts_chunk[:, -1:])
+
     # PROCESSING DATA
     # If the last bin has bitmask = 0 (all zeros), it is a marker for the acquisition time
-    # and must be removed before visualization
-    if times and all(channel_lines[ch][-1] == 0 for ch in range(len(channel_lines))):
-        final_time_marker = times[-1]
-        times = times[:-1]  # Remove the timestamp marker
-        for ch in range(len(channel_lines)):
-            channel_lines[ch] = channel_lines[ch][:-1]  # Remove the marker data
+    # and is not plotted
+    if last_record is not None and not last_record[1].any():
+        final_time_marker = last_record[0][0]
     else:
         final_time_marker = None
-    
-    bin_width_ns = metadata["bin_width_micros"] * 1000
-    
+        if last_record is not None:
+            envelope.add(*last_record)
+    last_time = envelope.last_time
+
     # CALCULATE EXPECTED TIME BINS
     if metadata["acquisition_time_millis"] is not None:
         acq_time_s = metadata["acquisition_time_millis"] / 1000
@@ -96,44 +264,25 @@ with open(file_path, 'rb') as f:
         acq_time_s = final_time_marker / 1_000_000_000
         print(f"Acquisition time: {acq_time_s:.3f}s")
         expected_bins = int(final_time_marker / bin_width_ns)
-    elif times:
+    elif last_time is not None:
         # Fallback: use the last real timestamp
-        acq_time_s = times[-1] / 1_000_000_000
+        acq_time_s = last_time / 1_000_000_000
         print(f"Acquisition time: {acq_time_s:.3f}s")
-        expected_bins = int(times[-1] / bin_width_ns) + 1
+        expected_bins = int(last_time / bin_width_ns) + 1
     else:
         print("\n⚠️ WARNING: No data available to reconstruct acquisition time.")
         expected_bins = 0
-    
-    # RECONSTRUCT FULL TIME BINS
-    if expected_bins > 0 and times:
-        # Find the first and last bin indices from actual data
-        first_bin_index = int(times[0] / bin_width_ns)
-        last_bin_index = int(times[-1] / bin_width_ns)
-        
-        # Reconstruct only from first to last bin with data
-        num_bins = last_bin_index - first_bin_index + 1
-        full_times = [(first_bin_index + i) * bin_width_ns for i in range(num_bins)]
-        full_channel_lines = [[0] * num_bins for _ in range(number_of_channels)]
-        
-        for i in range(len(times)):
-            time_ns = times[i]
-            bin_index = int(time_ns / bin_width_ns)
-            # Adjust index to start from 0
-            adjusted_index = bin_index - first_bin_index
-            
-            if 0 <= adjusted_index < num_bins:
-                for ch in range(number_of_channels):
-                    full_channel_lines[ch][adjusted_index] = channel_lines[ch][i]
-        
-        times = full_times
-        channel_lines = full_channel_lines
-    elif expected_bins == 0:
-        times = []
-        channel_lines = [[] for _ in range(number_of_channels)]
+
+    # RECONSTRUCT TIME BINS
+    # From the first to the last bin with data, as a min/max envelope for long recordings
+    if expected_bins > 0 and last_time is not None:
+        times, channel_lines = envelope.lines()
+    else:
+        times = np.empty(0)
+        channel_lines = np.zeros((number_of_channels, 0), dtype=np.uint32)
     
     # PLOT VISUALIZATION
-    times_seconds = [time / 1_000_000_000 for time in times]
+    times_seconds = times / 1_000_000_000
     
     for i in range(len(metadata["channels"])):
         channel_line = channel_lines[i]
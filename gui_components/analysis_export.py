@@ -0,0 +1,215 @@
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+from gui_components.channel_name_utils import get_channel_name
+from gui_components.it02_reader import IT02_CHUNK_RECORDS
+from gui_components.it03_reader import open_reader
+
+# Analysis-ready copies of a recording: one row per stored record, a time_ns
+# column and one uint32 count column per channel (channel_1, channel_2, ...)
+ANALYSIS_EXPORT_FORMATS = {
+    "parquet": ".parquet",
+    "npz": ".npz",
+    "npy": ".npy",
+    "hdf5": ".h5",
+}
+PARQUET_COMPRESSION = "zstd"
+
+
+def channel_column(channel):
+    return f"channel_{channel + 1}"
+
+
+def analysis_file_name(file_name, export_format):
+    base = file_name[:-4] if file_name.endswith(".bin") else file_name
+    return base + ANALYSIS_EXPORT_FORMATS[export_format]
+
+
+def channel_labels(metadata):
+    # {column: display name} with the custom channel names of the recording
+    channel_names = metadata.get("channel_names") or {}
+    return {
+        channel_column(ch): get_channel_name(ch, channel_names) for ch in metadata["channels"]
+    }
+
+
+def count_records(reader):
+    # Records yielded by reader.iter_chunks(): all but the acquisition time marker.
+    # The index of an IT02 file is scanned in memory, no sidecar is written.
+    reader.open_index(save=False)
+    n_records = reader.scanned_records
+    if n_records > 0:
+        _, counts = reader.decode_segment(reader.index_offsets[-1], reader.scanned_offset)
+        if counts.shape[1] > 0 and not counts[:, -1].any():
+            n_records -= 1
+    return n_records
+
+
+class NpyStreamWriter:
+    # Writes a 1-d .npy file of known length chunk by chunk (np.load mmap_mode="r" friendly)
+    def __init__(self, file, dtype, length):
+        self.file = file
+        self.dtype = np.dtype(dtype)
+        self.length = length
+        self.written = 0
+        np.lib.format.write_array_header_1_0(
+            file,
+            {
+                "descr": np.lib.format.dtype_to_descr(self.dtype),
+                "fortran_order": False,
+                "shape": (length,),
+            },
+        )
+
+    def write(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self.file.write(values.tobytes())
+        self.written += len(values)
+
+    def close(self):
+        if self.written != self.length:
+            raise ValueError(f"Expected {self.length} records, got {self.written}")
+
+
+def export_npy(reader, output_file_name, chunk_records, progress):
+    # Single structured array (time_ns + one field per channel), metadata in a .json sidecar
+    columns = [channel_column(ch) for ch in reader.channels]
+    dtype = np.dtype([("time_ns", "<f8")] + [(column, "<u4") for column in columns])
+    with open(output_file_name, "wb") as file:
+        writer = NpyStreamWriter(file, dtype, count_records(reader))
+        for times_ns, counts in reader.iter_chunks(chunk_records, progress=progress):
+            records = np.empty(len(times_ns), dtype=dtype)
+            records["time_ns"] = times_ns
+            for position, column in enumerate(columns):
+                records[column] = counts[position]
+            writer.write(records)
+        writer.close()
+
+
+def export_npz(reader, output_file_name, chunk_records, progress, compressed=False):
+    # One array per column plus a "metadata" JSON string. Columns are streamed to
+    # temporary .npy files in a single pass, then stored in the archive.
+    columns = ["time_ns"] + [channel_column(ch) for ch in reader.channels]
+    dtypes = ["<f8"] + ["<u4"] * len(reader.channels)
+    n_records = count_records(reader)
+    compression = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = [open(os.path.join(tmp_dir, column + ".npy"), "wb") for column in columns]
+        try:
+            writers = [
+                NpyStreamWriter(file, dtype, n_records) for file, dtype in zip(files, dtypes)
+            ]
+            for times_ns, counts in reader.iter_chunks(chunk_records, progress=progress):
+                writers[0].write(times_ns)
+                for position, writer in enumerate(writers[1:]):
+                    writer.write(counts[position])
+            for writer in writers:
+                writer.close()
+        finally:
+            for file in files:
+                file.close()
+        with zipfile.ZipFile(output_file_name, "w", compression, allowZip64=True) as archive:
+            for column in columns:
+                archive.write(os.path.join(tmp_dir, column + ".npy"), column + ".npy")
+            metadata_path = os.path.join(tmp_dir, "metadata.npy")
+            np.save(metadata_path, np.array(json.dumps(reader.metadata)))
+            archive.write(metadata_path, "metadata.npy")
+
+
+def export_parquet(reader, output_file_name, chunk_records, progress):
+    # One row group per chunk, min/max statistics on every column. Channel ids and
+    # names are stored as field metadata, the file metadata in the schema metadata.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires the pyarrow package (pip install pyarrow)")
+    labels = channel_labels(reader.metadata)
+    fields = [pa.field("time_ns", pa.float64(), metadata={"unit": "ns"})]
+    for ch in reader.channels:
+        fields.append(
+            pa.field(
+                channel_column(ch),
+                pa.uint32(),
+                metadata={"channel": str(ch), "channel_name": labels[channel_column(ch)]},
+            )
+        )
+    schema = pa.schema(fields, metadata={"intensity_tracing_metadata": json.dumps(reader.metadata)})
+    with pq.ParquetWriter(
+        output_file_name, schema, compression=PARQUET_COMPRESSION, write_statistics=True
+    ) as writer:
+        for times_ns, counts in reader.iter_chunks(chunk_records, progress=progress):
+            arrays = [pa.array(times_ns)] + [pa.array(counts[position]) for position in range(len(reader.channels))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema), row_group_size=chunk_records)
+
+
+def export_hdf5(reader, output_file_name, chunk_records, progress):
+    # Chunked gzip datasets, channel ids and names as dataset attributes
+    try:
+        import h5py
+    except ImportError:
+        raise ValueError("HDF5 export requires the h5py package (pip install h5py)")
+    labels = channel_labels(reader.metadata)
+    n_records = count_records(reader)
+    dataset_chunks = (min(max(1, n_records), chunk_records),)
+    with h5py.File(output_file_name, "w") as file:
+        file.attrs["metadata"] = json.dumps(reader.metadata)
+        datasets = [
+            file.create_dataset("time_ns", (n_records,), "f8", chunks=dataset_chunks, compression="gzip")
+        ]
+        for ch in reader.channels:
+            dataset = file.create_dataset(
+                channel_column(ch), (n_records,), "u4", chunks=dataset_chunks, compression="gzip"
+            )
+            dataset.attrs["channel"] = ch
+            dataset.attrs["channel_name"] = labels[channel_column(ch)]
+            datasets.append(dataset)
+        start = 0
+        for times_ns, counts in reader.iter_chunks(chunk_records, progress=progress):
+            stop = start + len(times_ns)
+            datasets[0][start:stop] = times_ns
+            for position, dataset in enumerate(datasets[1:]):
+                dataset[start:stop] = counts[position]
+            start = stop
+
+
+EXPORTERS = {
+    "parquet": export_parquet,
+    "npz": export_npz,
+    "npy": export_npy,
+    "hdf5": export_hdf5,
+}
+
+
+def export_recording(
+    file_name,
+    export_format,
+    output_file_name=None,
+    chunk_records=IT02_CHUNK_RECORDS,
+    progress=None,
+):
+    # Streams an IT02 (or IT03) recording into an analysis format in constant
+    # memory. The output is written next to its destination and moved in place
+    # once complete. Returns the output file name.
+    if export_format not in EXPORTERS:
+        raise ValueError(f"Unknown analysis export format: {export_format}")
+    if output_file_name is None:
+        output_file_name = analysis_file_name(file_name, export_format)
+    tmp_path = output_file_name + ".tmp"
+    reader = open_reader(file_name)
+    try:
+        EXPORTERS[export_format](reader, tmp_path, chunk_records, progress)
+        os.replace(tmp_path, output_file_name)
+        if export_format == "npy":
+            with open(output_file_name[:-4] + ".json", "w") as file:
+                json.dump(reader.metadata, file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        reader.close()
+    return output_file_name
@@ -0,0 +1,324 @@
+import fnmatch
+import json
+import os
+import struct
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+
+from gui_components.analysis_export import (
+    ANALYSIS_EXPORT_FORMATS,
+    NpyStreamWriter,
+    analysis_file_name,
+    export_recording,
+)
+from gui_components.it02_decoder import IT02_MAGIC
+from gui_components.it02_reader import IT02_CHUNK_RECORDS, IT02Reader
+from gui_components.it03_reader import convert_it02_to_it03, it03_file_name
+
+# "summary" only reads the files, every other format writes one output per file
+BATCH_FORMATS = ["summary", "it03"] + list(ANALYSIS_EXPORT_FORMATS)
+BATCH_DEFAULT_PATTERN = "*.bin"
+BATCH_MANIFEST_NAME = "batch_manifest.jsonl"
+
+# Time tagger files: b"ITT1", u32 JSON length, header JSON, then 9 byte records
+# (u8 event: channel index or F/L/P marker, f64 time in ns)
+ITT1_MAGIC = b"ITT1"
+ITT1_RECORD_DTYPE = np.dtype([("event", "u1"), ("time_ns", "<f8")])
+ITT1_EVENTS = {70: "frame", 76: "line", 80: "pixel"}
+ITT1_FORMATS = ["summary", "parquet", "npz", "npy"]
+
+
+def file_kind(file_name):
+    # "it02", "itt1" or None, from the file magic
+    try:
+        with open(file_name, "rb") as file:
+            magic = file.read(4)
+    except OSError:
+        return None
+    if magic == IT02_MAGIC:
+        return "it02"
+    if magic == ITT1_MAGIC:
+        return "itt1"
+    return None
+
+
+def find_recordings(roots, pattern=BATCH_DEFAULT_PATTERN):
+    # (root, file name, kind) of every IT02/ITT1 file below the roots. Outputs
+    # of earlier runs (IT03 containers, analysis copies) never match the magic.
+    for root in roots:
+        for folder, _, names in os.walk(root):
+            for name in sorted(names):
+                if not fnmatch.fnmatch(name, pattern):
+                    continue
+                file_name = os.path.join(folder, name)
+                kind = file_kind(file_name)
+                if kind is not None:
+                    yield root, file_name, kind
+
+
+def batch_output_name(root, file_name, batch_format, output_dir=None):
+    # Next to the source by default, else the same relative path under output_dir
+    if batch_format == "summary":
+        return None
+    if output_dir is not None:
+        file_name = os.path.join(output_dir, os.path.relpath(file_name, root))
+    if batch_format == "it03":
+        return it03_file_name(file_name)
+    return analysis_file_name(file_name, batch_format)
+
+
+def read_manifest(manifest_path):
+    # Latest entry per (source, format). Lines are appended as files complete,
+    # a torn last line (interrupted run) is ignored.
+    entries = {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                    entries[(entry["source"], entry["format"])] = entry
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def is_done(entry, size, mtime_ns):
+    # Unsupported files (e.g. time tagger files to IT03) are final as well
+    if entry is None or entry.get("status") not in ("done", "unsupported"):
+        return False
+    if entry.get("size") != size or entry.get("mtime_ns") != mtime_ns:
+        return False
+    output = entry.get("output")
+    return output is None or os.path.exists(output)
+
+
+def summarize_it02(file_name):
+    reader = IT02Reader(file_name)
+    try:
+        metadata = reader.metadata
+        n_channels = len(reader.channels)
+        total_counts = np.zeros(n_channels, dtype=np.int64)
+        max_counts = np.zeros(n_channels, dtype=np.int64)
+        records = 0
+        first_time = last_time = None
+        for times_ns, counts in reader.iter_chunks():
+            if len(times_ns) == 0:
+                continue
+            if first_time is None:
+                first_time = float(times_ns[0])
+            last_time = float(times_ns[-1])
+            records += len(times_ns)
+            total_counts += counts.sum(axis=1, dtype=np.int64)
+            np.maximum(max_counts, counts.max(axis=1), out=max_counts)
+        end_time = reader.final_time_marker if reader.final_time_marker is not None else last_time
+    finally:
+        reader.close()
+    duration_s = end_time / 1_000_000_000 if end_time is not None else 0.0
+    bins = end_time / reader.bin_width_ns if end_time else 0
+    return {
+        "channels": [ch + 1 for ch in metadata["channels"]],
+        "bin_width_micros": metadata["bin_width_micros"],
+        "acquisition_time_millis": metadata.get("acquisition_time_millis"),
+        "records": records,
+        "duration_s": duration_s,
+        "first_time_ns": first_time,
+        "total_counts": total_counts.tolist(),
+        "max_counts": max_counts.tolist(),
+        "mean_counts": [float(total / bins) if bins > 0 else 0.0 for total in total_counts],
+    }
+
+
+def open_itt1(file_name):
+    # (header, memory-mapped records); a partial trailing record is ignored
+    with open(file_name, "rb") as file:
+        if file.read(4) != ITT1_MAGIC:
+            raise ValueError("The file is not a valid Time Tagger file")
+        (json_length,) = struct.unpack("<I", file.read(4))
+        header = json.loads(file.read(json_length).decode("utf-8"))
+    data_offset = 8 + json_length
+    n_records = (os.path.getsize(file_name) - data_offset) // ITT1_RECORD_DTYPE.itemsize
+    if n_records <= 0:
+        return header, np.empty(0, dtype=ITT1_RECORD_DTYPE)
+    records = np.memmap(
+        file_name, dtype=ITT1_RECORD_DTYPE, mode="r", offset=data_offset, shape=(n_records,)
+    )
+    return header, records
+
+
+def itt1_event_name(event):
+    return ITT1_EVENTS.get(event, f"channel_{event + 1}")
+
+
+def summarize_itt1(file_name):
+    header, records = open_itt1(file_name)
+    event_counts = np.zeros(256, dtype=np.int64)
+    first_time = last_time = None
+    for start in range(0, len(records), IT02_CHUNK_RECORDS):
+        chunk = records[start : start + IT02_CHUNK_RECORDS]
+        event_counts += np.bincount(chunk["event"], minlength=256)
+        if first_time is None:
+            first_time = float(chunk["time_ns"][0])
+        last_time = float(chunk["time_ns"][-1])
+    return {
+        "channels": [ch + 1 for ch in header.get("channels") or []],
+        "laser_period_ns": header.get("laser_period_ns"),
+        "records": len(records),
+        "duration_s": (last_time - first_time) / 1_000_000_000 if first_time is not None else 0.0,
+        "first_time_ns": first_time,
+        "events": {
+            itt1_event_name(event): int(event_counts[event]) for event in np.flatnonzero(event_counts)
+        },
+    }
+
+
+def export_itt1(file_name, batch_format, output):
+    # Time tagger records as an event (uint8) and a time_ns (float64) column
+    header, records = open_itt1(file_name)
+    tmp_path = output + ".tmp"
+    try:
+        if batch_format == "npy":
+            with open(tmp_path, "wb") as file:
+                writer = NpyStreamWriter(file, ITT1_RECORD_DTYPE, len(records))
+                for start in range(0, len(records), IT02_CHUNK_RECORDS):
+                    writer.write(records[start : start + IT02_CHUNK_RECORDS])
+                writer.close()
+        elif batch_format == "npz":
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for column in ("event", "time_ns"):
+                    with open(os.path.join(tmp_dir, column + ".npy"), "wb") as file:
+                        writer = NpyStreamWriter(file, ITT1_RECORD_DTYPE[column], len(records))
+                        for start in range(0, len(records), IT02_CHUNK_RECORDS):
+                            writer.write(records[column][start : start + IT02_CHUNK_RECORDS])
+                        writer.close()
+                np.save(os.path.join(tmp_dir, "metadata.npy"), np.array(json.dumps(header)))
+                with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+                    for column in ("event", "time_ns", "metadata"):
+                        archive.write(os.path.join(tmp_dir, column + ".npy"), column + ".npy")
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError("Parquet export requires the pyarrow package (pip install pyarrow)")
+            schema = pa.schema(
+                [pa.field("event", pa.uint8()), pa.field("time_ns", pa.float64(), metadata={"unit": "ns"})],
+                metadata={"time_tagger_metadata": json.dumps(header)},
+            )
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                for start in range(0, len(records), IT02_CHUNK_RECORDS):
+                    chunk = records[start : start + IT02_CHUNK_RECORDS]
+                    writer.write_table(
+                        pa.Table.from_arrays(
+                            [pa.array(np.asarray(chunk["event"])), pa.array(np.asarray(chunk["time_ns"]))],
+                            schema=schema,
+                        )
+                    )
+        os.replace(tmp_path, output)
+        if batch_format == "npy":
+            with open(output[:-4] + ".json", "w") as file:
+                json.dump(header, file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output
+
+
+def process_recording(file_name, kind, batch_format, output):
+    # Runs in a worker process, returns the manifest entry of the file
+    stat = os.stat(file_name)
+    entry = {
+        "source": os.path.abspath(file_name),
+        "kind": kind,
+        "format": batch_format,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "output": output,
+    }
+    started_at = time.perf_counter()
+    try:
+        if kind == "itt1" and batch_format not in ITT1_FORMATS:
+            entry["status"] = "unsupported"
+            entry["output"] = None
+            return entry
+        if output is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if batch_format == "summary":
+            entry["summary"] = summarize_it02(file_name) if kind == "it02" else summarize_itt1(file_name)
+        elif kind == "itt1":
+            export_itt1(file_name, batch_format, output)
+        elif batch_format == "it03":
+            convert_it02_to_it03(file_name, output)
+        else:
+            export_recording(file_name, batch_format, output)
+        entry["status"] = "done"
+    except Exception as e:
+        entry["status"] = "error"
+        entry["error"] = str(e) or type(e).__name__
+    entry["seconds"] = round(time.perf_counter() - started_at, 3)
+    return entry
+
+
+def run_batch(
+    roots,
+    batch_format,
+    output_dir=None,
+    manifest_path=None,
+    pattern=BATCH_DEFAULT_PATTERN,
+    workers=None,
+    force=False,
+    log=print,
+):
+    # Processes every recording below the roots in a process pool (one file per
+    # worker, largest first). Files whose size and mtime match a "done" manifest
+    # entry are skipped, so an interrupted run resumes where it stopped.
+    # Returns {status: number of files}.
+    if batch_format not in BATCH_FORMATS:
+        raise ValueError(f"Unknown batch format: {batch_format}")
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir or roots[0], BATCH_MANIFEST_NAME)
+    manifest = {} if force else read_manifest(manifest_path)
+    jobs = []
+    totals = {"done": 0, "skipped": 0, "error": 0, "unsupported": 0}
+    for root, file_name, kind in find_recordings(roots, pattern):
+        stat = os.stat(file_name)
+        if is_done(manifest.get((os.path.abspath(file_name), batch_format)), stat.st_size, stat.st_mtime_ns):
+            totals["skipped"] += 1
+            continue
+        output = batch_output_name(root, file_name, batch_format, output_dir)
+        jobs.append((stat.st_size, file_name, kind, output))
+    jobs.sort(reverse=True)
+    log(f"{len(jobs)} file(s) to process, {totals['skipped']} already done")
+    if not jobs:
+        return totals
+    workers = workers or os.cpu_count() or 1
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    os.makedirs(manifest_dir, exist_ok=True)
+    with open(manifest_path, "a", encoding="utf-8") as manifest_file:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        try:
+            pending = {
+                executor.submit(process_recording, file_name, kind, batch_format, output)
+                for _, file_name, kind, output in jobs
+            }
+            completed = 0
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    entry = future.result()
+                    manifest_file.write(json.dumps(entry) + "\n")
+                    manifest_file.flush()
+                    totals[entry["status"]] += 1
+                    completed += 1
+                    message = f"[{completed}/{len(jobs)}] {entry['status']} {entry['source']}"
+                    if entry["status"] == "error":
+                        message += f": {entry['error']}"
+                    log(message)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return totals
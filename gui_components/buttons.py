@@ -7,6 +7,7 @@ import flim_labs
 from PyQt6.QtWidgets import QApplication, QWidget, QPushButton, QCheckBox, QHBoxLayout, QMessageBox, QGridLayout, QVBoxLayout, QLabel
 from PyQt6.QtCore import QPropertyAnimation, Qt, QTimer, QSize, QThreadPool
 from PyQt6.QtGui import QIcon, QPixmap, QColor
+from gui_components.cps_engine import CPSEngine
 from gui_components.data_export_controls import ExportData
 from gui_components.intensity_tracing_controller import IntensityTracing, IntensityTracingOnlyCPS, IntensityTracingPlot
 from gui_components.logo_utilities import TitlebarIcon
@@ -250,12 +251,7 @@ class ButtonsActionsController:
         if not read_data:
             only_cps_widgets = [item for item in app.enabled_channels if item not in app.intensity_plots_to_show]
             only_cps_widgets.sort()
-            for ch in app.enabled_channels:
-                app.cps_counts[ch] = {
-                    "last_time_ns": 0,
-                    "last_count": 0,
-                    "current_count": 0,
-                }    
+            app.cps_engine = CPSEngine(app.enabled_channels)
             if len(only_cps_widgets) > 0:        
                 for index, channel in enumerate(only_cps_widgets):
                     IntensityTracingOnlyCPS.create_only_cps_widget(app, index, channel)                    
@@ -271,7 +267,12 @@ class ButtonsActionsController:
     @staticmethod
     def stop_button_pressed(app, app_close = False):
         app.acquisition_stopped = True
-        app.cps_counts.clear()   
+        IntensityTracing.stop_queue_consumer(app)
+        IntensityTracing.stop_sinks(app)
+        IntensityTracing.stop_ingestion_monitor(app)
+        IntensityTracing.show_acquisition_summary(app)
+        app.render_scheduler.stop()
+        app.cps_engine = None
         for _, widget in app.acquisition_time_countdown_widgets.items():
             if widget and isinstance(widget, QWidget):
                 widget.setVisible(False)        
@@ -286,7 +287,6 @@ class ButtonsActionsController:
         app.control_inputs[STOP_BUTTON].setEnabled(False)
         QApplication.processEvents()
         flim_labs.request_stop()
-        app.pull_from_queue_timer.stop() 
         if app.write_data:
                 QTimer.singleShot(
                     300,
@@ -297,7 +297,10 @@ class ButtonsActionsController:
     @staticmethod
     def reset_button_pressed(app):
         flim_labs.request_stop()
-        app.pull_from_queue_timer.stop() 
+        IntensityTracing.stop_queue_consumer(app)
+        IntensityTracing.stop_sinks(app)
+        IntensityTracing.stop_ingestion_monitor(app)
+        app.render_scheduler.stop(flush=False)
         app.blank_space.show()      
         app.control_inputs[START_BUTTON].setEnabled(len(app.enabled_channels) > 0)
         app.control_inputs[STOP_BUTTON].setEnabled(False)
@@ -313,10 +316,11 @@ class ButtonsActionsController:
             wrapper.setParent(None)
             wrapper.deleteLater()  
         app.intensity_lines.clear()         
+        app.trace_store = None
         app.intensity_charts.clear()
         app.cps_charts_widgets.clear()
         app.cps_ch.clear()
-        app.cps_counts.clear()  
+        app.cps_engine = None
         app.cps_widgets_animation.clear()     
         app.acquisition_time_countdown_widgets.clear()         
         app.intensity_charts_wrappers.clear()
@@ -3,7 +3,11 @@ from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QIcon
 from gui_components.progress_bar import ProgressBar
 from gui_components.resource_path import resource_path
-from gui_components.settings import TIME_TAGGER_PROGRESS_BAR
+from gui_components.settings import (
+    EXPORT_PROGRESS_BAR,
+    INGESTION_STATUS_LABEL,
+    TIME_TAGGER_PROGRESS_BAR,
+)
 current_path = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_path, ".."))
 
@@ -49,6 +53,16 @@ class ControlsBar:
         )
         app.widgets[TIME_TAGGER_PROGRESS_BAR] = time_tagger_progress_bar
         layout_container.addWidget(time_tagger_progress_bar)
+        # Saved data files being copied out of the data folder
+        export_progress_bar = ProgressBar(visible=False, label_text="Saving data files...")
+        app.widgets[EXPORT_PROGRESS_BAR] = export_progress_bar
+        layout_container.addWidget(export_progress_bar)
+        # Ingestion backlog/latency status (visible during acquisitions)
+        ingestion_status_label = QLabel("")
+        ingestion_status_label.setStyleSheet(GUIStyles.ingestion_status_style())
+        ingestion_status_label.setVisible(False)
+        app.widgets[INGESTION_STATUS_LABEL] = ingestion_status_label
+        layout_container.addWidget(ingestion_status_label)
         layout_container.addSpacing(5)        
         return blank_space, layout_container
 
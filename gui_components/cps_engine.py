@@ -0,0 +1,70 @@
+from collections import deque
+import numpy as np
+
+from gui_components.settings import CPS_WINDOW_NS
+
+
+class CPSEngine:
+    # Array-backed counts-per-second for all enabled channels.
+    # Each batch is reduced with a single NumPy sum and pushed into a sliding
+    # window of batch totals; old batches are evicted from the front, so every
+    # update costs O(1) amortized regardless of the number of samples kept.
+    def __init__(self, channels, window_ns=CPS_WINDOW_NS):
+        self.channels = np.array(sorted(channels), dtype=np.int64)
+        self.channel_positions = {int(ch): i for i, ch in enumerate(self.channels)}
+        self.window_ns = window_ns
+        self.values = np.zeros(len(self.channels), dtype=np.float64)
+        self.updated = False
+        self.reset()
+
+    def reset(self):
+        self.batches = deque()
+        self.window_counts = np.zeros(len(self.channels), dtype=np.float64)
+        self.window_start_ns = None
+        self.last_time_ns = None
+        self.values[:] = 0
+        self.updated = False
+
+    def update(self, times_ns, counts):
+        if len(times_ns) == 0 or len(self.channels) == 0:
+            return
+        channel_counts = counts[:, self.channels]
+        if self.window_start_ns is None:
+            # First sample only opens the window, as a time reference
+            self.window_start_ns = times_ns[0]
+            times_ns = times_ns[1:]
+            channel_counts = channel_counts[1:]
+            if len(times_ns) == 0:
+                return
+        batch_counts = channel_counts.sum(axis=0)
+        self.last_time_ns = times_ns[-1]
+        self.batches.append((self.last_time_ns, batch_counts))
+        self.window_counts += batch_counts
+        # Keep at least one batch in the window
+        while (
+            len(self.batches) > 1
+            and self.last_time_ns - self.batches[0][0] > self.window_ns
+        ):
+            evicted_time_ns, evicted_counts = self.batches.popleft()
+            self.window_counts -= evicted_counts
+            self.window_start_ns = evicted_time_ns
+        elapsed_ns = self.last_time_ns - self.window_start_ns
+        if elapsed_ns > 0:
+            np.divide(self.window_counts, elapsed_ns / 1_000_000_000, out=self.values)
+            self.updated = True
+
+    def value(self, channel):
+        return self.values[self.channel_positions[channel]]
+
+    def above_threshold(self, threshold, values=None):
+        values = self.values if values is None else values
+        if threshold <= 0:
+            return np.zeros(len(values), dtype=bool)
+        return values > threshold
+
+    def snapshot(self):
+        # Returns a copy of the current values if they changed since the last call
+        if not self.updated:
+            return None
+        self.updated = False
+        return self.values.copy()
@@ -1,11 +1,17 @@
 from functools import partial
 import os
-import shutil
 from PyQt6.QtWidgets import QHBoxLayout, QWidget, QFileDialog
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 from export_data_scripts.script_files_utils import ScriptFileUtils
+from gui_components.analysis_export import export_recording
+from gui_components.file_checksum import new_hasher, write_checksum
+from gui_components.file_finalize import finalize_file
 from gui_components.file_utilities import FileUtils
 from gui_components.format_utilities import FormatUtils
+from gui_components.gui_styles import GUIStyles
 from gui_components.helpers import calc_timestamp
+from gui_components.load_progress import LoadProgress, format_eta
+from gui_components.select_control import SelectControl
 from gui_components.settings import *
 from gui_components.top_bar import TopBar
 
@@ -24,6 +30,8 @@ class ExportDataControl(QWidget):
         layout.addWidget(self.info_link_widget)
         layout.addLayout(self.export_data_control)
         self.export_data_control.addSpacing(10)
+        # Analysis-ready copy (Parquet, NPZ, NPY, HDF5) of the saved file
+        layout.addWidget(self.create_analysis_copy_select())
         # layout.addLayout(self.file_size_info_layout)
         # layout.addSpacing(5)
         # Time Tagger
@@ -38,6 +46,32 @@ class ExportDataControl(QWidget):
         self.app.control_inputs[SETTINGS_WRITE_DATA] = inp
         return info_link_widget, export_data_control
 
+    def create_analysis_copy_select(self):
+        analysis_copy_widget = QWidget()
+        row = QHBoxLayout()
+        row.setContentsMargins(0, 0, 0, 0)
+        labels = {value: label for label, value in ANALYSIS_COPY_OPTIONS.items()}
+        _, inp = SelectControl.setup(
+            "Analysis copy:",
+            labels.get(self.app.analysis_copy_format, "None"),
+            row,
+            list(ANALYSIS_COPY_OPTIONS),
+            self.on_analysis_copy_format_changed,
+            spacing=None,
+            control_layout="horizontal",
+        )
+        inp.setStyleSheet(GUIStyles.set_input_select_style())
+        analysis_copy_widget.setLayout(row)
+        analysis_copy_widget.setVisible(self.app.write_data)
+        self.app.control_inputs[SETTINGS_ANALYSIS_COPY_FORMAT] = inp
+        self.app.widgets[ANALYSIS_COPY_WIDGET] = analysis_copy_widget
+        return analysis_copy_widget
+
+    def on_analysis_copy_format_changed(self, index):
+        label = self.app.control_inputs[SETTINGS_ANALYSIS_COPY_FORMAT].itemText(index)
+        self.app.analysis_copy_format = ANALYSIS_COPY_OPTIONS[label]
+        self.app.settings.setValue(SETTINGS_ANALYSIS_COPY_FORMAT, self.app.analysis_copy_format)
+
     def create_file_size_info_row(self):
         file_size_info_layout = TopBar.create_file_size_info_row(
             self.app.bin_file_size,
@@ -59,6 +93,8 @@ class ExportDataControl(QWidget):
             self.app.bin_file_size_label.hide()
         if TIME_TAGGER_WIDGET in self.app.widgets:
             self.app.widgets[TIME_TAGGER_WIDGET].setVisible(state)
+        if ANALYSIS_COPY_WIDGET in self.app.widgets:
+            self.app.widgets[ANALYSIS_COPY_WIDGET].setVisible(state)
 
 
 class DataExportActions:
@@ -95,33 +131,55 @@ class ExportData:
             timestamp = calc_timestamp()
             time_tagger = app.time_tagger
             intensity_tracing_file = FileUtils.get_recent_intensity_tracing_file()
-            new_intensity_file_path, save_dir, save_name = (
-                ExportData.rename_and_move_file(
-                    intensity_tracing_file,
-                    "intensity_tracing",
-                    "Save Intensity Tracing files",
-                    timestamp,
-                    app,
-                )
+            save_dir, save_name = ExportData.ask_save_path(
+                "Save Intensity Tracing files", app
             )
-            if not new_intensity_file_path:
+            if not save_dir:
                 return
+            new_intensity_file_path = ExportData.export_file_path(
+                save_name, save_dir, "intensity_tracing", timestamp
+            )
+            transfers = [(intensity_tracing_file, new_intensity_file_path)]
+            new_time_tagger_path = ""
             if time_tagger:
                 time_tagger_file = FileUtils.get_recent_time_tagger_file()
-                new_time_tagger_path = ExportData.copy_file(
-                    time_tagger_file,
+                new_time_tagger_path = ExportData.export_file_path(
+                    save_name, save_dir, "time_tagger_intensity", timestamp
+                )
+                transfers.append((time_tagger_file, new_time_tagger_path))
+            ExportData.finalize_files(
+                app,
+                transfers,
+                partial(
+                    ExportData.on_files_finalized,
+                    app,
+                    new_intensity_file_path,
+                    new_time_tagger_path,
                     save_name,
                     save_dir,
-                    "time_tagger_intensity",
                     timestamp,
-                )
-            new_time_tagger_path = (
-                ""
-                if not time_tagger or not new_time_tagger_path
-                else new_time_tagger_path
+                    time_tagger,
+                ),
             )
+        except Exception as e:
+            ScriptFileUtils.show_error_message(e)
 
+    @staticmethod
+    def on_files_finalized(
+        app,
+        new_intensity_file_path,
+        new_time_tagger_path,
+        save_name,
+        save_dir,
+        timestamp,
+        time_tagger,
+    ):
+        try:
             file_paths = {"intensity_tracing": new_intensity_file_path}
+            if app.analysis_copy_format != DEFAULT_ANALYSIS_COPY_FORMAT:
+                ExportData.save_analysis_copy(
+                    new_intensity_file_path, app.analysis_copy_format
+                )
             
             channel_names = getattr(app, 'channel_names', {})
             
@@ -138,6 +196,62 @@ class ExportData:
         except Exception as e:
             ScriptFileUtils.show_error_message(e)
 
+    @staticmethod
+    def finalize_files(app, transfers, on_finalized):
+        # The data files are linked/cloned/copied in the background, each one
+        # gets a checksum sidecar
+        rehash = app.settings.value(SETTINGS_CHECKSUM_LINKED_FILES, DEFAULT_CHECKSUM_LINKED_FILES) in ["true", True]
+        progress_bar = app.widgets.get(EXPORT_PROGRESS_BAR)
+        signals = FinalizeFilesWorkerSignals()
+        if progress_bar is not None:
+            signals.progress.connect(partial(ExportData.on_finalize_progress, app))
+        signals.success.connect(partial(ExportData.on_finalize_success, app, on_finalized))
+        signals.error.connect(partial(ExportData.on_finalize_error, app))
+        task = FinalizeFilesTask(transfers, signals, rehash)
+        QThreadPool.globalInstance().start(task)
+
+    @staticmethod
+    def on_finalize_progress(app, done_bytes, total_bytes, eta_s):
+        progress_bar = app.widgets[EXPORT_PROGRESS_BAR]
+        if progress_bar.isHidden():
+            if done_bytes >= total_bytes:
+                # Linked or cloned at once
+                return
+            progress_bar.set_visible(True)
+        progress_bar.update_progress(
+            done_bytes,
+            total_bytes,
+            f"Saving data files ({FormatUtils.format_size(done_bytes)} / "
+            f"{FormatUtils.format_size(total_bytes)}, {format_eta(eta_s)})",
+        )
+
+    @staticmethod
+    def hide_finalize_progress(app):
+        progress_bar = app.widgets.get(EXPORT_PROGRESS_BAR)
+        if progress_bar is not None and not progress_bar.isHidden():
+            progress_bar.clear_progress()
+            progress_bar.set_visible(False)
+
+    @staticmethod
+    def on_finalize_success(app, on_finalized, methods):
+        ExportData.hide_finalize_progress(app)
+        print(f"Data files saved ({', '.join(methods)})")
+        on_finalized()
+
+    @staticmethod
+    def on_finalize_error(app, error):
+        ExportData.hide_finalize_progress(app)
+        ScriptFileUtils.show_error_message(error)
+
+    @staticmethod
+    def save_analysis_copy(file_path, export_format):
+        # Converted in the background, the copy is written next to the .bin file
+        signals = AnalysisCopyWorkerSignals()
+        signals.success.connect(lambda path: print(f"Analysis copy saved: {path}"))
+        signals.error.connect(ScriptFileUtils.show_error_message)
+        task = AnalysisCopyTask(file_path, export_format, signals)
+        QThreadPool.globalInstance().start(task)
+
     @staticmethod
     def download_scripts(
         bin_file_paths,
@@ -165,8 +279,7 @@ class ExportData:
         )
 
     @staticmethod
-    def copy_file(
-        origin_file_path,
+    def export_file_path(
         save_name,
         save_dir,
         file_type,
@@ -175,19 +288,10 @@ class ExportData:
     ):
         new_filename = f"{save_name}_{timestamp}_{file_type}"
         new_filename = f"{FileUtils.clean_filename(new_filename)}.{file_extension}"
-        new_file_path = os.path.join(save_dir, new_filename)
-        shutil.copyfile(origin_file_path, new_file_path)
-        return new_file_path
+        return os.path.join(save_dir, new_filename)
 
     @staticmethod
-    def rename_and_move_file(
-        original_file_path,
-        file_type,
-        file_dialog_prompt,
-        timestamp,
-        app,
-        file_extension="bin",
-    ):
+    def ask_save_path(file_dialog_prompt, app):
         dialog = QFileDialog()
         save_path, _ = dialog.getSaveFileName(
             app,
@@ -197,12 +301,58 @@ class ExportData:
             options=QFileDialog.Option.DontUseNativeDialog,
         )
         if save_path:
-            save_dir = os.path.dirname(save_path)
-            save_name = os.path.basename(save_path)
-            new_filename = f"{save_name}_{timestamp}_{file_type}"
-            new_filename = f"{FileUtils.clean_filename(new_filename)}.{file_extension}"
-            new_file_path = os.path.join(save_dir, new_filename)
-            shutil.copyfile(original_file_path, new_file_path)
-            return new_file_path, save_dir, save_name
+            return os.path.dirname(save_path), os.path.basename(save_path)
         else:
-            return None, None, None
+            return None, None
+
+
+class FinalizeFilesWorkerSignals(QObject):
+    progress = pyqtSignal(float, float, float)
+    success = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+
+class FinalizeFilesTask(QRunnable):
+    # Puts every (source, destination) pair in place with finalize_file, the
+    # sources stay in the data folder
+    def __init__(self, transfers, signals, rehash=False):
+        super().__init__()
+        self.transfers = transfers
+        self.signals = signals
+        self.rehash = rehash
+
+    def run(self):
+        try:
+            total_bytes = sum(os.path.getsize(source) for source, _ in self.transfers)
+            progress = LoadProgress(total_bytes, callback=self.signals.progress.emit)
+            methods = []
+            for source, destination in self.transfers:
+                # Hashed while copied, no separate read. Linked and cloned files
+                # are only read to hash them with rehash (checksum_linked_files).
+                hasher = new_hasher()
+                method = finalize_file(source, destination, progress=progress, hasher=hasher, rehash=self.rehash)
+                hashed = self.rehash or method == "copy"
+                write_checksum(destination, hasher if hashed else None, source=source, method=method)
+                methods.append(method)
+            self.signals.success.emit(methods)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+
+class AnalysisCopyWorkerSignals(QObject):
+    success = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+
+class AnalysisCopyTask(QRunnable):
+    def __init__(self, file_path, export_format, signals):
+        super().__init__()
+        self.file_path = file_path
+        self.export_format = export_format
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.signals.success.emit(export_recording(self.file_path, self.export_format))
+        except Exception as e:
+            self.signals.error.emit(str(e))
@@ -0,0 +1,249 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+from gui_components.settings import SINK_QUEUE_MAX_BATCHES
+
+LIVE_NPY_DIR = os.path.join(
+    os.environ.get("USERPROFILE") or os.path.expanduser("~"), ".flim-labs", "data", "live"
+)
+
+
+class DataSink:
+    # Base class for live acquisition consumers.
+    # process() receives (times_ns, counts) NumPy batches, counts has one
+    # column per hardware channel (8). It runs on the sink's own worker thread.
+    # dropped() receives the running total of records dropped for the sink in
+    # this acquisition, it runs on the producer thread and must not block.
+    name = "sink"
+
+    def open(self, metadata):
+        pass
+
+    def process(self, times_ns, counts):
+        pass
+
+    def dropped(self, records_dropped):
+        pass
+
+    def close(self):
+        pass
+
+
+class SinkWorker(threading.Thread):
+    # Feeds a single sink from a bounded queue: when the sink can not keep up
+    # new batches are dropped (and counted) instead of blocking the producer.
+    def __init__(self, sink, metadata, max_queue_batches=SINK_QUEUE_MAX_BATCHES):
+        super().__init__(name=f"sink-{sink.name}", daemon=True)
+        self.sink = sink
+        self.metadata = metadata
+        self.queue = queue.Queue(maxsize=max(1, max_queue_batches))
+        self.stop_event = threading.Event()
+        self.batches_received = 0
+        self.batches_processed = 0
+        self.batches_dropped = 0
+        self.records_processed = 0
+        self.records_dropped = 0
+        self.busy_s = 0.0
+        self.errors = 0
+        self.last_error = None
+
+    def submit(self, times_ns, counts):
+        self.batches_received += 1
+        try:
+            self.queue.put_nowait((times_ns, counts))
+            return True
+        except queue.Full:
+            self.batches_dropped += 1
+            self.records_dropped += len(times_ns)
+            self.sink.dropped(self.records_dropped)
+            return False
+
+    def run(self):
+        try:
+            self.sink.open(self.metadata)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            return
+        while not (self.stop_event.is_set() and self.queue.empty()):
+            try:
+                times_ns, counts = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            try:
+                self.sink.process(times_ns, counts)
+                self.batches_processed += 1
+                self.records_processed += len(times_ns)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+            self.busy_s += time.perf_counter() - start
+        try:
+            self.sink.close()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+
+    def stop(self, timeout=None):
+        # Pending batches are still processed before the sink is closed
+        self.stop_event.set()
+        self.join(timeout)
+
+    def get_stats(self):
+        return {
+            "sink": self.sink.name,
+            "batches_received": self.batches_received,
+            "batches_processed": self.batches_processed,
+            "batches_dropped": self.batches_dropped,
+            "records_processed": self.records_processed,
+            "records_dropped": self.records_dropped,
+            "queued_batches": self.queue.qsize(),
+            "records_per_s": (
+                self.records_processed / self.busy_s if self.busy_s > 0 else 0.0
+            ),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class SinkPipeline:
+    # Fan-out of live batches to every attached sink, each on its own worker
+    def __init__(self):
+        self.sinks = []
+        self.workers = []
+
+    def attach(self, sink, max_queue_batches=SINK_QUEUE_MAX_BATCHES):
+        self.sinks.append((sink, max_queue_batches))
+        return sink
+
+    def detach(self, sink):
+        self.sinks = [(s, size) for (s, size) in self.sinks if s is not sink]
+
+    def start(self, metadata):
+        # Previous workers must be done before sinks are reopened
+        self.stop(timeout=None)
+        self.workers = [
+            SinkWorker(sink, metadata, max_queue_batches)
+            for sink, max_queue_batches in self.sinks
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def publish(self, times_ns, counts):
+        # Never blocks: batches are shared read-only between sinks
+        for worker in self.workers:
+            worker.submit(times_ns, counts)
+
+    def stop(self, timeout=0):
+        # With timeout=0 workers finish their queued batches in the background
+        for worker in self.workers:
+            worker.stop(timeout)
+
+    def wait(self, sink, timeout=None):
+        # True once the worker of `sink` has closed it
+        for worker in self.workers:
+            if worker.sink is sink:
+                worker.join(timeout)
+                return not worker.is_alive()
+        return False
+
+    def is_running(self):
+        return any(worker.is_alive() for worker in self.workers)
+
+    def get_stats(self):
+        return [worker.get_stats() for worker in self.workers]
+
+
+class StatsSink(DataSink):
+    # Running totals per enabled channel
+    name = "stats"
+
+    def open(self, metadata):
+        self.channels = list(metadata.get("channels", []))
+        self.total_counts = np.zeros(len(self.channels), dtype=np.float64)
+        self.records = 0
+        self.first_time_ns = None
+        self.last_time_ns = None
+
+    def process(self, times_ns, counts):
+        self.total_counts += counts[:, self.channels].sum(axis=0)
+        self.records += len(times_ns)
+        if self.first_time_ns is None:
+            self.first_time_ns = times_ns[0]
+        self.last_time_ns = times_ns[-1]
+
+    def get_summary(self):
+        duration_s = (
+            (self.last_time_ns - self.first_time_ns) / 1_000_000_000
+            if self.records > 1
+            else 0.0
+        )
+        return {
+            "records": self.records,
+            "duration_s": duration_s,
+            "total_counts": {
+                ch: int(total) for ch, total in zip(self.channels, self.total_counts)
+            },
+            "mean_cps": {
+                ch: (total / duration_s if duration_s > 0 else 0.0)
+                for ch, total in zip(self.channels, self.total_counts)
+            },
+        }
+
+
+class NpyFileWriterSink(DataSink):
+    # Streams (time_ns, enabled channels counts) rows into a memory-mappable
+    # .npy, one new file in `folder` per acquisition
+    name = "npy_writer"
+
+    # Placeholder shape reserving enough header room for the final row count
+    RESERVED_ROWS = 10**15
+
+    def __init__(self, folder=LIVE_NPY_DIR):
+        self.folder = folder
+        self.file_path = None
+        self.file = None
+
+    def header(self, rows):
+        return {
+            "descr": np.lib.format.dtype_to_descr(np.dtype("<f8")),
+            "fortran_order": False,
+            "shape": (rows, 1 + len(self.channels)),
+        }
+
+    def open(self, metadata):
+        self.channels = list(metadata.get("channels", []))
+        self.rows = 0
+        os.makedirs(self.folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.file_path = os.path.join(self.folder, f"live-intensity-tracing_{timestamp}.npy")
+        self.file = open(self.file_path, "wb")
+        np.lib.format.write_array_header_1_0(
+            self.file, self.header(NpyFileWriterSink.RESERVED_ROWS)
+        )
+        self.data_offset = self.file.tell()
+
+    def process(self, times_ns, counts):
+        rows = np.empty((len(times_ns), 1 + len(self.channels)), dtype="<f8")
+        rows[:, 0] = times_ns
+        rows[:, 1:] = counts[:, self.channels]
+        self.file.write(rows.tobytes())
+        self.rows += len(times_ns)
+
+    def close(self):
+        if self.file is None:
+            return
+        # Rewrite the header with the real number of rows (same padded length)
+        try:
+            self.file.seek(0)
+            np.lib.format.write_array_header_1_0(self.file, self.header(self.rows))
+            if self.file.tell() != self.data_offset:
+                raise IOError("Unexpected .npy header size")
+        finally:
+            self.file.close()
+            self.file = None
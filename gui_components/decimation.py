@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def minmax_envelope(x, y, n_columns, x_range=None):
+    # Reduce a sorted (x, y) trace to one (min, max) pair per pixel column.
+    # Peaks are preserved and the output never exceeds 2 * n_columns points.
+    # Returned arrays are always new arrays (never views on the inputs).
+    n = len(x)
+    n_columns = int(n_columns)
+    if n_columns <= 0 or n <= 2 * n_columns:
+        return np.array(x, dtype=np.float64), np.array(y, dtype=np.float64)
+    x_start, x_end = (x[0], x[-1]) if x_range is None else x_range
+    if x_end <= x_start:
+        return np.array(x, dtype=np.float64), np.array(y, dtype=np.float64)
+    edges = np.linspace(x_start, x_end, n_columns + 1)
+    starts = np.searchsorted(x, edges[:-1], side="left")
+    ends = np.searchsorted(x, edges[1:], side="left")
+    ends[-1] = np.searchsorted(x, x_end, side="right")
+    non_empty = ends > starts
+    starts = starts[non_empty]
+    ends = ends[non_empty]
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    # Buckets are contiguous, so each one ends where the next non-empty one starts
+    y_visible = y[: ends[-1]]
+    y_min = np.minimum.reduceat(y_visible, starts)
+    y_max = np.maximum.reduceat(y_visible, starts)
+    out_x = np.empty(2 * len(starts), dtype=np.float64)
+    out_y = np.empty(2 * len(starts), dtype=np.float64)
+    out_x[0::2] = x[starts]
+    out_x[1::2] = x[ends - 1]
+    out_y[0::2] = y_min
+    out_y[1::2] = y_max
+    return out_x, out_y
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+import numpy as np
+
+from gui_components.it02_pyramid import IT02Pyramid
+
+DECODED_CACHE_VERSION = 2
+# Index arrays are stored with this prefix next to the pyramid arrays in spill files
+INDEX_PREFIX = "index_"
+DECODED_CACHE_DIR = os.path.join(tempfile.gettempdir(), "flim_labs_intensity_cache")
+
+
+def cache_key(file_name):
+    # A rewritten file (other size or mtime) never matches its old entry
+    stat = os.stat(file_name)
+    return os.path.abspath(file_name), stat.st_size, stat.st_mtime_ns
+
+
+def index_nbytes(index_state):
+    if index_state is None:
+        return 0
+    return index_state["offsets"].nbytes + index_state["times"].nbytes
+
+
+class DecodedCache:
+    # In-process LRU cache of opened recordings: key -> (metadata, reader index
+    # state, IT02Pyramid), everything the reader needs besides the file itself.
+    # Least recently used entries are evicted above max_bytes and, when a spill
+    # directory is set, written there as .npz files pruned to spill_max_bytes
+    # (recordings in read-only folders, where no sidecar can be written).
+    def __init__(self, max_bytes, spill_dir=None, spill_max_bytes=0):
+        self.max_bytes = max(0, int(max_bytes))
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = max(0, int(spill_max_bytes))
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        # (metadata copy, index state, pyramid) or None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                metadata, index_state, pyramid, _ = entry
+                return deepcopy(metadata), index_state, pyramid
+        loaded = self.load_spilled(key)
+        with self.lock:
+            if loaded is None:
+                self.misses += 1
+                return None
+            self.spill_hits += 1
+        metadata, index_state, pyramid = loaded
+        self.put(key, metadata, index_state, pyramid)
+        return deepcopy(metadata), index_state, pyramid
+
+    def put(self, key, metadata, index_state, pyramid):
+        nbytes = index_nbytes(index_state) + pyramid.nbytes
+        evicted = []
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[3]
+            if nbytes > self.max_bytes:
+                evicted.append((key, (metadata, index_state, pyramid, nbytes)))
+            else:
+                self.entries[key] = (deepcopy(metadata), index_state, pyramid, nbytes)
+                self.total_bytes += nbytes
+                while self.total_bytes > self.max_bytes:
+                    evicted.append(self.entries.popitem(last=False))
+                    self.total_bytes -= evicted[-1][1][3]
+            self.evictions += len(evicted)
+        # Disk writes happen outside the lock
+        for evicted_key, (evicted_metadata, evicted_index, evicted_pyramid, evicted_nbytes) in evicted:
+            self.spill(evicted_key, evicted_metadata, evicted_index, evicted_pyramid, evicted_nbytes)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def spill_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, digest + ".npz")
+
+    def spill(self, key, metadata, index_state, pyramid, nbytes):
+        if self.spill_dir is None or nbytes > self.spill_max_bytes:
+            return False
+        arrays = pyramid.to_arrays()
+        if index_state is not None:
+            arrays.update({INDEX_PREFIX + name: value for name, value in index_state.items()})
+        path = self.spill_path(key)
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(tmp_path, "wb") as file:
+                np.savez(
+                    file,
+                    version=DECODED_CACHE_VERSION,
+                    key=json.dumps(list(key)),
+                    metadata=json.dumps(metadata),
+                    **arrays,
+                )
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.prune_spilled()
+        return True
+
+    def load_spilled(self, key):
+        if self.spill_dir is None:
+            return None
+        path = self.spill_path(key)
+        try:
+            with np.load(path) as spilled:
+                if (
+                    int(spilled["version"]) != DECODED_CACHE_VERSION
+                    or json.loads(str(spilled["key"])) != list(key)
+                ):
+                    return None
+                pyramid = IT02Pyramid.from_arrays(spilled)
+                index_state = {
+                    name[len(INDEX_PREFIX) :]: spilled[name]
+                    for name in spilled.files
+                    if name.startswith(INDEX_PREFIX)
+                }
+                metadata = json.loads(str(spilled["metadata"]))
+            # Recently used spill files survive pruning
+            os.utime(path)
+            return metadata, index_state or None, pyramid
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def prune_spilled(self):
+        # Oldest spill files go first once the directory exceeds spill_max_bytes
+        try:
+            files = [
+                os.path.join(self.spill_dir, name)
+                for name in os.listdir(self.spill_dir)
+                if name.endswith(".npz")
+            ]
+            stats = sorted(((os.stat(path), path) for path in files), key=lambda item: item[0].st_mtime_ns)
+        except OSError:
+            return
+        total = sum(stat.st_size for stat, _ in stats)
+        for stat, path in stats:
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= stat.st_size
+            except OSError:
+                pass
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
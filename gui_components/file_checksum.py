@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime
+
+# Sidecar next to an exported file: acquisition.bin -> acquisition.bin.checksum.json
+CHECKSUM_SUFFIX = ".checksum.json"
+CHECKSUM_VERSION = 1
+CHECKSUM_ALGORITHM = "blake2b"
+CHECKSUM_ALGORITHMS = ("blake2b", "sha256")
+CHECKSUM_READ_BYTES = 8 * 1024 * 1024
+
+# IT02, IT03 and ITT1 files all start with a 4 byte magic, a u32 JSON length and the JSON header
+HEADER_MAGICS = (b"IT02", b"IT03", b"ITT1")
+
+
+def new_hasher(algorithm=CHECKSUM_ALGORITHM):
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise ValueError(f"Unknown checksum algorithm: {algorithm}")
+    return hashlib.new(algorithm)
+
+
+def checksum_path(file_name):
+    return file_name + CHECKSUM_SUFFIX
+
+
+def hash_file(file_name, hasher, progress=None):
+    buffer = bytearray(CHECKSUM_READ_BYTES)
+    view = memoryview(buffer)
+    with open(file_name, "rb") as file:
+        while True:
+            n_bytes = file.readinto(buffer)
+            if not n_bytes:
+                break
+            hasher.update(view[:n_bytes])
+            if progress is not None:
+                progress.advance(n_bytes)
+    return hasher
+
+
+def read_header_metadata(file_name):
+    # (format, metadata) of an acquisition file, (None, None) for other files
+    try:
+        with open(file_name, "rb") as file:
+            magic = file.read(4)
+            if magic not in HEADER_MAGICS:
+                return None, None
+            (json_length,) = struct.unpack("<I", file.read(4))
+            return magic.decode("ascii"), json.loads(file.read(json_length).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None, None
+
+
+def write_checksum(file_name, hasher, source=None, method=None):
+    # Digest computed while the file was written, plus what is needed to
+    # recognize it later (size, mtime, header metadata). Without a hasher
+    # (file linked or cloned, never read) only the size and mtime are kept.
+    stat = os.stat(file_name)
+    file_format, metadata = read_header_metadata(file_name)
+    manifest = {
+        "version": CHECKSUM_VERSION,
+        "file": os.path.basename(file_name),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "algorithm": hasher.name if hasher is not None else None,
+        "digest": hasher.hexdigest() if hasher is not None else None,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "method": method,
+        "format": file_format,
+        "metadata": metadata,
+    }
+    path = checksum_path(file_name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_checksum(file_name):
+    with open(checksum_path(file_name), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def verify_file(file_name, quick=False):
+    # (status, detail): "ok", "unchanged" (quick, or no digest recorded: size
+    # and mtime match the sidecar, nothing read), "mismatch", "missing" (no
+    # file or no sidecar)
+    if not os.path.exists(file_name):
+        return "missing", "file not found"
+    try:
+        manifest = read_checksum(file_name)
+    except FileNotFoundError:
+        return "missing", "no checksum sidecar"
+    except (OSError, ValueError) as e:
+        return "mismatch", f"unreadable checksum sidecar: {e}"
+    stat = os.stat(file_name)
+    if stat.st_size != manifest.get("size"):
+        return "mismatch", f"size {stat.st_size} != {manifest.get('size')}"
+    if quick and stat.st_mtime_ns == manifest.get("mtime_ns"):
+        return "unchanged", "size and mtime match"
+    if manifest.get("digest") is None:
+        if stat.st_mtime_ns != manifest.get("mtime_ns"):
+            return "mismatch", "no digest recorded and the mtime changed"
+        return "unchanged", f"no digest recorded ({manifest.get('method')}), size and mtime match"
+    try:
+        digest = hash_file(file_name, new_hasher(manifest.get("algorithm"))).hexdigest()
+    except ValueError as e:
+        return "mismatch", str(e)
+    if digest != manifest.get("digest"):
+        return "mismatch", f"{manifest.get('algorithm')} digest differs"
+    return "ok", f"{manifest.get('algorithm')} {digest[:16]}..."
@@ -0,0 +1,139 @@
+import os
+
+from gui_components.file_checksum import hash_file
+
+# Buffer of the plain chunked copy, the last fallback of finalize_file
+FINALIZE_COPY_CHUNK_BYTES = 8 * 1024 * 1024
+# Linux ioctl creating a copy-on-write clone of a whole file (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def advance(progress, n_bytes):
+    if progress is not None:
+        progress.advance(n_bytes)
+
+
+def clone_file(source_file, destination_file):
+    # True when the destination now shares the extents of the source
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def copy_range(source_file, destination_file, size, progress):
+    # In-kernel copy (server side on NFS/SMB, reflinked by some file systems).
+    # Returns the number of bytes copied before the call stopped working.
+    if not hasattr(os, "copy_file_range"):
+        return 0
+    copied = 0
+    while copied < size:
+        try:
+            n_bytes = os.copy_file_range(
+                source_file.fileno(),
+                destination_file.fileno(),
+                min(size - copied, FINALIZE_COPY_CHUNK_BYTES),
+                copied,
+                copied,
+            )
+        except OSError:
+            break
+        if n_bytes == 0:
+            break
+        copied += n_bytes
+        advance(progress, n_bytes)
+    return copied
+
+
+def copy_chunks(source_file, destination_file, start, progress, hasher=None):
+    buffer = bytearray(FINALIZE_COPY_CHUNK_BYTES)
+    view = memoryview(buffer)
+    source_file.seek(start)
+    destination_file.seek(start)
+    destination_file.truncate()
+    while True:
+        n_bytes = source_file.readinto(buffer)
+        if not n_bytes:
+            break
+        destination_file.write(view[:n_bytes])
+        if hasher is not None:
+            hasher.update(view[:n_bytes])
+        advance(progress, n_bytes)
+
+
+def link_or_copy(source, destination, size, progress, hasher=None, rehash=False):
+    # Cheapest way to give `destination` the content of `source`, returns its
+    # name. The chunked copy feeds the hasher on the fly. Files put in place
+    # by the file system (link, clone, copy_file_range) are never read, unless
+    # rehash=True reads them once to hash them.
+    try:
+        os.link(source, destination)
+        linked = True
+    except (OSError, AttributeError, NotImplementedError):
+        linked = False
+    if linked:
+        complete(destination, size, progress, hasher if rehash else None)
+        return "hardlink"
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        if clone_file(source_file, destination_file):
+            complete(destination, size, progress, hasher if rehash else None)
+            return "reflink"
+        copied = copy_range(source_file, destination_file, size, progress)
+        if copied < size:
+            # The chunked copy only hashes what it writes itself
+            start = copied if hasher is None else 0
+            copy_chunks(source_file, destination_file, start, progress, hasher)
+            return "copy"
+    if rehash and hasher is not None:
+        # Progress was already advanced by copy_range
+        hash_file(destination, hasher)
+    return "copy_file_range"
+
+
+def complete(file_name, size, progress, hasher):
+    # A file put in place without reading it, read once to hash it with a hasher
+    if hasher is None:
+        advance(progress, size)
+    else:
+        hash_file(file_name, hasher, progress)
+
+
+def finalize_file(source, destination, move=False, progress=None, hasher=None, rehash=False):
+    # Puts the content of `source` at `destination` without copying the data
+    # whenever the file system allows it: os.replace (move=True), then a hard
+    # link, a reflink clone, copy_file_range and finally a chunked copy.
+    # Everything but the rename is written next to the destination and moved
+    # in place, so the destination is never seen half written. `progress`
+    # (LoadProgress) advances by the file size. `hasher` (hashlib) receives
+    # the destination content when the chunked copy wrote it ("copy"), or
+    # with rehash=True whatever the method (an extra read of the file).
+    # Returns the method used.
+    size = os.path.getsize(source)
+    if move:
+        try:
+            os.replace(source, destination)
+            moved = True
+        except OSError:
+            # Another volume
+            moved = False
+        if moved:
+            complete(destination, size, progress, hasher if rehash else None)
+            return "replace"
+    tmp_path = destination + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        method = link_or_copy(source, tmp_path, size, progress, hasher, rehash)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if move:
+        os.remove(source)
+    return method
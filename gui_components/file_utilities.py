@@ -7,7 +7,14 @@ class FileUtils:
     @staticmethod
     def get_recent_intensity_tracing_file():
         data_folder = os.path.join(os.environ["USERPROFILE"], ".flim-labs", "data")
-        files = [f for f in os.listdir(data_folder) if f.startswith("intensity-tracing")]
+        # Recordings only: not the .bin.idx/.bin.pyr sidecars or the .it03.bin copies
+        files = [
+            f
+            for f in os.listdir(data_folder)
+            if f.startswith("intensity-tracing")
+            and f.endswith(".bin")
+            and not f.endswith(".it03.bin")
+        ]
         files.sort(key=lambda x: os.path.getmtime(os.path.join(data_folder, x)), reverse=True)
         return os.path.join(data_folder, files[0])
     
@@ -17,7 +24,7 @@ class FileUtils:
         files = [
             f
             for f in os.listdir(data_folder)
-            if f.startswith("time_tagger_intensity")
+            if f.startswith("time_tagger_intensity") and f.endswith(".bin")
         ]
         files.sort(
             key=lambda x: os.path.getmtime(os.path.join(data_folder, x)), reverse=True
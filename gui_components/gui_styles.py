@@ -483,6 +483,16 @@ class GUIStyles:
             }
         """
 
+    @staticmethod
+    def ingestion_status_style(color="#8c8c8c"):
+        return f"""
+            QLabel {{
+                color: {color};
+                font-size: 12px;
+                padding: 0 8px;
+            }}
+        """
+
     @staticmethod
     def set_loading_widget_style():
         return """
@@ -0,0 +1,124 @@
+import time
+
+from gui_components.settings import (
+    DEFAULT_MAX_BATCH_PROCESSING_MS,
+    DEFAULT_MAX_INGESTION_LAG_MS,
+    DEFAULT_MAX_QUEUE_BACKLOG,
+)
+
+
+# Display degradation levels, applied in this order when the GUI falls behind
+DEGRADATION_NORMAL = 0
+DEGRADATION_COARSE_DECIMATION = 1
+DEGRADATION_LOW_FPS = 2
+DEGRADATION_CPS_ONLY = 3
+
+DEGRADATION_LABELS = {
+    DEGRADATION_NORMAL: "normal",
+    DEGRADATION_COARSE_DECIMATION: "coarse decimation",
+    DEGRADATION_LOW_FPS: "low frame rate",
+    DEGRADATION_CPS_ONLY: "CPS only",
+}
+
+# Consecutive checks required before changing the degradation level
+OVERLOAD_CHECKS_TO_DEGRADE = 2
+HEALTHY_CHECKS_TO_RECOVER = 10
+
+
+class IngestionMonitor:
+    # Tracks queue backlog, ingestion lag (wall clock vs hardware time_ns) and
+    # processing time per batch. The queue size is not exposed by flim_labs:
+    # the backlog is the number of entries pulled since the queue was last
+    # seen empty, growing while drains keep hitting the pull cap.
+    # record_batch() runs on the ingestion thread, check() on the GUI
+    # thread: both are called with app.acquisition_lock held.
+    def __init__(
+        self,
+        max_lag_ms=DEFAULT_MAX_INGESTION_LAG_MS,
+        max_backlog=DEFAULT_MAX_QUEUE_BACKLOG,
+        max_batch_ms=DEFAULT_MAX_BATCH_PROCESSING_MS,
+    ):
+        self.max_lag_ms = max_lag_ms
+        self.max_backlog = max_backlog
+        self.max_batch_ms = max_batch_ms
+        self.reset()
+
+    def reset(self):
+        self.level = DEGRADATION_NORMAL
+        self.clock_offset_ns = None
+        self.lag_ms = 0.0
+        self.window_backlog = 0
+        self.window_capped_drains = 0
+        self.window_batch_ms = 0.0
+        self.backlog = 0
+        self.capped_drains = 0
+        self.batch_ms = 0.0
+        self.batches = 0
+        self.overloaded_checks = 0
+        self.healthy_checks = 0
+
+    def record_batch(self, last_time_ns, processing_s, capped, pending_entries):
+        # The smallest (wall - hardware) offset seen is the zero-lag reference
+        offset_ns = time.perf_counter_ns() - last_time_ns
+        if self.clock_offset_ns is None or offset_ns < self.clock_offset_ns:
+            self.clock_offset_ns = offset_ns
+        self.lag_ms = (offset_ns - self.clock_offset_ns) / 1_000_000
+        self.window_backlog = max(self.window_backlog, pending_entries)
+        if capped:
+            self.window_capped_drains += 1
+        self.window_batch_ms = max(self.window_batch_ms, processing_s * 1000)
+        self.batches += 1
+
+    def check(self):
+        # Close the current observation window and return the new degradation level
+        self.backlog = self.window_backlog
+        self.capped_drains = self.window_capped_drains
+        self.batch_ms = self.window_batch_ms
+        self.window_backlog = 0
+        self.window_capped_drains = 0
+        self.window_batch_ms = 0.0
+        overloaded = (
+            self.lag_ms > self.max_lag_ms
+            or self.backlog > self.max_backlog
+            or self.batch_ms > self.max_batch_ms
+        )
+        healthy = (
+            self.lag_ms < self.max_lag_ms / 2
+            and self.backlog < self.max_backlog / 2
+            and self.capped_drains == 0
+            and self.batch_ms < self.max_batch_ms / 2
+        )
+        if overloaded:
+            self.healthy_checks = 0
+            self.overloaded_checks += 1
+            if (
+                self.overloaded_checks >= OVERLOAD_CHECKS_TO_DEGRADE
+                and self.level < DEGRADATION_CPS_ONLY
+            ):
+                self.level += 1
+                self.overloaded_checks = 0
+        elif healthy:
+            self.overloaded_checks = 0
+            self.healthy_checks += 1
+            # CPS only view is kept until the end of the acquisition
+            if (
+                self.healthy_checks >= HEALTHY_CHECKS_TO_RECOVER
+                and DEGRADATION_NORMAL < self.level < DEGRADATION_CPS_ONLY
+            ):
+                self.level -= 1
+                self.healthy_checks = 0
+        else:
+            self.overloaded_checks = 0
+            self.healthy_checks = 0
+        return self.level
+
+    def get_status_text(self):
+        queue_text = "caught up"
+        if self.capped_drains > 0:
+            queue_text = f"{self.backlog} entries pending, pull cap hit {self.capped_drains}x"
+        return (
+            f"Queue: {queue_text} | "
+            f"Lag: {self.lag_ms:.0f} ms | "
+            f"Batch: {self.batch_ms:.1f} ms | "
+            f"Display: {DEGRADATION_LABELS[self.level]}"
+        )
@@ -7,7 +7,10 @@ from gui_components.animations import VibrantAnimation
 from gui_components.box_message import BoxMessage
 from gui_components.check_card import CheckCard
 from gui_components.data_export_controls import ExportData
+from gui_components.decimation import minmax_envelope
 from gui_components.format_utilities import FormatUtils
+from gui_components.ingestion_monitor import DEGRADATION_COARSE_DECIMATION, DEGRADATION_CPS_ONLY, DEGRADATION_LOW_FPS
+from gui_components.queue_consumer import QueueConsumerWorker
 from gui_components.messages_utilities import MessagesUtilities
 from gui_components.gui_styles import GUIStyles
 from gui_components.settings import *
@@ -24,6 +27,7 @@ from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import QTimer
 from gui_components.resource_path import resource_path
 from gui_components.time_tagger import TimeTaggerController
+from gui_components.trace_buffer import TraceStore
 
 
 class IntensityTracing:
@@ -61,6 +65,11 @@ class IntensityTracing:
             app.cached_time_span_seconds = float(
                 app.settings.value(SETTINGS_TIME_SPAN, DEFAULT_TIME_SPAN)
             )
+            app.trace_store = TraceStore(
+                app.enabled_channels,
+                app.cached_time_span_seconds,
+                app.bin_width_micros,
+            )
 
             result = flim_labs.start_intensity_tracing(
                 enabled_channels=app.enabled_channels,
@@ -77,8 +86,11 @@ class IntensityTracing:
             if file_bin != "":
                 print("File bin written in: " + str(file_bin))
             app.blank_space.hide()
-            app.pull_from_queue_timer.start(1)
-            # app.pull_from_queue_timer2.start(1)
+            app.last_time_ns = None
+            IntensityTracing.start_ingestion_monitor(app)
+            IntensityTracing.start_sinks(app, acquisition_time_millis)
+            IntensityTracing.start_queue_consumer(app)
+            app.render_scheduler.start()
 
         except Exception as e:
             # Check card connection
@@ -93,19 +105,123 @@ class IntensityTracing:
             )
 
     @staticmethod
-    def pull_from_queue(app):
-        val = flim_labs.pull_from_queue()
-        if len(val) > 0:
-            for v in val:
-                if v == ("end",):  # End of acquisition
-                    IntensityTracing.stop_button_pressed(app)
-                    break
-                if app.acquisition_stopped:
-                    break
-                ((time_ns), (intensities)) = v
-                IntensityTracing.process_data(app, time_ns[0], intensities)
-                IntensityTracing.update_acquisition_countdowns(app, time_ns[0])
-                
+    def start_queue_consumer(app):
+        IntensityTracing.stop_queue_consumer(app)
+        worker = QueueConsumerWorker(
+            partial(IntensityTracing.ingest_batch, app),
+            lock=app.acquisition_lock,
+            is_stopped_cb=lambda: app.acquisition_stopped,
+        )
+        worker.batch_received.connect(app.render_scheduler.mark_dirty)
+        worker.acquisition_ended.connect(
+            partial(IntensityTracing.stop_button_pressed, app)
+        )
+        worker.error.connect(
+            lambda error: print("Acquisition queue error: " + str(error))
+        )
+        app.queue_consumer = worker
+        worker.start()
+
+    @staticmethod
+    def stop_queue_consumer(app):
+        worker = app.queue_consumer
+        if worker is None:
+            return
+        worker.stop()
+        if not worker.wait(1000):
+            # Still inside a flim_labs call, the QThread must outlive it
+            app.stopping_queue_consumers.append(worker)
+            worker.finished.connect(
+                partial(IntensityTracing.release_queue_consumer, app, worker)
+            )
+        app.queue_consumer = None
+
+    @staticmethod
+    def release_queue_consumer(app, worker):
+        if worker in app.stopping_queue_consumers:
+            app.stopping_queue_consumers.remove(worker)
+
+    @staticmethod
+    def ingest_batch(app, times_ns, counts, capped, pending_entries):
+        # Runs on the ingestion thread with app.acquisition_lock held
+        start = time.perf_counter()
+        IntensityTracing.process_data(app, times_ns, counts)
+        app.last_time_ns = times_ns[-1]
+        app.sink_pipeline.publish(times_ns, counts)
+        app.ingestion_monitor.record_batch(
+            times_ns[-1], time.perf_counter() - start, capped, pending_entries
+        )
+
+    @staticmethod
+    def start_sinks(app, acquisition_time_millis):
+        app.sink_pipeline.start(
+            {
+                "channels": list(app.enabled_channels),
+                "bin_width_micros": app.bin_width_micros,
+                "acquisition_time_millis": acquisition_time_millis,
+                "channel_names": dict(app.channel_names),
+            }
+        )
+
+    @staticmethod
+    def stop_sinks(app):
+        app.sink_pipeline.stop()
+
+    @staticmethod
+    def show_acquisition_summary(app):
+        # Totals of the stats sink, shown once the sink has closed (it only sums counts)
+        if not app.sink_pipeline.wait(app.stats_sink, SINK_SUMMARY_WAIT_S):
+            return
+        summary = app.stats_sink.get_summary()
+        if summary["records"] == 0:
+            return
+        parts = [f"Last acquisition: {summary['records']} points, {summary['duration_s']:.2f} s"]
+        for channel, mean_cps in summary["mean_cps"].items():
+            parts.append(f"{get_channel_name(channel, app.channel_names)}: {mean_cps:.0f} CPS")
+        if app.npy_sink is not None and app.npy_sink.file_path is not None:
+            parts.append(f"Live copy: {app.npy_sink.file_path}")
+        summary_text = " | ".join(parts)
+        app.widgets[INGESTION_STATUS_LABEL].setText(summary_text)
+        app.widgets[INGESTION_STATUS_LABEL].setVisible(True)
+
+    @staticmethod
+    def start_ingestion_monitor(app):
+        app.ingestion_monitor.reset()
+        IntensityTracing.apply_display_degradation(app, app.ingestion_monitor.level)
+        app.widgets[INGESTION_STATUS_LABEL].setText("")
+        app.widgets[INGESTION_STATUS_LABEL].setVisible(True)
+        app.ingestion_monitor_timer.start()
+
+    @staticmethod
+    def stop_ingestion_monitor(app):
+        app.ingestion_monitor_timer.stop()
+        app.widgets[INGESTION_STATUS_LABEL].setVisible(False)
+
+    @staticmethod
+    def check_ingestion(app):
+        with app.acquisition_lock:
+            previous_level = app.ingestion_monitor.level
+            level = app.ingestion_monitor.check()
+            status_text = app.ingestion_monitor.get_status_text()
+        status_text += f" | FPS: {app.render_scheduler.fps}"
+        app.widgets[INGESTION_STATUS_LABEL].setText(status_text)
+        if level != previous_level:
+            print("Ingestion status: " + status_text)
+            IntensityTracing.apply_display_degradation(app, level)
+
+    @staticmethod
+    def apply_display_degradation(app, level):
+        app.display_decimation_scale = (
+            DEGRADED_DECIMATION_SCALE if level >= DEGRADATION_COARSE_DECIMATION else 1
+        )
+        app.render_scheduler.set_fps(
+            min(app.render_fps, DEGRADED_RENDER_FPS)
+            if level >= DEGRADATION_LOW_FPS
+            else app.render_fps
+        )
+        if level >= DEGRADATION_CPS_ONLY and len(app.intensity_lines) > 0:
+            IntensityTracingOnlyCPS.switch_plots_to_only_cps(app)
+
     @staticmethod
     def get_realtime_adjustment_value(enabled_channels):
         if len(enabled_channels) == 1:
@@ -121,41 +237,48 @@ class IntensityTracing:
             
 
     @staticmethod
-    def process_data(app, time_ns, counts):
+    def process_data(app, times_ns, counts):
         enabled_channels = app.enabled_channels
         adjustment = IntensityTracing.get_realtime_adjustment_value(enabled_channels) / app.bin_width_micros
-        for channel, cps in app.cps_ch.items():
-            IntensityTracing.update_cps(app, time_ns, counts, channel)
+        if app.cps_engine is not None:
+            app.cps_engine.update(times_ns, counts)
         for i, channel in enumerate(app.intensity_plots_to_show):
-            intensity = counts[channel] / adjustment
-            IntensityTracingPlot.update_plots2(channel, i, time_ns, intensity, app)
+            intensities = counts[:, channel] / adjustment
+            IntensityTracingPlot.update_plots2(channel, i, times_ns, intensities, app)
+
+    @staticmethod
+    def render_frame(app):
+        # Called by the render scheduler, repaints from a snapshot of the latest state
+        plot_widths = IntensityTracingPlot.get_plot_widths(app)
+        with app.acquisition_lock:
+            traces = IntensityTracingPlot.snapshot_traces(app, plot_widths)
+            cps_values = (
+                app.cps_engine.snapshot() if app.cps_engine is not None else None
+            )
+            last_time_ns = app.last_time_ns
+        IntensityTracingPlot.render_plots(app, traces)
+        IntensityTracing.render_cps(app, cps_values)
+        if last_time_ns is not None:
+            IntensityTracing.update_acquisition_countdowns(app, last_time_ns)
                 
     @staticmethod
-    def update_cps(app, time_ns, counts, channel_index):
-        if not (channel_index in app.cps_counts):
+    def render_cps(app, cps_values):
+        if cps_values is None or app.cps_engine is None:
             return
-        cps = app.cps_counts[channel_index]
-        if cps["last_time_ns"] == 0:
-            cps["last_time_ns"] = time_ns
-            cps["last_count"] = counts[channel_index]
-            cps["current_count"] = counts[channel_index]
-            return
-        cps["current_count"] = cps["current_count"] + + counts[channel_index]
-        time_elapsed = time_ns - cps["last_time_ns"]
-        if time_elapsed > 330_000_000:
-            cps_value = (cps["current_count"] - cps["last_count"]) / (
-                time_elapsed / 1_000_000_000
-            )
-            humanized_number = FormatUtils.format_cps(cps_value) + " CPS"
+        cps_threshold = app.control_inputs[SETTINGS_CPS_THRESHOLD].value()
+        above_threshold = app.cps_engine.above_threshold(cps_threshold, cps_values)
+        for i, channel_index in enumerate(app.cps_engine.channels):
+            channel_index = int(channel_index)
+            if channel_index not in app.cps_ch:
+                continue
+            humanized_number = FormatUtils.format_cps(cps_values[i]) + " CPS"
             app.cps_ch[channel_index].setText(humanized_number)
-            cps_threshold = app.control_inputs[SETTINGS_CPS_THRESHOLD].value()
-            if cps_threshold > 0:
-                if cps_value > cps_threshold:
-                    app.cps_widgets_animation[channel_index].start()
+            animation = app.cps_widgets_animation.get(channel_index)
+            if cps_threshold > 0 and animation is not None:
+                if above_threshold[i]:
+                    animation.start()
                 else:
-                    app.cps_widgets_animation[channel_index].stop()
-            cps["last_time_ns"] = time_ns
-            cps["last_count"] = cps["current_count"]    
+                    animation.stop()
             
     
     @staticmethod        
@@ -179,7 +302,12 @@ class IntensityTracing:
     @staticmethod
     def stop_button_pressed(app, app_close=False):
         app.acquisition_stopped = True
-        app.cps_counts.clear()
+        IntensityTracing.stop_queue_consumer(app)
+        IntensityTracing.stop_sinks(app)
+        IntensityTracing.stop_ingestion_monitor(app)
+        IntensityTracing.show_acquisition_summary(app)
+        app.render_scheduler.stop()
+        app.cps_engine = None
         for _, widget in app.acquisition_time_countdown_widgets.items():
             if widget and isinstance(widget, QWidget):
                 widget.setVisible(False)        
@@ -194,7 +322,6 @@ class IntensityTracing:
         app.control_inputs[STOP_BUTTON].setEnabled(False)
         QApplication.processEvents()
         flim_labs.request_stop()
-        app.pull_from_queue_timer.stop()
         if app.write_data:
             QTimer.singleShot(
                 300,
@@ -234,23 +361,48 @@ class IntensityTracingPlot:
         return countdown_label
 
     @staticmethod
-    def update_plots2(channel_index, plots_to_show_index, time_ns, intensity, app):
+    def update_plots2(channel_index, plots_to_show_index, times_ns, intensities, app):
         if plots_to_show_index < len(app.intensity_lines):
-            intensity_line = app.intensity_lines[channel_index]
-            x, y = intensity_line.getData()
-            if x is None or (len(x) == 1 and x[0] == 0):
-                x = np.array([time_ns / 1_000_000_000])
-                y = np.array([np.sum(intensity)])
-            else:
-                x = np.append(x, time_ns / 1_000_000_000)
-                y = np.append(y, np.sum(intensity))
-            if len(x) > 2:
-                while x[-1] - x[0] > app.cached_time_span_seconds:
-                    x = x[1:]
-                    y = y[1:]
-            intensity_line.setData(x, y)
-            QApplication.processEvents()
-            time.sleep(0.01)
+            if app.trace_store is None or channel_index not in app.trace_store:
+                return
+            app.trace_store.extend(
+                channel_index, np.asarray(times_ns) / 1_000_000_000, intensities
+            )
+
+    @staticmethod
+    def get_plot_widths(app):
+        # Horizontal size in pixels of each live plot area
+        plot_widths = {}
+        for channel_index, intensity_line in list(app.intensity_lines.items()):
+            view_box = intensity_line.getViewBox()
+            if view_box is not None:
+                plot_widths[channel_index] = int(
+                    view_box.width() / app.display_decimation_scale
+                )
+        return plot_widths
+
+    @staticmethod
+    def snapshot_traces(app, plot_widths):
+        # Decimated copies (min/max per pixel column) of the buffered traces
+        traces = {}
+        if app.trace_store is None:
+            return traces
+        for channel_index in list(app.intensity_lines):
+            if channel_index not in app.trace_store:
+                continue
+            x, y = app.trace_store.view(channel_index)
+            if len(x) > 0:
+                traces[channel_index] = minmax_envelope(
+                    x, y, plot_widths.get(channel_index, 0)
+                )
+        return traces
+
+    @staticmethod
+    def render_plots(app, traces):
+        for channel_index, (x, y) in traces.items():
+            intensity_line = app.intensity_lines.get(channel_index)
+            if intensity_line is not None:
+                intensity_line.setData(x, y)
 
     @staticmethod
     def create_chart_widget(app, index, channel, read_data):
@@ -331,3 +483,14 @@ class IntensityTracingOnlyCPS:
         row, col = divmod(index, 1)
         app.layouts[INTENSITY_ONLY_CPS_GRID].addWidget(only_cps_widget, row, col)
         app.only_cps_widgets.append(only_cps_widget)
+
+    @staticmethod
+    def switch_plots_to_only_cps(app):
+        # Degraded live view: stop drawing curves, keep CPS for every channel
+        with app.acquisition_lock:
+            app.intensity_lines.clear()
+        for wrapper in app.intensity_charts_wrappers:
+            wrapper.setVisible(False)
+        offset = app.layouts[INTENSITY_ONLY_CPS_GRID].count()
+        for index, channel in enumerate(app.intensity_plots_to_show):
+            IntensityTracingOnlyCPS.create_only_cps_widget(app, offset + index, channel)
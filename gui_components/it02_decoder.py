@@ -0,0 +1,146 @@
+import json
+import struct
+import numpy as np
+
+IT02_MAGIC = b"IT02"
+
+# Bytes decoded per step
+IT02_DECODE_BLOCK_BYTES = 1 << 20
+
+# Record layout: f64 time, u8 bitmask, one u32 count per set bit.
+# Bit i of the bitmask refers to the i-th entry of metadata["channels"].
+RECORD_HEADER_BYTES = 9
+MAX_IT02_CHANNELS = 8
+MAX_RECORD_BYTES = RECORD_HEADER_BYTES + 4 * MAX_IT02_CHANNELS
+
+# Records per coarse step of the offset scan (2 ** JUMP_LEVELS)
+JUMP_LEVELS = 5
+
+POPCOUNT_TABLE = np.array([bin(mask).count("1") for mask in range(256)], dtype=np.int64)
+
+
+def record_size_table(n_channels):
+    # bitmask -> record size, bits beyond the file channels are ignored
+    channels_mask = (1 << n_channels) - 1
+    return RECORD_HEADER_BYTES + 4 * POPCOUNT_TABLE[np.arange(256) & channels_mask]
+
+
+def count_offset_table(n_channels):
+    # [channel position, bitmask] -> byte offset of the channel count in the record
+    offsets = np.zeros((n_channels, 256), dtype=np.int64)
+    for position in range(n_channels):
+        lower_bits = (1 << position) - 1
+        offsets[position] = RECORD_HEADER_BYTES + 4 * POPCOUNT_TABLE[np.arange(256) & lower_bits]
+    return offsets
+
+
+def read_it02_header(file):
+    # Returns (metadata, data_offset), the file is left at the first record
+    if file.read(4) != IT02_MAGIC:
+        raise ValueError("The file is not a valid Intensity Tracing file")
+    (json_length,) = struct.unpack("I", file.read(4))
+    metadata = json.loads(file.read(json_length).decode("utf-8"))
+    return metadata, 8 + json_length
+
+
+def fixed_stride_run(buf, start, size_table):
+    # Number of consecutive records from `start` sharing the same bitmask
+    # (one vectorized compare instead of walking records one by one)
+    mask = buf[start + 8]
+    stride = size_table[mask]
+    count = (len(buf) - start) // stride
+    if count == 0:
+        return 0, stride
+    masks = buf[start + 8 : start + 8 + (count - 1) * stride + 1 : stride]
+    mismatch = np.flatnonzero(masks != mask)
+    return (count if len(mismatch) == 0 else mismatch[0]), stride
+
+
+def scan_record_offsets(buf, start, size_table):
+    # Offsets of every complete record of buf starting at `start`.
+    # next_offset[p] is the offset following a record starting at p; records are
+    # a chain p0 -> next_offset[p0] -> ... Chains are followed with jump tables
+    # (2 ** k records per jump): a short Python loop over coarse jumps, then
+    # a vectorized expansion down to single records.
+    n = len(buf)
+    end = n - RECORD_HEADER_BYTES + 1
+    if start >= end:
+        return np.empty(0, dtype=np.int64)
+    # Offsets relative to `start` (int32 halves the cost of the jump gathers)
+    terminal = n - start
+    next_offset = np.full(terminal + 1, terminal, dtype=np.int32)
+    next_offset[: end - start] = (
+        np.arange(end - start, dtype=np.int32)
+        + size_table.astype(np.int32)[buf[start + 8 : end + 8]]
+    )
+    # Incomplete records and the terminal slot point to the terminal slot
+    np.minimum(next_offset, terminal, out=next_offset)
+    jumps = [next_offset]
+    for _ in range(JUMP_LEVELS):
+        jumps.append(jumps[-1][jumps[-1]])
+    coarse = []
+    p = 0
+    coarse_jump = jumps[-1]
+    while p != terminal:
+        coarse.append(p)
+        p = coarse_jump[p]
+    offsets = np.array(coarse, dtype=np.int32)
+    for level in range(JUMP_LEVELS - 1, -1, -1):
+        expanded = np.empty(2 * len(offsets), dtype=np.int32)
+        expanded[0::2] = offsets
+        expanded[1::2] = jumps[level][offsets]
+        offsets = expanded
+    # Drops the terminal slot and tails too short for a record header
+    offsets = offsets[offsets < end - start]
+    return offsets.astype(np.int64) + start
+
+
+def record_offsets(buf, size_table):
+    # Fixed-stride runs (all records with the same bitmask) are resolved with a
+    # single compare, the irregular rest with the jump table scan
+    start = 0
+    parts = []
+    while len(buf) - start >= RECORD_HEADER_BYTES:
+        run, stride = fixed_stride_run(buf, start, size_table)
+        if run >= (1 << JUMP_LEVELS):
+            parts.append(start + stride * np.arange(run, dtype=np.int64))
+            start += run * stride
+            continue
+        parts.append(scan_record_offsets(buf, start, size_table))
+        break
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.concatenate(parts)
+    # A record is complete only if its counts fit in the buffer
+    return offsets[offsets + size_table[buf[offsets + 8]] <= len(buf)]
+
+
+def gather_records(buf, offsets, n_channels, count_offsets):
+    # Vectorized gather of (times_ns f64, counts (n_channels, n) u32)
+    times_ns = buf[offsets[:, None] + np.arange(8)].view("<f8").reshape(-1)
+    masks = buf[offsets + 8]
+    counts = np.zeros((n_channels, len(offsets)), dtype=np.uint32)
+    for position in range(n_channels):
+        has_count = np.flatnonzero(masks & (1 << position))
+        if len(has_count) == 0:
+            continue
+        count_starts = offsets[has_count] + count_offsets[position][masks[has_count]]
+        counts[position, has_count] = (
+            buf[count_starts[:, None] + np.arange(4)].view("<u4").reshape(-1)
+        )
+    return times_ns, counts
+
+
+def decode_it02_block(buf, n_channels, size_table=None, count_offsets=None):
+    # Decode the complete records of a uint8 buffer starting at a record boundary.
+    # Returns (times_ns, counts, consumed_bytes).
+    if size_table is None:
+        size_table = record_size_table(n_channels)
+    if count_offsets is None:
+        count_offsets = count_offset_table(n_channels)
+    offsets = record_offsets(buf, size_table)
+    if len(offsets) == 0:
+        return np.empty(0, dtype=np.float64), np.zeros((n_channels, 0), dtype=np.uint32), 0
+    consumed = int(offsets[-1] + size_table[buf[offsets[-1] + 8]])
+    times_ns, counts = gather_records(buf, offsets, n_channels, count_offsets)
+    return times_ns, counts, consumed
@@ -0,0 +1,165 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+from gui_components import it02_pyramid
+from gui_components.it02_pyramid import PyramidBuilder, grid_base_bins, reduce_buckets
+from gui_components.it02_reader import IT02Reader
+
+# Files smaller than this are decoded in the calling process
+PARALLEL_DECODE_MIN_BYTES = 64 * 1024 * 1024
+# Segments per worker process, smaller segments balance the load better
+PARALLEL_DECODE_SEGMENTS_PER_WORKER = 4
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+class DecodePool:
+    # Worker processes shared by every parallel decode of the application,
+    # started on first use and kept until shutdown()
+    def __init__(self, max_workers=None):
+        self.max_workers = default_workers() if max_workers is None else max_workers
+        self.executor = None
+
+    def submit(self, fn, *args):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor.submit(fn, *args)
+
+    def shutdown(self, wait=False):
+        # Queued segments are dropped
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+        self.executor = None
+
+    def iter_segments(self, fn, args, progress=None):
+        # Yields (index, fn(*args[index])) as the segments complete.
+        # args[index] starts with (file_name, start, stop), used for progress.
+        futures = {}
+        try:
+            futures = {self.submit(fn, *segment_args): index for index, segment_args in enumerate(args)}
+            pending = set(futures)
+            while pending:
+                # Wakes up regularly so a cancel request is seen between segments
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    yield index, future.result()
+                    if progress is not None:
+                        _, start, stop = args[index][:3]
+                        progress.advance(stop - start)
+                if progress is not None:
+                    progress.check()
+        except BrokenProcessPool:
+            # A worker died: the next decode starts new processes
+            self.shutdown()
+            raise
+        finally:
+            # On cancel the queued segments are dropped, running ones finish in the background
+            for future in futures:
+                future.cancel()
+
+
+def split_segments(reader, n_segments):
+    # [(start, stop)] byte ranges cut at indexed record boundaries
+    reader.open_index()
+    end = reader.scanned_offset
+    checkpoints = reader.index_offsets
+    if n_segments <= 1 or len(checkpoints) <= 1:
+        return [(reader.data_offset, end)]
+    step = max(1, len(checkpoints) // n_segments)
+    starts = checkpoints[::step]
+    starts[0] = reader.data_offset
+    return list(zip(starts, starts[1:] + [end]))
+
+
+def decode_segment(file_name, start, stop, channels):
+    # Runs in a worker process: (times_ns, counts) of the records between two
+    # record boundaries
+    reader = IT02Reader(file_name)
+    try:
+        return reader.decode_segment(start, stop, channels)
+    finally:
+        reader.close()
+
+
+def decode_parallel(reader, pool, channels=None, progress=None):
+    # (times_ns, counts (len(channels), n)) of the whole file: the segments of
+    # the record index are decoded in the pool and stitched back in order.
+    # The acquisition time marker is dropped like in IT02Reader.iter_chunks().
+    channels = reader.channels if channels is None else channels
+    segments = split_segments(reader, pool.max_workers * PARALLEL_DECODE_SEGMENTS_PER_WORKER)
+    results = [None] * len(segments)
+    for index, result in pool.iter_segments(
+        decode_segment, [(reader.file_name, start, stop, channels) for start, stop in segments], progress
+    ):
+        results[index] = result
+    times_ns = np.concatenate([times_ns for times_ns, _ in results])
+    counts = np.concatenate([counts for _, counts in results], axis=1)
+    # The marker has no count in any channel of the file, not only the selected ones
+    reader.final_time_marker = None
+    if len(times_ns) > 0:
+        last_times, last_counts = reader.decode_segment(reader.index_offsets[-1], reader.scanned_offset)
+        if not last_counts[:, -1].any():
+            reader.final_time_marker = float(last_times[-1])
+            times_ns, counts = times_ns[:-1], counts[:, :-1]
+    return times_ns, counts
+
+
+def reduce_segment(file_name, start, stop, first_bin_index, base_bins):
+    # Runs in a worker process: level 0 buckets of the records between two
+    # record boundaries, one reduce_buckets() result per decoded block
+    reader = IT02Reader(file_name)
+    try:
+        reduced = []
+        previous = None
+        for times_ns, counts in reader.iter_blocks(start, stop):
+            if previous is not None:
+                reduced.append(reduce_buckets(*previous, first_bin_index, base_bins))
+            previous = ((times_ns / reader.bin_width_ns).astype(np.int64), counts)
+        if previous is not None:
+            bins, counts = previous
+            if stop >= reader.file_size and not counts[:, -1].any():
+                # The last record of the file marks the acquisition time
+                bins, counts = bins[:-1], counts[:, :-1]
+            if len(bins) > 0:
+                reduced.append(reduce_buckets(bins, counts, first_bin_index, base_bins))
+        return reduced
+    finally:
+        reader.close()
+
+
+def build_pyramid_parallel(reader, pool, progress=None):
+    # Same pyramid as it02_pyramid.build_pyramid(), the segments of an indexed
+    # file decoded in the pool, each returning its level 0 buckets only
+    segments = split_segments(reader, pool.max_workers * PARALLEL_DECODE_SEGMENTS_PER_WORKER)
+    if not reader.index_times:
+        return None
+    first_bin_index = int(reader.index_times[0] / reader.bin_width_ns)
+    base_bins = grid_base_bins(first_bin_index, int(reader.scanned_time / reader.bin_width_ns))
+    builder = PyramidBuilder(reader.channels, reader.bin_width_ns, first_bin_index, base_bins)
+    for _, segment in pool.iter_segments(
+        reduce_segment,
+        [(reader.file_name, start, stop, first_bin_index, base_bins) for start, stop in segments],
+        progress,
+    ):
+        for reduced in segment:
+            builder.merge(reduced)
+    return builder.finish()
+
+
+def build_pyramid(reader, pool=None, progress=None):
+    # Parallel decode only pays off on large files and needs the record index,
+    # otherwise a single sequential pass also collects the index on the way
+    if (
+        pool is None
+        or pool.max_workers <= 1
+        or not reader.parallel_decode
+        or reader.file_size < PARALLEL_DECODE_MIN_BYTES
+        or not reader.index_complete
+    ):
+        return it02_pyramid.build_pyramid(reader, progress)
+    return build_pyramid_parallel(reader, pool, progress)
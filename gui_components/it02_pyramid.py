@@ -0,0 +1,301 @@
+import os
+import numpy as np
+
+IT02_PYRAMID_VERSION = 1
+IT02_PYRAMID_SUFFIX = ".pyr"
+
+# Bins per bucket of the finest level: at least PYRAMID_MIN_BASE_BINS and
+# doubled until the finest level fits in PYRAMID_MAX_BASE_BUCKETS buckets
+PYRAMID_MIN_BASE_BINS = 16
+PYRAMID_MAX_BASE_BUCKETS = 1 << 20
+
+LEVEL_KEYS = ("min", "max", "sum", "count")
+
+
+class IT02Pyramid:
+    # Multi-resolution summary of an IT02 file on its full bin grid (bins not
+    # stored in the file count as zeros). Level 0 buckets hold `base_bins` bins,
+    # every next level merges pairs of buckets. Each level keeps per channel
+    # min, max (uint32), sum (float64) and count (bins per bucket).
+    def __init__(self, channels, bin_width_ns, first_bin_index, total_bins, base_bins, levels):
+        self.channels = channels
+        self.bin_width_ns = bin_width_ns
+        self.first_bin_index = first_bin_index
+        self.total_bins = total_bins
+        self.base_bins = base_bins
+        self.levels = levels
+
+    @property
+    def first_time_ns(self):
+        return self.first_bin_index * self.bin_width_ns
+
+    @property
+    def last_time_ns(self):
+        return (self.first_bin_index + self.total_bins - 1) * self.bin_width_ns
+
+    def bucket_bins(self, level):
+        return self.base_bins << level
+
+    def select_level(self, t0_ns, t1_ns, n_columns):
+        # Coarsest level still giving about one bucket per pixel column
+        range_bins = max(1.0, (t1_ns - t0_ns) / self.bin_width_ns)
+        buckets_per_column = range_bins / (self.base_bins * max(1, n_columns))
+        if buckets_per_column < 2:
+            return 0
+        return min(int(np.log2(buckets_per_column)), len(self.levels) - 1)
+
+    def level_range(self, level, t0_ns, t1_ns):
+        bucket_bins = self.bucket_bins(level)
+        n = len(self.levels[level]["count"])
+        first = int((t0_ns / self.bin_width_ns - self.first_bin_index) // bucket_bins)
+        last = int((t1_ns / self.bin_width_ns - self.first_bin_index) // bucket_bins)
+        return max(0, first), min(n, last + 1)
+
+    def envelope(self, position, n_columns, t0_ns=None, t1_ns=None):
+        # (x_ns, y) min/max pairs for the channel at `position`, ready for plotting
+        t0_ns = self.first_time_ns if t0_ns is None else t0_ns
+        t1_ns = self.last_time_ns if t1_ns is None else t1_ns
+        level = self.select_level(t0_ns, t1_ns, n_columns)
+        start, end = self.level_range(level, t0_ns, t1_ns)
+        if end <= start:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+        data = self.levels[level]
+        bucket_bins = self.bucket_bins(level)
+        bucket_starts = (
+            self.first_bin_index + np.arange(start, end, dtype=np.int64) * bucket_bins
+        )
+        bucket_ends = np.minimum(
+            bucket_starts + bucket_bins, self.first_bin_index + self.total_bins
+        ) - 1
+        x = np.empty(2 * (end - start), dtype=np.float64)
+        y = np.empty(2 * (end - start), dtype=np.float64)
+        x[0::2] = bucket_starts * self.bin_width_ns
+        x[1::2] = bucket_ends * self.bin_width_ns
+        y[0::2] = data["min"][position, start:end]
+        y[1::2] = data["max"][position, start:end]
+        return x, y
+
+    @property
+    def nbytes(self):
+        return sum(data[key].nbytes for data in self.levels for key in data)
+
+    def to_arrays(self):
+        # Flat dict of arrays for np.savez (sidecar, decoded cache spill)
+        arrays = {
+            "channels": np.array(self.channels, dtype=np.int64),
+            "bin_width_ns": self.bin_width_ns,
+            "first_bin_index": self.first_bin_index,
+            "total_bins": self.total_bins,
+            "base_bins": self.base_bins,
+            "n_levels": len(self.levels),
+        }
+        for level, data in enumerate(self.levels):
+            for key in LEVEL_KEYS:
+                arrays[f"{key}_{level}"] = data[key]
+        return arrays
+
+    @staticmethod
+    def from_arrays(arrays):
+        levels = [
+            {key: arrays[f"{key}_{level}"] for key in LEVEL_KEYS}
+            for level in range(int(arrays["n_levels"]))
+        ]
+        return IT02Pyramid(
+            arrays["channels"].tolist(),
+            int(arrays["bin_width_ns"]),
+            int(arrays["first_bin_index"]),
+            int(arrays["total_bins"]),
+            int(arrays["base_bins"]),
+            levels,
+        )
+
+    def save(self, path, file_size, mtime_ns):
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                np.savez(
+                    file,
+                    version=IT02_PYRAMID_VERSION,
+                    file_size=file_size,
+                    mtime_ns=mtime_ns,
+                    **self.to_arrays(),
+                )
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    @staticmethod
+    def load(path, file_size, mtime_ns):
+        # None when the sidecar is missing or was built for another file version
+        try:
+            with np.load(path) as sidecar:
+                if (
+                    int(sidecar["version"]) != IT02_PYRAMID_VERSION
+                    or int(sidecar["file_size"]) != file_size
+                    or int(sidecar["mtime_ns"]) != mtime_ns
+                ):
+                    return None
+                return IT02Pyramid.from_arrays(sidecar)
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def build_upper_levels(level0):
+    levels = [level0]
+    while len(levels[-1]["count"]) > 1:
+        previous = levels[-1]
+        n = len(previous["count"])
+        pairs = n // 2
+        level = {
+            "min": np.minimum(previous["min"][:, 0 : 2 * pairs : 2], previous["min"][:, 1 : 2 * pairs : 2]),
+            "max": np.maximum(previous["max"][:, 0 : 2 * pairs : 2], previous["max"][:, 1 : 2 * pairs : 2]),
+            "sum": previous["sum"][:, 0 : 2 * pairs : 2] + previous["sum"][:, 1 : 2 * pairs : 2],
+            "count": previous["count"][0 : 2 * pairs : 2] + previous["count"][1 : 2 * pairs : 2],
+        }
+        if n % 2 == 1:
+            # Odd trailing bucket is carried over unchanged
+            level["min"] = np.concatenate([level["min"], previous["min"][:, -1:]], axis=1)
+            level["max"] = np.concatenate([level["max"], previous["max"][:, -1:]], axis=1)
+            level["sum"] = np.concatenate([level["sum"], previous["sum"][:, -1:]], axis=1)
+            level["count"] = np.concatenate([level["count"], previous["count"][-1:]])
+        levels.append(level)
+    return levels
+
+
+def reduce_buckets(bins, counts, first_bin_index, base_bins):
+    # (bucket ids, min, max, sum, stored bins, last bin) of consecutive records
+    buckets = (bins - first_bin_index) // base_bins
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    return (
+        buckets[starts],
+        np.minimum.reduceat(counts, starts, axis=1),
+        np.maximum.reduceat(counts, starts, axis=1),
+        np.add.reduceat(counts, starts, axis=1, dtype=np.float64),
+        np.diff(np.append(starts, len(buckets))),
+        int(bins[-1]),
+    )
+
+
+def grid_base_bins(first_bin_index, last_bin):
+    # base_bins the streaming build ends with for this range of bins
+    base_bins = PYRAMID_MIN_BASE_BINS
+    while (last_bin - first_bin_index) // base_bins >= PYRAMID_MAX_BASE_BUCKETS:
+        base_bins *= 2
+    return base_bins
+
+
+class PyramidBuilder:
+    # Level 0 accumulated from (times_ns, counts) chunks in time order, the
+    # recording length is not needed up front: pairs of buckets are merged
+    # (base_bins doubled) whenever level 0 outgrows PYRAMID_MAX_BASE_BUCKETS.
+    # A grid known in advance (first_bin_index, base_bins) also accepts
+    # buckets reduced elsewhere (merge), in any order.
+    def __init__(self, channels, bin_width_ns, first_bin_index=None, base_bins=PYRAMID_MIN_BASE_BINS):
+        self.channels = list(channels)
+        self.bin_width_ns = bin_width_ns
+        self.base_bins = base_bins
+        self.first_bin_index = first_bin_index
+        self.last_bin = None
+        self.allocate(0)
+
+    def allocate(self, n_buckets):
+        n_channels = len(self.channels)
+        self.stored_min = np.full((n_channels, n_buckets), np.iinfo(np.uint32).max, dtype=np.uint32)
+        self.stored_max = np.zeros((n_channels, n_buckets), dtype=np.uint32)
+        self.sums = np.zeros((n_channels, n_buckets), dtype=np.float64)
+        self.stored = np.zeros(n_buckets, dtype=np.int64)
+
+    def grow(self, n_buckets):
+        # Capacity doubled, amortized over the chunks
+        previous = (self.stored_min, self.stored_max, self.sums, self.stored)
+        n = self.stored.shape[0]
+        self.allocate(min(max(n_buckets, 2 * n), PYRAMID_MAX_BASE_BUCKETS))
+        self.stored_min[:, :n] = previous[0]
+        self.stored_max[:, :n] = previous[1]
+        self.sums[:, :n] = previous[2]
+        self.stored[:n] = previous[3]
+
+    def fold(self):
+        n = self.stored.shape[0]
+        pairs = (n + 1) // 2
+        if n % 2 == 1:
+            self.grow(n + 1)
+        self.stored_min = np.minimum(self.stored_min[:, 0 : 2 * pairs : 2], self.stored_min[:, 1 : 2 * pairs : 2])
+        self.stored_max = np.maximum(self.stored_max[:, 0 : 2 * pairs : 2], self.stored_max[:, 1 : 2 * pairs : 2])
+        self.sums = self.sums[:, 0 : 2 * pairs : 2] + self.sums[:, 1 : 2 * pairs : 2]
+        self.stored = self.stored[0 : 2 * pairs : 2] + self.stored[1 : 2 * pairs : 2]
+        self.base_bins *= 2
+
+    def add(self, times_ns, counts):
+        if len(times_ns) == 0:
+            return
+        bins = (times_ns / self.bin_width_ns).astype(np.int64)
+        if self.first_bin_index is None:
+            self.first_bin_index = int(bins[0])
+        while (int(bins[-1]) - self.first_bin_index) // self.base_bins >= PYRAMID_MAX_BASE_BUCKETS:
+            self.fold()
+        self.merge(reduce_buckets(bins, counts, self.first_bin_index, self.base_bins))
+
+    def merge(self, reduced):
+        # Buckets of reduce_buckets() computed on the same grid
+        ids, bucket_min, bucket_max, bucket_sum, bucket_stored, last_bin = reduced
+        self.last_bin = last_bin if self.last_bin is None else max(self.last_bin, last_bin)
+        if ids[-1] >= self.stored.shape[0]:
+            self.grow(int(ids[-1]) + 1)
+        self.stored_min[:, ids] = np.minimum(self.stored_min[:, ids], bucket_min)
+        self.stored_max[:, ids] = np.maximum(self.stored_max[:, ids], bucket_max)
+        self.sums[:, ids] += bucket_sum
+        self.stored[ids] += bucket_stored
+
+    def finish(self):
+        # None when no record was added
+        if self.first_bin_index is None:
+            return None
+        total_bins = self.last_bin - self.first_bin_index + 1
+        n_buckets = (total_bins + self.base_bins - 1) // self.base_bins
+        bins_per_bucket = np.full(n_buckets, self.base_bins, dtype=np.int64)
+        bins_per_bucket[-1] = total_bins - self.base_bins * (n_buckets - 1)
+        stored = self.stored[:n_buckets]
+        # Buckets with bins missing from the file contain zeros
+        level0 = {
+            "min": np.where(stored < bins_per_bucket, 0, self.stored_min[:, :n_buckets]).astype(np.uint32),
+            "max": self.stored_max[:, :n_buckets].copy(),
+            "sum": self.sums[:, :n_buckets].copy(),
+            "count": bins_per_bucket,
+        }
+        return IT02Pyramid(
+            self.channels,
+            self.bin_width_ns,
+            self.first_bin_index,
+            total_bins,
+            self.base_bins,
+            build_upper_levels(level0),
+        )
+
+
+def build_pyramid(reader, progress=None):
+    # Single streaming pass over the file, memory bounded by the level 0 size.
+    # The pass also completes the reader index (in-order decode).
+    builder = PyramidBuilder(reader.channels, reader.bin_width_ns)
+    for times_ns, counts in reader.iter_chunks(progress=progress):
+        builder.add(times_ns, counts)
+    return builder.finish()
+
+
+def pyramid_path(reader):
+    return reader.file_name + IT02_PYRAMID_SUFFIX
+
+
+def load_pyramid(reader):
+    # The <file>.bin.pyr sidecar, None when missing or outdated
+    file_size, mtime_ns = reader.file_signature()
+    return IT02Pyramid.load(pyramid_path(reader), file_size, mtime_ns)
+
+
+def save_pyramid(reader, pyramid):
+    file_size, mtime_ns = reader.file_signature()
+    return pyramid.save(pyramid_path(reader), file_size, mtime_ns)
+
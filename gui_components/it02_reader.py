@@ -0,0 +1,367 @@
+import json
+import os
+import numpy as np
+
+from gui_components.it02_decoder import (
+    IT02_DECODE_BLOCK_BYTES,
+    IT02_MAGIC,
+    MAX_RECORD_BYTES,
+    count_offset_table,
+    gather_records,
+    record_offsets,
+    record_size_table,
+)
+from gui_components.sparse_trace import SparseTrace
+
+# One checkpoint (byte offset, time) every N records
+IT02_INDEX_STRIDE = 4096
+IT02_INDEX_VERSION = 1
+IT02_INDEX_SUFFIX = ".idx"
+
+# Records per chunk yielded by iter_chunks
+IT02_CHUNK_RECORDS = 1 << 20
+
+
+class IT02Reader:
+    # Random access reader over a memory-mapped IT02 file.
+    # Nothing is read on construction: the header is parsed on first use and
+    # record checkpoints are collected while the file is scanned or decoded in
+    # order, so seeking to an already visited time is a binary search plus a
+    # short scan.
+    parallel_decode = True
+
+    def __init__(self, file_name, block_bytes=IT02_DECODE_BLOCK_BYTES):
+        self.file_name = file_name
+        self.block_bytes = max(block_bytes, 4 * MAX_RECORD_BYTES)
+        self._data = None
+        self._metadata = None
+        self.data_offset = None
+        self.index_offsets = []
+        self.index_times = []
+        self.scanned_offset = None
+        self.scanned_records = 0
+        self.scanned_time = None
+        self.final_time_marker = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = np.memmap(self.file_name, dtype=np.uint8, mode="r")
+        return self._data
+
+    @property
+    def metadata(self):
+        if self._metadata is None:
+            self.parse_header()
+        return self._metadata
+
+    @property
+    def channels(self):
+        return self.metadata["channels"]
+
+    @property
+    def bin_width_ns(self):
+        return self.metadata["bin_width_micros"] * 1000
+
+    @property
+    def file_size(self):
+        return len(self.data)
+
+    def parse_header(self):
+        data = self.data
+        if len(data) < 8 or bytes(data[:4]) != IT02_MAGIC:
+            raise ValueError("The file is not a valid Intensity Tracing file")
+        json_length = int(data[4:8].view("<u4")[0])
+        self._metadata = json.loads(bytes(data[8 : 8 + json_length]).decode("utf-8"))
+        self.data_offset = 8 + json_length
+        self.size_table = record_size_table(len(self._metadata["channels"]))
+        self.count_offsets = count_offset_table(len(self._metadata["channels"]))
+        self.scanned_offset = self.data_offset
+
+    @property
+    def index_complete(self):
+        return self.scanned_offset is not None and self.scanned_offset >= self.file_size
+
+    def index_path(self):
+        return self.file_name + IT02_INDEX_SUFFIX
+
+    def file_signature(self):
+        stat = os.stat(self.file_name)
+        return stat.st_size, stat.st_mtime_ns
+
+    def open_index(self, progress=None, scan=True, save=True):
+        # Load the sidecar index if it matches the file (size and mtime),
+        # otherwise scan the whole file once and store it next to the .bin
+        # (kept in memory only with save=False). With scan=False a missing
+        # index is left to the next decode pass (iter_blocks from the start
+        # of the data), saved by the caller.
+        if self._metadata is None:
+            self.parse_header()
+        if self.index_complete or self.load_index():
+            if progress is not None:
+                progress.skip_pass()
+            return True
+        if not scan:
+            return False
+        self.extend_index(progress=progress)
+        if save:
+            self.save_index()
+        if progress is not None:
+            progress.finish_pass()
+        return False
+
+    def load_index(self):
+        try:
+            size, mtime_ns = self.file_signature()
+            with np.load(self.index_path()) as index:
+                if (
+                    int(index["version"]) != IT02_INDEX_VERSION
+                    or int(index["stride"]) != IT02_INDEX_STRIDE
+                    or int(index["file_size"]) != size
+                    or int(index["mtime_ns"]) != mtime_ns
+                ):
+                    return False
+                self.restore_index(index)
+            return True
+        except (OSError, KeyError, ValueError):
+            return False
+
+    def index_state(self):
+        # Arrays of the record index, stored in the sidecar and the decoded cache
+        return {
+            "offsets": np.array(self.index_offsets, dtype=np.int64),
+            "times": np.array(self.index_times, dtype=np.float64),
+            "records": self.scanned_records,
+            "last_time": np.nan if self.scanned_time is None else self.scanned_time,
+            "scanned_offset": self.scanned_offset,
+        }
+
+    def restore_index(self, state):
+        if self._metadata is None:
+            self.parse_header()
+        self.index_offsets = state["offsets"].tolist()
+        self.index_times = state["times"].tolist()
+        self.scanned_records = int(state["records"])
+        last_time = float(state["last_time"])
+        self.scanned_time = None if np.isnan(last_time) else last_time
+        self.scanned_offset = int(state["scanned_offset"])
+
+    def save_index(self):
+        if not self.index_complete:
+            return False
+        size, mtime_ns = self.file_signature()
+        tmp_path = self.index_path() + ".tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                np.savez(
+                    file,
+                    version=IT02_INDEX_VERSION,
+                    stride=IT02_INDEX_STRIDE,
+                    file_size=size,
+                    mtime_ns=mtime_ns,
+                    **self.index_state(),
+                )
+            os.replace(tmp_path, self.index_path())
+            return True
+        except OSError:
+            # Read-only location: the index is kept in memory only
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def block_offsets(self, start, stop=None):
+        # (block, record offsets in the block, next record file offset) of the
+        # complete records in the block starting at the record boundary `start`
+        stop = self.file_size if stop is None else stop
+        end = min(start + self.block_bytes, stop)
+        block = np.asarray(self.data[start:end])
+        offsets = record_offsets(block, self.size_table)
+        if len(offsets) == 0:
+            return block, offsets, start
+        next_start = start + int(offsets[-1] + self.size_table[block[offsets[-1] + 8]])
+        return block, offsets, next_start
+
+    def record_times(self, block, offsets):
+        return block[offsets[:, None] + np.arange(8)].view("<f8").reshape(-1)
+
+    def add_checkpoints(self, start, block, offsets, next_start):
+        # Checkpoints of the block starting at the scanned record boundary
+        first_checkpoint = (-self.scanned_records) % IT02_INDEX_STRIDE
+        checkpoints = offsets[first_checkpoint::IT02_INDEX_STRIDE]
+        if len(checkpoints) > 0:
+            self.index_offsets.extend((checkpoints + start).tolist())
+            self.index_times.extend(self.record_times(block, checkpoints).tolist())
+        self.scanned_records += len(offsets)
+        self.scanned_time = float(self.record_times(block, offsets[-1:])[0])
+        self.scanned_offset = next_start
+
+    def extend_index(self, until_time_ns=None, progress=None):
+        # Scan forward from the last scanned record boundary, collecting
+        # checkpoints, until a record later than `until_time_ns` (or EOF)
+        if self._metadata is None:
+            self.parse_header()
+        while self.scanned_offset < self.file_size:
+            if (
+                until_time_ns is not None
+                and self.scanned_time is not None
+                and self.scanned_time > until_time_ns
+            ):
+                return
+            start = self.scanned_offset
+            block, offsets, next_start = self.block_offsets(start)
+            if len(offsets) == 0:
+                # Trailing truncated record
+                self.scanned_offset = self.file_size
+                return
+            self.add_checkpoints(start, block, offsets, next_start)
+            if progress is not None:
+                progress.advance(next_start - start)
+
+    def seek(self, time_ns):
+        # Byte offset of a record boundary at or before the first record >= time_ns,
+        # a binary search only once the index is complete
+        self.extend_index(time_ns)
+        position = np.searchsorted(self.index_times, time_ns, side="left") - 1
+        if position < 0:
+            return self.data_offset
+        return self.index_offsets[position]
+
+    def read_range(self, t0_ns, t1_ns, channels=None):
+        # Decode only the records with t0_ns <= time <= t1_ns.
+        # Returns (times_ns float64, counts uint32 (len(channels), n)), `channels`
+        # are hardware channel ids (default: all channels stored in the file).
+        channels = self.channels if channels is None else channels
+        positions = [self.channels.index(ch) for ch in channels]
+        times_parts = []
+        counts_parts = []
+        start = self.seek(t0_ns)
+        while start < self.file_size:
+            block, offsets, next_start = self.block_offsets(start)
+            if len(offsets) == 0:
+                break
+            block_times = self.record_times(block, offsets)
+            selected = np.flatnonzero((block_times >= t0_ns) & (block_times <= t1_ns))
+            if len(selected) > 0:
+                times_ns, counts = gather_records(
+                    block, offsets[selected], len(self.channels), self.count_offsets
+                )
+                if next_start >= self.file_size and selected[-1] == len(offsets) - 1:
+                    # The last record of the file marks the acquisition time
+                    if not counts[:, -1].any():
+                        times_ns, counts = times_ns[:-1], counts[:, :-1]
+                times_parts.append(times_ns)
+                counts_parts.append(counts[positions])
+            if block_times[-1] > t1_ns:
+                break
+            start = next_start
+        if not times_parts:
+            return np.empty(0, dtype=np.float64), np.zeros((len(positions), 0), dtype=np.uint32)
+        return np.concatenate(times_parts), np.concatenate(counts_parts, axis=1)
+
+    def iter_blocks(self, start=None, stop=None, progress=None):
+        # Yields the decoded (times_ns, counts (all channels)) of every block of
+        # complete records between two record boundaries, marker record included.
+        # Blocks continuing the index scan extend the index on the way.
+        if self._metadata is None:
+            self.parse_header()
+        start = self.data_offset if start is None else start
+        stop = self.file_size if stop is None else stop
+        while start < stop:
+            block, offsets, next_start = self.block_offsets(start, stop)
+            if len(offsets) == 0:
+                if start == self.scanned_offset and stop == self.file_size:
+                    # Trailing truncated record
+                    self.scanned_offset = self.file_size
+                break
+            if start == self.scanned_offset:
+                self.add_checkpoints(start, block, offsets, next_start)
+            yield gather_records(block, offsets, len(self.channels), self.count_offsets)
+            if progress is not None:
+                progress.advance(next_start - start)
+            start = next_start
+
+    def iter_chunks(self, chunk_records=IT02_CHUNK_RECORDS, channels=None, progress=None):
+        # Yields (times_ns float64, counts uint32 (len(channels), n)) blocks of
+        # at most chunk_records records, in constant memory. The trailing
+        # all-zero record (acquisition time marker) is dropped and its time
+        # stored in self.final_time_marker.
+        if self._metadata is None:
+            self.parse_header()
+        chunk_records = max(1, int(chunk_records))
+        channels = self.channels if channels is None else channels
+        positions = [self.channels.index(ch) for ch in channels]
+        self.final_time_marker = None
+        pending_times = []
+        pending_counts = []
+        pending = 0
+        for times_ns, counts in self.iter_blocks(progress=progress):
+            pending_times.append(times_ns)
+            pending_counts.append(counts)
+            pending += len(times_ns)
+            # At least one record is held back until the end of the file
+            if pending > chunk_records:
+                times_ns = np.concatenate(pending_times)
+                counts = np.concatenate(pending_counts, axis=1)
+                n_emit = ((pending - 1) // chunk_records) * chunk_records
+                for i in range(0, n_emit, chunk_records):
+                    yield times_ns[i : i + chunk_records], counts[positions, i : i + chunk_records]
+                pending_times = [times_ns[n_emit:]]
+                pending_counts = [counts[:, n_emit:]]
+                pending -= n_emit
+        if pending == 0:
+            return
+        times_ns = np.concatenate(pending_times)
+        counts = np.concatenate(pending_counts, axis=1)
+        if not counts[:, -1].any():
+            self.final_time_marker = float(times_ns[-1])
+            times_ns, counts = times_ns[:-1], counts[:, :-1]
+        for i in range(0, len(times_ns), chunk_records):
+            yield times_ns[i : i + chunk_records], counts[positions, i : i + chunk_records]
+
+    def decode_segment(self, start, stop, channels=None, progress=None):
+        # All records between two record boundaries: (times_ns, counts)
+        if self._metadata is None:
+            self.parse_header()
+        channels = self.channels if channels is None else channels
+        positions = [self.channels.index(ch) for ch in channels]
+        times_parts = [np.empty(0, dtype=np.float64)]
+        counts_parts = [np.zeros((len(positions), 0), dtype=np.uint32)]
+        for times_ns, counts in self.iter_blocks(start, stop, progress):
+            times_parts.append(times_ns)
+            counts_parts.append(counts[positions])
+        return np.concatenate(times_parts), np.concatenate(counts_parts, axis=1)
+
+    def read_sparse(self, channels=None, progress=None):
+        # Whole file as a SparseTrace: only the bins stored in the file
+        channels = self.channels if channels is None else channels
+        times_parts = []
+        counts_parts = []
+        for times_ns, counts in self.iter_chunks(channels=channels, progress=progress):
+            times_parts.append(times_ns)
+            counts_parts.append(counts)
+        if progress is not None:
+            progress.finish_pass()
+        if times_parts:
+            times_ns = np.concatenate(times_parts)
+            counts = np.concatenate(counts_parts, axis=1)
+        else:
+            times_ns = np.empty(0, dtype=np.float64)
+            counts = np.zeros((len(channels), 0), dtype=np.uint32)
+        return SparseTrace.from_records(
+            times_ns, counts, self.metadata, channels, self.final_time_marker
+        )
+
+    def close(self):
+        # The mapping is released once no decoded view references it
+        self._data = None
+
+
+def iter_chunks(path, chunk_records=IT02_CHUNK_RECORDS, channels=None):
+    # Constant memory iteration over the records of an IT02 file:
+    #   for times_ns, counts in iter_chunks("acquisition.bin"):
+    #       ...
+    reader = IT02Reader(path)
+    try:
+        yield from reader.iter_chunks(chunk_records, channels)
+    finally:
+        reader.close()
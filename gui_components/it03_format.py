@@ -0,0 +1,215 @@
+import json
+import lzma
+import os
+import struct
+import zlib
+import numpy as np
+
+# IT03 container:
+#   header   b"IT03", u32 JSON length, metadata JSON (same keys as IT02)
+#   blocks   compressed columnar blocks of up to IT03_BLOCK_RECORDS records
+#   index    one INDEX_DTYPE entry per block
+#   trailer  u64 index offset, u32 block count, b"IT03"
+# A block decompresses to: u32 records, u8 time code, u8 channels, one u8 code
+# per channel, then the time column (first time as int64 followed by the deltas,
+# or raw float64 times) and one count column per channel (nothing when all zero).
+IT03_MAGIC = b"IT03"
+IT03_BLOCK_RECORDS = 1 << 16
+IT03_TRAILER_BYTES = 16
+
+IT03_CODECS = {"none": 0, "zlib": 1, "lzma": 2}
+IT03_DEFAULT_CODEC = "zlib"
+IT03_ZLIB_LEVEL = 6
+IT03_LZMA_PRESET = 6
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("records", "<u4"),
+        ("codec", "u1"),
+        ("first_time", "<f8"),
+        ("last_time", "<f8"),
+    ]
+)
+
+# Column codes: 0 all zero (no bytes stored), then the narrowest fitting type
+ZERO_CODE = 0
+COLUMN_DTYPES = {1: "<u1", 2: "<u2", 3: "<u4", 4: "<i8", 5: "<f8"}
+INT64_CODE = 4
+FLOAT64_CODE = 5
+# Times beyond this are not exactly representable as float64 integers
+MAX_EXACT_TIME = 2**53
+
+
+def narrowest_code(max_value):
+    for code in (1, 2, 3):
+        if max_value <= np.iinfo(COLUMN_DTYPES[code]).max:
+            return code
+    return INT64_CODE
+
+
+def encode_times(times_ns):
+    # Delta-encoded integers when every time is a whole number of ns, raw float64 otherwise
+    if len(times_ns) > 0 and np.all(np.abs(times_ns) < MAX_EXACT_TIME) and np.all(times_ns == np.floor(times_ns)):
+        ints = times_ns.astype(np.int64)
+        deltas = np.diff(ints)
+        if len(deltas) == 0 or deltas.min() >= 0:
+            code = narrowest_code(int(deltas.max()) if len(deltas) > 0 else 0)
+        else:
+            code = INT64_CODE
+        return code, ints[:1].astype("<i8").tobytes() + deltas.astype(COLUMN_DTYPES[code]).tobytes()
+    return FLOAT64_CODE, times_ns.astype("<f8").tobytes()
+
+
+def decode_times(code, payload, offset, n_records):
+    if code == FLOAT64_CODE:
+        end = offset + 8 * n_records
+        return np.frombuffer(payload, dtype="<f8", count=n_records, offset=offset).astype(np.float64), end
+    first = np.frombuffer(payload, dtype="<i8", count=1, offset=offset)
+    dtype = np.dtype(COLUMN_DTYPES[code])
+    deltas = np.frombuffer(payload, dtype=dtype, count=n_records - 1, offset=offset + 8)
+    ints = np.empty(n_records, dtype=np.int64)
+    ints[0] = first[0]
+    np.cumsum(deltas, dtype=np.int64, out=ints[1:])
+    ints[1:] += first[0]
+    return ints.astype(np.float64), offset + 8 + dtype.itemsize * (n_records - 1)
+
+
+def compress(payload, codec):
+    if codec == IT03_CODECS["zlib"]:
+        return zlib.compress(payload, IT03_ZLIB_LEVEL)
+    if codec == IT03_CODECS["lzma"]:
+        return lzma.compress(payload, preset=IT03_LZMA_PRESET)
+    return payload
+
+
+def decompress(frame, codec):
+    if codec == IT03_CODECS["zlib"]:
+        return zlib.decompress(frame)
+    if codec == IT03_CODECS["lzma"]:
+        return lzma.decompress(frame)
+    return bytes(frame)
+
+
+def encode_block(times_ns, counts, codec):
+    # (times_ns float64, counts uint32 (channels, n)) -> compressed block bytes
+    n_records = len(times_ns)
+    time_code, time_bytes = encode_times(times_ns)
+    codes = []
+    columns = []
+    for row in counts:
+        max_count = int(row.max()) if n_records > 0 else 0
+        if max_count == 0:
+            codes.append(ZERO_CODE)
+            continue
+        code = narrowest_code(max_count)
+        codes.append(code)
+        columns.append(row.astype(COLUMN_DTYPES[code]).tobytes())
+    header = struct.pack("<IBB", n_records, time_code, len(codes)) + bytes(codes)
+    return compress(header + time_bytes + b"".join(columns), codec)
+
+
+def decode_block(frame, codec):
+    # Compressed block bytes -> (times_ns float64, counts uint32 (channels, n))
+    payload = decompress(frame, codec)
+    n_records, time_code, n_channels = struct.unpack_from("<IBB", payload, 0)
+    codes = payload[6 : 6 + n_channels]
+    times_ns, offset = decode_times(time_code, payload, 6 + n_channels, n_records)
+    counts = np.zeros((n_channels, n_records), dtype=np.uint32)
+    for position, code in enumerate(codes):
+        if code == ZERO_CODE:
+            continue
+        dtype = np.dtype(COLUMN_DTYPES[code])
+        counts[position] = np.frombuffer(payload, dtype=dtype, count=n_records, offset=offset)
+        offset += dtype.itemsize * n_records
+    return times_ns, counts
+
+
+def read_it03_header(data):
+    # (metadata, data offset) of a memory-mapped IT03 file
+    if len(data) < 8 + IT03_TRAILER_BYTES or bytes(data[:4]) != IT03_MAGIC:
+        raise ValueError("The file is not a valid IT03 Intensity Tracing file")
+    json_length = int(data[4:8].view("<u4")[0])
+    metadata = json.loads(bytes(data[8 : 8 + json_length]).decode("utf-8"))
+    return metadata, 8 + json_length
+
+
+def read_it03_index(data):
+    # Block index stored in the footer (structured INDEX_DTYPE array)
+    trailer = bytes(data[-IT03_TRAILER_BYTES:])
+    index_offset, n_blocks = struct.unpack_from("<QI", trailer, 0)
+    if trailer[12:] != IT03_MAGIC:
+        raise ValueError("The IT03 file is incomplete (missing block index)")
+    index_bytes = n_blocks * INDEX_DTYPE.itemsize
+    if index_offset + index_bytes + IT03_TRAILER_BYTES != len(data):
+        raise ValueError("The IT03 file is incomplete (missing block index)")
+    return np.frombuffer(
+        bytes(data[index_offset : index_offset + index_bytes]), dtype=INDEX_DTYPE
+    )
+
+
+class IT03Writer:
+    # Streams (times_ns, counts) batches into an IT03 file. The file is written
+    # next to its destination and moved in place by close(), abort() drops it.
+    def __init__(self, file_name, metadata, codec=IT03_DEFAULT_CODEC, block_records=IT03_BLOCK_RECORDS):
+        if codec not in IT03_CODECS:
+            raise ValueError(f"Unknown IT03 codec: {codec}")
+        self.file_name = file_name
+        self.codec = IT03_CODECS[codec]
+        self.block_records = max(1, int(block_records))
+        self.n_channels = len(metadata["channels"])
+        self.tmp_path = file_name + ".tmp"
+        self.file = open(self.tmp_path, "wb")
+        metadata_bytes = json.dumps(metadata).encode("utf-8")
+        self.file.write(IT03_MAGIC + struct.pack("<I", len(metadata_bytes)) + metadata_bytes)
+        self.offset = 8 + len(metadata_bytes)
+        self.index = []
+        self.pending_times = []
+        self.pending_counts = []
+        self.pending = 0
+
+    def write(self, times_ns, counts):
+        self.pending_times.append(np.asarray(times_ns, dtype=np.float64))
+        self.pending_counts.append(np.asarray(counts, dtype=np.uint32))
+        self.pending += len(times_ns)
+        if self.pending >= self.block_records:
+            self.flush(final=False)
+
+    def flush(self, final=True):
+        if self.pending == 0:
+            return
+        times_ns = np.concatenate(self.pending_times)
+        counts = np.concatenate(self.pending_counts, axis=1)
+        n_blocks = len(times_ns) // self.block_records if not final else -(-len(times_ns) // self.block_records)
+        for i in range(n_blocks):
+            start = i * self.block_records
+            self.write_block(
+                times_ns[start : start + self.block_records],
+                counts[:, start : start + self.block_records],
+            )
+        rest = n_blocks * self.block_records
+        self.pending_times = [times_ns[rest:]]
+        self.pending_counts = [counts[:, rest:]]
+        self.pending = len(times_ns) - rest
+
+    def write_block(self, times_ns, counts):
+        frame = encode_block(times_ns, counts, self.codec)
+        self.file.write(frame)
+        self.index.append(
+            (self.offset, len(frame), len(times_ns), self.codec, times_ns[0], times_ns[-1])
+        )
+        self.offset += len(frame)
+
+    def close(self):
+        self.flush(final=True)
+        index = np.array(self.index, dtype=INDEX_DTYPE)
+        self.file.write(index.tobytes())
+        self.file.write(struct.pack("<QI", self.offset, len(index)) + IT03_MAGIC)
+        self.file.close()
+        os.replace(self.tmp_path, self.file_name)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
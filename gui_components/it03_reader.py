@@ -0,0 +1,138 @@
+import numpy as np
+
+from gui_components.it02_decoder import IT02_MAGIC
+from gui_components.it02_reader import IT02Reader
+from gui_components.it03_format import (
+    IT03_BLOCK_RECORDS,
+    IT03_DEFAULT_CODEC,
+    IT03_MAGIC,
+    IT03Writer,
+    decode_block,
+    read_it03_header,
+    read_it03_index,
+)
+
+
+class IT03Reader(IT02Reader):
+    # Reader over an IT03 container with the IT02Reader interface (chunks,
+    # sparse trace, time ranges). The footer block index replaces the
+    # checkpoint scan, so there is no .idx sidecar and "offsets" are block numbers.
+    parallel_decode = False
+
+    def parse_header(self):
+        self._metadata, self.data_offset = read_it03_header(self.data)
+        self.blocks = read_it03_index(self.data)
+        self.index_offsets = list(range(len(self.blocks)))
+        self.index_times = self.blocks["first_time"].tolist()
+        self.scanned_records = int(self.blocks["records"].sum())
+        self.scanned_time = float(self.blocks["last_time"][-1]) if len(self.blocks) > 0 else None
+        self.scanned_offset = self.file_size
+
+    def open_index(self, progress=None, scan=True, save=True):
+        if self._metadata is None:
+            self.parse_header()
+        if progress is not None:
+            progress.skip_pass()
+        return True
+
+    def load_index(self):
+        return True
+
+    def save_index(self):
+        return False
+
+    def index_state(self):
+        # The block index is part of the file
+        return None
+
+    def restore_index(self, state):
+        if self._metadata is None:
+            self.parse_header()
+
+    def extend_index(self, until_time_ns=None, progress=None):
+        if self._metadata is None:
+            self.parse_header()
+
+    def decode(self, block):
+        entry = self.blocks[block]
+        start = int(entry["offset"])
+        return decode_block(self.data[start : start + int(entry["length"])], int(entry["codec"]))
+
+    def iter_blocks(self, start=None, stop=None, progress=None):
+        # Decoded (times_ns, counts (all channels)) of blocks [start, stop)
+        if self._metadata is None:
+            self.parse_header()
+        start = 0 if start is None else start
+        stop = len(self.blocks) if stop is None else min(stop, len(self.blocks))
+        for block in range(start, stop):
+            yield self.decode(block)
+            if progress is not None:
+                progress.advance(int(self.blocks["length"][block]))
+
+    def seek(self, time_ns):
+        # Block holding the first record >= time_ns
+        if self._metadata is None:
+            self.parse_header()
+        return int(np.searchsorted(self.blocks["last_time"], time_ns, side="left"))
+
+    def read_range(self, t0_ns, t1_ns, channels=None):
+        channels = self.channels if channels is None else channels
+        positions = [self.channels.index(ch) for ch in channels]
+        times_parts = []
+        counts_parts = []
+        first = self.seek(t0_ns)
+        last = int(np.searchsorted(self.blocks["first_time"], t1_ns, side="right"))
+        for block in range(first, last):
+            times_ns, counts = self.decode(block)
+            selected = (times_ns >= t0_ns) & (times_ns <= t1_ns)
+            if block == len(self.blocks) - 1 and selected[-1] and not counts[:, -1].any():
+                # The last record of the file marks the acquisition time
+                selected[-1] = False
+            if selected.any():
+                times_parts.append(times_ns[selected])
+                counts_parts.append(counts[positions][:, selected])
+        if not times_parts:
+            return np.empty(0, dtype=np.float64), np.zeros((len(positions), 0), dtype=np.uint32)
+        return np.concatenate(times_parts), np.concatenate(counts_parts, axis=1)
+
+
+def open_reader(file_name):
+    # IT02Reader or IT03Reader depending on the file magic
+    with open(file_name, "rb") as file:
+        magic = file.read(4)
+    if magic == IT03_MAGIC:
+        return IT03Reader(file_name)
+    if magic == IT02_MAGIC:
+        return IT02Reader(file_name)
+    raise ValueError("The file is not a valid Intensity Tracing file")
+
+
+def it03_file_name(file_name):
+    # acquisition.bin -> acquisition.it03.bin (still opened by the reader mode)
+    base = file_name[:-4] if file_name.endswith(".bin") else file_name
+    return base + ".it03.bin"
+
+
+def convert_it02_to_it03(
+    file_name,
+    output_file_name=None,
+    codec=IT03_DEFAULT_CODEC,
+    block_records=IT03_BLOCK_RECORDS,
+    progress=None,
+):
+    # Rewrites every record (acquisition time marker included) of an IT02 file
+    # as an IT03 container, in constant memory. Returns the output file name.
+    output_file_name = it03_file_name(file_name) if output_file_name is None else output_file_name
+    reader = IT02Reader(file_name)
+    try:
+        writer = IT03Writer(output_file_name, reader.metadata, codec, block_records)
+        try:
+            for times_ns, counts in reader.iter_blocks(progress=progress):
+                writer.write(times_ns, counts)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+    finally:
+        reader.close()
+    return output_file_name
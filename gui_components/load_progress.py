@@ -0,0 +1,75 @@
+import threading
+import time
+
+# Minimum delay between two progress callbacks
+LOAD_PROGRESS_INTERVAL_S = 0.1
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class LoadProgress:
+    # Byte based progress of a file load made of `passes` scans of the data
+    # section. Every decoded block calls advance(), which raises LoadCancelled
+    # once cancel() was requested so the load unwinds and drops its arrays.
+    # callback(bytes_done, bytes_total, eta_s) is called at most every
+    # LOAD_PROGRESS_INTERVAL_S seconds, eta_s is -1 while still unknown.
+    def __init__(self, pass_bytes, passes=1, callback=None, cancel_event=None):
+        self.pass_bytes = max(1, int(pass_bytes))
+        self.passes = passes
+        self.callback = callback
+        self.cancel_event = threading.Event() if cancel_event is None else cancel_event
+        self.done_bytes = 0
+        self.finished_passes = 0
+        self.started = time.monotonic()
+        self.last_report = 0.0
+
+    @property
+    def total_bytes(self):
+        return self.pass_bytes * self.passes
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise LoadCancelled()
+
+    def skip_pass(self):
+        # A pass answered from a sidecar file does not scan the data
+        self.passes = max(1, self.passes - 1)
+
+    def eta(self):
+        elapsed = time.monotonic() - self.started
+        if self.done_bytes <= 0 or elapsed <= 0:
+            return -1.0
+        return elapsed * (self.total_bytes - self.done_bytes) / self.done_bytes
+
+    def advance(self, n_bytes):
+        self.check()
+        pass_end = min(self.finished_passes + 1, self.passes) * self.pass_bytes
+        self.done_bytes = min(self.done_bytes + int(n_bytes), pass_end)
+        now = time.monotonic()
+        if self.callback is not None and now - self.last_report >= LOAD_PROGRESS_INTERVAL_S:
+            self.last_report = now
+            self.callback(float(self.done_bytes), float(self.total_bytes), self.eta())
+
+    def finish_pass(self):
+        # Rounds up to the end of the current pass (truncated tails, skipped bytes)
+        self.check()
+        self.finished_passes = min(self.finished_passes + 1, self.passes)
+        self.done_bytes = self.finished_passes * self.pass_bytes
+
+
+def format_eta(eta_s):
+    if eta_s < 0:
+        return "estimating time left..."
+    eta_s = int(round(eta_s))
+    if eta_s < 60:
+        return f"{eta_s}s left"
+    return f"{eta_s // 60}m {eta_s % 60:02d}s left"
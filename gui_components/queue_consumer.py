@@ -0,0 +1,76 @@
+import threading
+import time
+from flim_labs import flim_labs
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from gui_components.queue_entries import drain_queue, parse_queue_entries
+from gui_components.settings import QUEUE_IDLE_SLEEP_S, QUEUE_MAX_PULLS_PER_TICK
+
+
+class QueueConsumerWorker(QThread):
+    # Pulls flim_labs acquisition entries off the GUI thread.
+    # Every batch is handed to `process_batch_cb(times_ns, counts, capped,
+    # pending_entries)` while holding `lock`, the GUI is only notified and
+    # reads snapshots under the same lock.
+    batch_received = pyqtSignal()
+    acquisition_ended = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(
+        self,
+        process_batch_cb,
+        lock=None,
+        is_stopped_cb=None,
+        pull_cb=None,
+        idle_sleep_s=QUEUE_IDLE_SLEEP_S,
+    ):
+        super().__init__()
+        self.process_batch_cb = process_batch_cb
+        self.lock = lock if lock is not None else threading.Lock()
+        self.is_stopped_cb = is_stopped_cb
+        self.pull_cb = pull_cb
+        self.idle_sleep_s = idle_sleep_s
+        self.stop_event = threading.Event()
+        self.batches_processed = 0
+        self.entries_processed = 0
+        # Entries pulled since the queue was last seen empty
+        self.pending_entries = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stopped(self):
+        if self.stop_event.is_set():
+            return True
+        return self.is_stopped_cb is not None and self.is_stopped_cb()
+
+    def pull(self):
+        if self.pull_cb is not None:
+            return self.pull_cb()
+        return flim_labs.pull_from_queue()
+
+    def drain(self):
+        return drain_queue(self.pull, QUEUE_MAX_PULLS_PER_TICK)
+
+    def run(self):
+        try:
+            while not self.stopped():
+                entries, capped = self.drain()
+                self.pending_entries = self.pending_entries + len(entries) if capped else 0
+                if len(entries) == 0:
+                    time.sleep(self.idle_sleep_s)
+                    continue
+                times_ns, counts, ended = parse_queue_entries(entries)
+                if self.stopped():
+                    break
+                if len(times_ns) > 0:
+                    with self.lock:
+                        self.process_batch_cb(times_ns, counts, capped, self.pending_entries)
+                    self.batches_processed += 1
+                    self.entries_processed += len(times_ns)
+                    self.batch_received.emit()
+                if ended:  # End of acquisition
+                    self.stop_event.set()
+                    self.acquisition_ended.emit()
+        except Exception as e:
+            self.error.emit(str(e))
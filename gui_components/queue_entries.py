@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def drain_queue(pull_cb, max_pulls):
+    # Pull every pending acquisition entry, stopping after the ("end",) sentinel.
+    # Returns (entries, capped): capped when max_pulls was reached before an
+    # empty pull, i.e. the queue still holds entries.
+    entries = []
+    for _ in range(max_pulls):
+        val = pull_cb()
+        if len(val) == 0:
+            return entries, False
+        entries.extend(val)
+        if ("end",) in val:
+            return entries, False
+    return entries, True
+
+
+def parse_queue_entries(entries):
+    # Convert ((time_ns,), (ch1, ..., ch8)) queue entries into NumPy arrays
+    ended = False
+    data = []
+    for v in entries:
+        if v == ("end",):
+            ended = True
+            break
+        data.append(v)
+    times_ns = np.fromiter(
+        (time_ns[0] for (time_ns, _) in data), dtype=np.float64, count=len(data)
+    )
+    if len(data) == 0:
+        # ("end",) alone
+        counts = np.empty((0, 8), dtype=np.float64)
+    else:
+        counts = np.array(
+            [intensities for (_, intensities) in data], dtype=np.float64
+        )
+    return times_ns, counts, ended
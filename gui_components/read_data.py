@@ -2,17 +2,24 @@ from functools import partial
 import json
 import os
 import re
-import struct
+import threading
 
 from matplotlib import pyplot as plt
 import numpy as np
 from gui_components.box_message import BoxMessage
+from gui_components.decoded_cache import cache_key
 from gui_components.gui_styles import GUIStyles
 from gui_components.helpers import extract_channel_from_label
 from gui_components.input_text_control import InputTextControl
+from gui_components.it02_pyramid import load_pyramid, save_pyramid
+from gui_components.it02_parallel import build_pyramid
+from gui_components.it03_reader import open_reader
+from gui_components.load_progress import LoadCancelled, LoadProgress, format_eta
+from gui_components.reader_view import visible_envelope
 from gui_components.layout_utilities import clear_layout
 from gui_components.logo_utilities import TitlebarIcon
 from gui_components.messages_utilities import MessagesUtilities
+from gui_components.progress_bar import ProgressBar
 from gui_components.resource_path import resource_path
 from gui_components.channel_name_utils import get_channel_name
 from gui_components.settings import (
@@ -22,6 +29,8 @@ from gui_components.settings import (
     EXPORT_PLOT_IMG_BUTTON,
     READ_FILE_BUTTON,
     READER_METADATA_POPUP,
+    READER_EXPORT_IMG_COLUMNS,
+    READER_PLOT_DEFAULT_COLUMNS,
     READER_POPUP,
     RESET_BUTTON,
     SETTINGS_ACQUISITION_TIME_MILLIS,
@@ -98,7 +107,14 @@ class ReadData:
                     f"Error reading Intensity Tracing file",
                 )
             )
-            task = DataReaderWorker(file_name, signals)
+            signals.error.connect(partial(ReadData.handle_intensity_bin_load_stopped, app))
+            signals.cancelled.connect(
+                partial(ReadData.handle_intensity_bin_load_stopped, app)
+            )
+            task = DataReaderWorker(file_name, signals, app.decoded_cache, app.decode_pool)
+            if isinstance(window, ReaderPopup):
+                signals.progress.connect(window.on_load_progress)
+                window.start_load_progress(task)
             QThreadPool.globalInstance().start(task)
         except Exception as e:
             ReadData.show_warning_message(
@@ -114,12 +130,16 @@ class ReadData:
         app.reader_data["intensity"]["plots"] = []
         app.reader_data["intensity"]["metadata"] = metadata
         app.reader_data["intensity"]["files"]["intensity"] = file_name
-        times, channels_lines = data
-        app.reader_data["intensity"]["data"] = {
-            "times": times,
-            "channels_lines": channels_lines,
-        }
-        last_time_s = round(times[-1] / 1_000_000_000, 5)
+        reader, pyramid = data
+        previous_reader = app.reader_data["intensity"].get("reader")
+        if previous_reader is not None and previous_reader is not reader:
+            previous_reader.close()
+        # Memory-mapped handle for time range reads (zoom, export of a window)
+        app.reader_data["intensity"]["reader"] = reader
+        # Min/max overview of the whole file, None for a file without records
+        app.reader_data["intensity"]["pyramid"] = pyramid
+        last_time_ns = pyramid.last_time_ns if pyramid is not None else 0
+        last_time_s = round(float(last_time_ns) / 1_000_000_000, 5)
         app.reader_data["intensity"]["metadata"]["last_time_s"] = last_time_s
         
         if "channel_names" in metadata:
@@ -129,6 +149,13 @@ class ReadData:
         
         ReaderPopup.handle_bin_file_result_ui(app.widgets[READER_POPUP])
 
+    @staticmethod
+    def handle_intensity_bin_load_stopped(app, *args):
+        # Cancelled or failed load: nothing was stored in reader_data
+        app.loading_overlay.hide()
+        if READER_POPUP in app.widgets:
+            app.widgets[READER_POPUP].stop_load_progress()
+
     @staticmethod
     def show_warning_message(title, message):
         BoxMessage.setup(
@@ -137,34 +164,45 @@ class ReadData:
 
     @staticmethod
     def plot_intensity_data(app):
-        data = app.reader_data["intensity"]["data"]
         metadata = app.reader_data["intensity"]["metadata"]
-        if "channels_lines" in data and "times" in data and "channels" in metadata:
-            # Create a mapping from channel index to position in channels_lines
-            enabled_channels = metadata["channels"]
-            channel_to_position = {ch: i for i, ch in enumerate(enabled_channels)}
-            
+        reader = app.reader_data["intensity"].get("reader")
+        pyramid = app.reader_data["intensity"].get("pyramid")
+        if reader is not None and pyramid is not None and "channels" in metadata:
             for channel_index, intensity_line in app.intensity_lines.items():
                 # Check if this channel exists in the data
-                if channel_index not in channel_to_position:
+                if channel_index not in metadata["channels"]:
                     continue
-                    
-                position = channel_to_position[channel_index]
-                percent = 0.004
-                step = max(1, int(len(data["channels_lines"][position]) * percent))
-                channel_line = data["channels_lines"][position][::step]
-                times = data["times"][::step]
-                x = [time / 1_000_000_000 for time in times]
-                x = np.array(x)
-                y = np.array(channel_line)
-                intensity_line.setData(x, y)
+                view_box = intensity_line.getViewBox()
+                n_columns = (
+                    int(view_box.width())
+                    if view_box is not None and view_box.width() > 0
+                    else READER_PLOT_DEFAULT_COLUMNS
+                )
+                # Min/max per pixel column: spikes are never aliased away
+                x, y = visible_envelope(
+                    reader, pyramid, channel_index, pyramid.first_time_ns, pyramid.last_time_ns, n_columns
+                )
+                intensity_line.setData(x / 1_000_000_000, y)
                 QApplication.processEvents()
+            # Zoom and pan re-decimate the visible interval
+            app.reader_view.attach()
 
     @staticmethod
     def prepare_intensity_data_for_export_img(app):
+        # Min/max envelope of every channel, full resolution for short recordings
         metadata = app.reader_data["intensity"]["metadata"]
-        channels_lines = app.reader_data["intensity"]["data"]["channels_lines"]
-        times = app.reader_data["intensity"]["data"]["times"]
+        reader = app.reader_data["intensity"]["reader"]
+        pyramid = app.reader_data["intensity"]["pyramid"]
+        if pyramid is None:
+            return np.zeros((len(metadata["channels"]), 0)), np.empty(0), metadata
+        envelopes = [
+            visible_envelope(
+                reader, pyramid, channel, pyramid.first_time_ns, pyramid.last_time_ns, READER_EXPORT_IMG_COLUMNS
+            )
+            for channel in metadata["channels"]
+        ]
+        times = envelopes[0][0]
+        channels_lines = np.array([y for _, y in envelopes])
         return channels_lines, times, metadata
 
     @staticmethod
@@ -240,6 +278,7 @@ class ReaderPopup(QWidget):
         self.layouts = {}
         self.channels_checkboxes = []
         self.channels_checkbox_first_toggle = True
+        self.load_task = None
         self.setWindowTitle("Read data")
         TitlebarIcon.setup(self)
         GUIStyles.customize_theme(self, bg=QColor(20, 20, 20))
@@ -251,6 +290,7 @@ class ReaderPopup(QWidget):
         load_file_row = self.init_file_load_ui()
         self.layout.addSpacing(10)
         self.layout.insertLayout(1, load_file_row)
+        self.layout.addLayout(self.init_load_progress_ui())
         # LOAD CHANNELS GRID
         self.layout.addSpacing(20)
         channels_layout = self.init_channels_layout()
@@ -293,6 +333,7 @@ class ReaderPopup(QWidget):
             GUIStyles.set_start_btn_style(load_file_btn)
             load_file_btn.setFixedHeight(36)
             load_file_btn.clicked.connect(partial(self.on_load_file_btn_clicked))
+            self.widgets["load_file_btn"] = load_file_btn
             control_row.addWidget(input)
             control_row.addWidget(load_file_btn)
             v_box.addWidget(input_desc)
@@ -301,6 +342,59 @@ class ReaderPopup(QWidget):
             v_box.addSpacing(10)
         return v_box
 
+    def init_load_progress_ui(self):
+        # Determinate load progress with time left, the load can be cancelled
+        row = QHBoxLayout()
+        progress_bar = ProgressBar(label_text="", color="#13B6B4", visible=False)
+        cancel_btn = QPushButton("CANCEL")
+        cancel_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        GUIStyles.set_stop_btn_style(cancel_btn)
+        cancel_btn.setFixedHeight(36)
+        cancel_btn.setVisible(False)
+        cancel_btn.clicked.connect(self.on_cancel_load_btn_clicked)
+        self.widgets["load_progress_bar"] = progress_bar
+        self.widgets["cancel_load_btn"] = cancel_btn
+        row.addWidget(progress_bar, 1)
+        row.addWidget(cancel_btn, 0, Qt.AlignmentFlag.AlignBottom)
+        return row
+
+    def start_load_progress(self, task):
+        self.load_task = task
+        progress_bar = self.widgets["load_progress_bar"]
+        progress_bar.progress_bar.setValue(0)
+        progress_bar.label.setText("Loading file... " + format_eta(-1))
+        progress_bar.set_visible(True)
+        self.widgets["cancel_load_btn"].setEnabled(True)
+        self.widgets["cancel_load_btn"].setVisible(True)
+        self.widgets["load_file_btn"].setEnabled(False)
+
+    def stop_load_progress(self):
+        self.load_task = None
+        self.widgets["load_progress_bar"].set_visible(False)
+        self.widgets["cancel_load_btn"].setVisible(False)
+        self.widgets["load_file_btn"].setEnabled(True)
+
+    def on_load_progress(self, done_bytes, total_bytes, eta_s):
+        if self.load_task is None or self.load_task.cancelled:
+            return
+        percent = int(100 * done_bytes / total_bytes) if total_bytes > 0 else 0
+        self.widgets["load_progress_bar"].update_progress(
+            done_bytes, total_bytes, f"Loading file... {percent}% - {format_eta(eta_s)}"
+        )
+
+    def on_cancel_load_btn_clicked(self):
+        if self.load_task is None:
+            return
+        self.load_task.cancel()
+        self.widgets["cancel_load_btn"].setEnabled(False)
+        self.widgets["load_progress_bar"].label.setText("Cancelling...")
+
+    def closeEvent(self, event):
+        # Closing the popup aborts a load still running
+        if self.load_task is not None:
+            self.load_task.cancel()
+        super().closeEvent(event)
+
     def init_channels_layout(self):
         self.channels_checkboxes.clear()
         file_metadata = self.app.reader_data["intensity"]["metadata"]
@@ -420,6 +514,7 @@ class ReaderPopup(QWidget):
     def handle_bin_file_result_ui(cls, instance):
         app = instance.app
         app.loading_overlay.toggle_overlay()
+        instance.stop_load_progress()
         file_name = app.reader_data["intensity"]["files"]["intensity"]
         if file_name is not None and len(file_name) > 0:
             bin_metadata_btn_visible = ReadDataControls.read_bin_metadata_enabled(app)
@@ -550,110 +645,84 @@ class ReaderMetadataPopup(QWidget):
 class ProcessBinDataWorkerSignals(QObject):
     success = pyqtSignal(object)
     error = pyqtSignal(str)
+    # bytes done, bytes total, seconds left (-1 while unknown)
+    progress = pyqtSignal(float, float, float)
+    cancelled = pyqtSignal()
 
 
 class DataReaderWorker(QRunnable):
-    def __init__(self, file_name, signals):
+    def __init__(self, file_name, signals, cache=None, pool=None):
         super().__init__()
         self.file_name = file_name
         self.signals = signals
+        self.cache = cache
+        self.pool = pool
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        # Cooperative: the load stops at the next decoded block
+        self.cancel_event.set()
+
+    def load(self, reader):
+        key = cache_key(self.file_name) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            metadata, index_state, pyramid = cached
+            reader.restore_index(index_state)
+            return (self.file_name, reader, pyramid, metadata)
+        metadata = reader.metadata
+        # Nothing is decoded up front: plots are drawn from the pyramid and
+        # zoomed windows read with reader.read_range
+        progress = LoadProgress(
+            reader.file_size - reader.data_offset,
+            1,
+            self.signals.progress.emit,
+            self.cancel_event,
+        )
+        # Record offsets index (.bin.idx) and min/max/sum/count overview
+        # (.bin.pyr) from their sidecars
+        indexed = reader.open_index(scan=False)
+        pyramid = load_pyramid(reader)
+        if pyramid is None:
+            # A single pass builds the pyramid and collects the index on the
+            # way, large indexed files are decoded on several cores
+            pyramid = build_pyramid(reader, self.pool, progress)
+            progress.finish_pass()
+            if not indexed:
+                reader.save_index()
+            if pyramid is not None:
+                save_pyramid(reader, pyramid)
+        elif not indexed:
+            # Outdated or deleted index next to a valid pyramid
+            reader.open_index(progress)
+        else:
+            progress.skip_pass()
+        progress.check()
+        if self.cache is not None and pyramid is not None:
+            self.cache.put(key, metadata, reader.index_state(), pyramid)
+        return (self.file_name, reader, pyramid, metadata)
 
     def run(self):
+        cancelled = False
+        reader = None
         try:
-            with open(self.file_name, "rb") as file:
-                if file.read(4) != b"IT02":
-                    self.signals.error.emit(
-                        "The file is not a valid Intensity Tracing file"
-                    )
-                    return
-
-                json_length = struct.unpack("I", file.read(4))[0]
-                metadata = json.loads(file.read(json_length).decode("utf-8"))
-                number_of_channels = len(metadata["channels"])
-                channels_lines = [[] for _ in range(len(metadata["channels"]))]
-                times = []
-                
-                # READING DATA WITH BITMASK
-                while True:
-                    time_data = file.read(8)
-                    if not time_data or len(time_data) < 8:
-                        break
-                    (time,) = struct.unpack("d", time_data)
-                    times.append(time)
-                    
-                    bitmask_data = file.read(1)
-                    if not bitmask_data:
-                        break
-                    (bitmask,) = struct.unpack("B", bitmask_data)
-                    
-                    for bit_position in range(number_of_channels):
-                        if (bitmask & (1 << bit_position)) != 0:
-                            count_data = file.read(4)
-                            if not count_data or len(count_data) < 4:
-                                break
-                            (count,) = struct.unpack("I", count_data)
-                            channels_lines[bit_position].append(count)
-                        else:
-                            channels_lines[bit_position].append(0)
-                
-                # PROCESSING DATA
-                # If the last bin has bitmask = 0 (all zeros), it is a marker for the acquisition time
-                # and must be removed before visualization
-                if times and all(channels_lines[ch][-1] == 0 for ch in range(len(channels_lines))):
-                    final_time_marker = times[-1]
-                    times = times[:-1]  # Remove the timestamp marker
-                    for ch in range(len(channels_lines)):
-                        channels_lines[ch] = channels_lines[ch][:-1]  # Remove the marker data
-                else:
-                    final_time_marker = None
-                
-                bin_width_ns = metadata["bin_width_micros"] * 1000
-                
-                # CALCULATE EXPECTED TIME BINS
-                if metadata["acquisition_time_millis"] is not None:
-                    total_time_ns = metadata["acquisition_time_millis"] * 1_000_000
-                    expected_bins = int(total_time_ns / bin_width_ns)
-                elif final_time_marker is not None:
-                    # Use the final timestamp marker
-                    expected_bins = int(final_time_marker / bin_width_ns)
-                elif times:
-                    # Fallback: use the last real timestamp
-                    expected_bins = int(times[-1] / bin_width_ns) + 1
-                else:
-                    expected_bins = 0
-                
-                # RECONSTRUCT FULL TIME BINS
-                if expected_bins > 0 and times:
-                    # Find the first and last bin indices from actual data
-                    first_bin_index = int(times[0] / bin_width_ns)
-                    last_bin_index = int(times[-1] / bin_width_ns)
-                    
-                    # Reconstruct only from first to last bin with data
-                    num_bins = last_bin_index - first_bin_index + 1
-                    full_times = [(first_bin_index + i) * bin_width_ns for i in range(num_bins)]
-                    full_channel_lines = [[0] * num_bins for _ in range(number_of_channels)]
-                    
-                    for i in range(len(times)):
-                        time_ns = times[i]
-                        bin_index = int(time_ns / bin_width_ns)
-                        # Adjust index to start from 0
-                        adjusted_index = bin_index - first_bin_index
-                        
-                        if 0 <= adjusted_index < num_bins:
-                            for ch in range(number_of_channels):
-                                full_channel_lines[ch][adjusted_index] = channels_lines[ch][i]
-                    
-                    times = full_times
-                    channels_lines = full_channel_lines
-                elif expected_bins == 0:
-                    times = []
-                    channels_lines = [[] for _ in range(number_of_channels)]
-                
-                self.signals.success.emit(
-                    (self.file_name, times, channels_lines, metadata)
-                )
+            # IT02 recordings and IT03 containers
+            reader = open_reader(self.file_name)
+            self.signals.success.emit(self.load(reader))
+        except LoadCancelled:
+            cancelled = True
+        except ValueError as e:
+            self.signals.error.emit(str(e))
         except Exception as e:
             self.signals.error.emit(f"Error reading Intensity Tracing file: {e}")
+        if cancelled:
+            # Partial arrays went away with the load() frames, only the mapping is left
+            reader.close()
+            self.signals.cancelled.emit()
 
 
 class BuildIntensityPlotWorkerSignals(QObject):
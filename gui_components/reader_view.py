@@ -0,0 +1,138 @@
+from functools import partial
+import numpy as np
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from gui_components.settings import READER_PLOT_DEFAULT_COLUMNS, READER_VIEW_DEBOUNCE_MS
+from gui_components.sparse_trace import SparseTrace
+
+
+def visible_envelope(reader, pyramid, channel, t0_ns, t1_ns, n_columns):
+    # (x_ns, y) min/max pairs for the visible interval, about one pair per pixel
+    # column: from the pyramid while its finest buckets are smaller than a
+    # column, otherwise from the records of the interval only (full
+    # resolution once zoomed in), read from the file with reader.read_range
+    t0_ns = max(t0_ns, pyramid.first_time_ns)
+    t1_ns = min(t1_ns, pyramid.last_time_ns)
+    if t1_ns < t0_ns:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    range_bins = (t1_ns - t0_ns) / pyramid.bin_width_ns
+    if range_bins >= pyramid.base_bins * n_columns:
+        return pyramid.envelope(pyramid.channels.index(channel), n_columns, t0_ns, t1_ns)
+    # From the start of the first visible bin
+    first_bin_ns = np.floor(t0_ns / pyramid.bin_width_ns) * pyramid.bin_width_ns
+    times_ns, counts = reader.read_range(first_bin_ns, t1_ns, [channel])
+    window = SparseTrace.from_window(times_ns, counts, [channel], pyramid.bin_width_ns, t0_ns, t1_ns)
+    x, y = window.envelope(n_columns)
+    return x, y[0]
+
+
+class ReaderSliceSignals(QObject):
+    ready = pyqtSignal(object)
+
+
+class ReaderSliceTask(QRunnable):
+    def __init__(self, request_id, reader, pyramid, requests, signals):
+        super().__init__()
+        self.request_id = request_id
+        self.reader = reader
+        self.pyramid = pyramid
+        self.requests = requests
+        self.signals = signals
+
+    def run(self):
+        slices = {}
+        for channel, (t0_ns, t1_ns, n_columns) in self.requests.items():
+            x, y = visible_envelope(self.reader, self.pyramid, channel, t0_ns, t1_ns, n_columns)
+            slices[channel] = (x / 1_000_000_000, y, (t0_ns, t1_ns, n_columns))
+        self.signals.ready.emit((self.request_id, slices))
+
+
+class ReaderViewRefresher:
+    # Re-decimates the reader plots for their visible interval after every zoom
+    # or pan. View changes are coalesced for READER_VIEW_DEBOUNCE_MS, slices are
+    # computed in the thread pool and results of superseded requests dropped.
+    def __init__(self, app):
+        self.app = app
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(READER_VIEW_DEBOUNCE_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.signals = ReaderSliceSignals()
+        self.signals.ready.connect(self.on_slices_ready)
+        self.dirty_channels = set()
+        self.drawn = {}
+        self.request_id = 0
+        self.latest_requests = {}
+
+    def attach(self):
+        # Called once the reader plots of app.intensity_lines are drawn
+        self.drawn.clear()
+        self.dirty_channels.clear()
+        self.latest_requests.clear()
+        for channel, intensity_line in self.app.intensity_lines.items():
+            view_box = intensity_line.getViewBox()
+            if view_box is None or getattr(view_box, "reader_view_attached", False):
+                continue
+            view_box.reader_view_attached = True
+            view_box.sigXRangeChanged.connect(partial(self.on_view_changed, channel))
+            # Also fired when auto range is toggled back on
+            view_box.sigStateChanged.connect(partial(self.on_view_changed, channel))
+
+    def on_view_changed(self, channel, *args):
+        if self.app.acquire_read_mode != "read":
+            return
+        self.dirty_channels.add(channel)
+        self.timer.start()
+
+    def visible_request(self, channel, pyramid):
+        intensity_line = self.app.intensity_lines.get(channel)
+        view_box = intensity_line.getViewBox() if intensity_line is not None else None
+        if view_box is None:
+            return None
+        n_columns = int(view_box.width()) if view_box.width() > 0 else READER_PLOT_DEFAULT_COLUMNS
+        if view_box.autoRangeEnabled()[0]:
+            # Auto range follows the data: draw the whole file
+            t0_ns = pyramid.first_time_ns
+            t1_ns = pyramid.last_time_ns
+        else:
+            x_min, x_max = view_box.viewRange()[0]
+            t0_ns, t1_ns = x_min * 1_000_000_000, x_max * 1_000_000_000
+        return t0_ns, t1_ns, n_columns
+
+    def refresh(self):
+        reader_data = self.app.reader_data["intensity"]
+        reader = reader_data.get("reader")
+        pyramid = reader_data.get("pyramid")
+        if reader is None or pyramid is None:
+            self.dirty_channels.clear()
+            return
+        requests = {}
+        for channel in self.dirty_channels:
+            if channel not in pyramid.channels:
+                continue
+            request = self.visible_request(channel, pyramid)
+            if request is not None and self.drawn.get(channel) != request:
+                requests[channel] = request
+        self.dirty_channels.clear()
+        if not requests:
+            return
+        self.request_id += 1
+        for channel in requests:
+            self.latest_requests[channel] = self.request_id
+        task = ReaderSliceTask(
+            self.request_id, reader, pyramid, requests, self.signals
+        )
+        QThreadPool.globalInstance().start(task)
+
+    def on_slices_ready(self, result):
+        request_id, slices = result
+        for channel, (x, y, drawn) in slices.items():
+            if self.latest_requests.get(channel) != request_id:
+                # A newer view of this plot is being computed
+                continue
+            intensity_line = self.app.intensity_lines.get(channel)
+            if intensity_line is None:
+                continue
+            self.drawn[channel] = drawn
+            intensity_line.setData(x, y)
@@ -0,0 +1,66 @@
+from PyQt6.QtCore import QTimer
+
+from gui_components.settings import DEFAULT_RENDER_FPS, MAX_RENDER_FPS
+
+
+class RenderScheduler:
+    # Repaints at most `fps` times per second from the latest acquisition state.
+    # Data ingestion only marks the scheduler dirty, so several batches received
+    # between two frames are coalesced into a single repaint.
+    def __init__(self, render_cb, fps=DEFAULT_RENDER_FPS):
+        self.render_cb = render_cb
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.on_tick)
+        self.fps = DEFAULT_RENDER_FPS
+        self.set_fps(fps)
+        self.dirty = False
+        self.pending_updates = 0
+        self.frames_rendered = 0
+        self.updates_received = 0
+        self.updates_coalesced = 0
+
+    def set_fps(self, fps):
+        self.fps = max(1, min(int(fps), MAX_RENDER_FPS))
+        self.timer.setInterval(int(round(1000 / self.fps)))
+
+    def reset_counters(self):
+        self.pending_updates = 0
+        self.frames_rendered = 0
+        self.updates_received = 0
+        self.updates_coalesced = 0
+
+    def start(self):
+        self.dirty = False
+        self.reset_counters()
+        self.timer.start()
+
+    def stop(self, flush=True):
+        self.timer.stop()
+        if flush:
+            self.on_tick()
+        self.dirty = False
+
+    def is_active(self):
+        return self.timer.isActive()
+
+    def mark_dirty(self):
+        self.dirty = True
+        self.pending_updates += 1
+        self.updates_received += 1
+
+    def on_tick(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.updates_coalesced += max(0, self.pending_updates - 1)
+        self.pending_updates = 0
+        self.frames_rendered += 1
+        self.render_cb()
+
+    def get_stats(self):
+        return {
+            "fps": self.fps,
+            "frames_rendered": self.frames_rendered,
+            "updates_received": self.updates_received,
+            "updates_coalesced": self.updates_coalesced,
+        }
@@ -51,6 +51,67 @@ DEFAULT_INTENSITY_PLOTS_TO_SHOW = "[0]"
 SETTINGS_CHANNEL_NAMES = "channel_names"
 DEFAULT_CHANNEL_NAMES = "{}"
 
+SETTINGS_RENDER_FPS = "render_fps"
+DEFAULT_RENDER_FPS = 30
+MAX_RENDER_FPS = 120
+
+SETTINGS_MAX_INGESTION_LAG_MS = "max_ingestion_lag_ms"
+DEFAULT_MAX_INGESTION_LAG_MS = 500
+
+SETTINGS_MAX_QUEUE_BACKLOG = "max_queue_backlog"
+DEFAULT_MAX_QUEUE_BACKLOG = 5000
+
+SETTINGS_MAX_BATCH_PROCESSING_MS = "max_batch_processing_ms"
+DEFAULT_MAX_BATCH_PROCESSING_MS = 50
+
+SETTINGS_SHARED_TRACE_ENABLED = "shared_trace_enabled"
+DEFAULT_SHARED_TRACE_ENABLED = False
+
+SETTINGS_SHARED_TRACE_NAME = "shared_trace_name"
+DEFAULT_SHARED_TRACE_NAME = "flim_labs_intensity_trace"
+
+SETTINGS_SHARED_TRACE_SECONDS = "shared_trace_seconds"
+DEFAULT_SHARED_TRACE_SECONDS = 10
+MAX_SHARED_TRACE_POINTS = 10_000_000
+
+# Live copy of every acquisition streamed to a .npy file by a data sink
+SETTINGS_NPY_SINK_ENABLED = "npy_sink_enabled"
+DEFAULT_NPY_SINK_ENABLED = False
+
+# Max wait for the stats sink to close before the acquisition summary is shown
+SINK_SUMMARY_WAIT_S = 1.0
+
+# Decoded recordings kept in memory by the reader (least recently used evicted)
+SETTINGS_DECODED_CACHE_MB = "decoded_cache_mb"
+DEFAULT_DECODED_CACHE_MB = 1024
+
+SETTINGS_DECODED_CACHE_SPILL = "decoded_cache_spill"
+DEFAULT_DECODED_CACHE_SPILL = False
+
+SETTINGS_DECODED_CACHE_SPILL_MB = "decoded_cache_spill_mb"
+DEFAULT_DECODED_CACHE_SPILL_MB = 4096
+
+# Analysis-ready copy written next to each saved acquisition
+SETTINGS_ANALYSIS_COPY_FORMAT = "analysis_copy_format"
+DEFAULT_ANALYSIS_COPY_FORMAT = "none"
+ANALYSIS_COPY_OPTIONS = {
+    "None": "none",
+    "Parquet": "parquet",
+    "NPZ": "npz",
+    "NPY": "npy",
+    "HDF5": "hdf5",
+}
+
+# Saved data files that are linked or cloned (never read while saving) get a
+# checksum sidecar without digest, unless they are read once to hash them
+SETTINGS_CHECKSUM_LINKED_FILES = "checksum_linked_files"
+DEFAULT_CHECKSUM_LINKED_FILES = False
+
+# Display fallbacks used when the ingestion monitor degrades the live view
+DEGRADED_DECIMATION_SCALE = 4
+DEGRADED_RENDER_FPS = 10
+INGESTION_MONITOR_INTERVAL_MS = 500
+
 MAX_CHANNELS = 8
 
 START_BUTTON = "start_button"
@@ -69,7 +130,10 @@ CHECK_CARD_WIDGET = "check_card_widget"
 
 
 TIME_TAGGER_PROGRESS_BAR = "time_tagger_progress_bar"
+EXPORT_PROGRESS_BAR = "export_progress_bar"
+INGESTION_STATUS_LABEL = "ingestion_status_label"
 TIME_TAGGER_WIDGET = "time_tagger_widget"
+ANALYSIS_COPY_WIDGET = "analysis_copy_widget"
 
 MAIN_LAYOUT = "main_layout"
 
@@ -93,6 +157,15 @@ REALTIME_SECS = REALTIME_MS / 1000
 
 NS_IN_S = 1_000_000_000
 
+# Max flim_labs.pull_from_queue calls drained into a single batch
+QUEUE_MAX_PULLS_PER_TICK = 16
+# Sliding window used to compute the live CPS values
+CPS_WINDOW_NS = 330_000_000
+# Batches buffered per live data sink before new batches are dropped
+SINK_QUEUE_MAX_BATCHES = 256
+# Ingestion thread sleep when the acquisition queue is empty
+QUEUE_IDLE_SLEEP_S = 0.001
+
 EXPORTED_DATA_BYTES_UNIT = 12083.2
 
 
@@ -110,10 +183,18 @@ READER_DATA = {
         "files": {"intensity": ""},
         "plots": [],
         "metadata": {},
-        "data": {},
+        "reader": None,
+        "pyramid": None,
     },
 }
 
 DEFAULT_READER_DATA = deepcopy(READER_DATA)
 
+# Pixel columns assumed for reader plots not laid out yet
+READER_PLOT_DEFAULT_COLUMNS = 1000
+# Min/max columns drawn in exported images of recordings
+READER_EXPORT_IMG_COLUMNS = 4000
+# Delay coalescing zoom/pan events before the reader plots are re-decimated
+READER_VIEW_DEBOUNCE_MS = 80
+
 LOADING_OVERLAY = "loading_overlay"
\ No newline at end of file
@@ -0,0 +1,247 @@
+import json
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+from gui_components.data_sinks import DataSink
+from gui_components.settings import (
+    DEFAULT_SHARED_TRACE_NAME,
+    DEFAULT_SHARED_TRACE_SECONDS,
+    MAX_SHARED_TRACE_POINTS,
+)
+
+# Shared memory layout:
+#   [0, HEADER_SIZE)       fixed header (HEADER_DTYPE) + metadata JSON
+#   times_ns               float64[capacity]
+#   counts                 float64[n_channels, capacity] (one row per enabled channel)
+# Ring slot of record i is i % capacity, `cursor` is the total number of
+# records written so far. `sequence` is odd while the writer is updating.
+# `dropped_records` counts the records the publisher never received (its sink
+# queue was full): readers seeing it grow know the ring has a gap there.
+SHARED_TRACE_MAGIC = b"ITSM"
+SHARED_TRACE_VERSION = 2
+HEADER_SIZE = 4096
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("sequence", "<u8"),
+        ("cursor", "<u8"),
+        ("capacity", "<u8"),
+        ("n_channels", "<u4"),
+        ("finished", "<u4"),
+        ("metadata_len", "<u4"),
+        ("dropped_records", "<u8"),
+    ]
+)
+METADATA_OFFSET = 64
+
+
+def shared_trace_size(capacity, n_channels):
+    return HEADER_SIZE + 8 * capacity * (1 + n_channels)
+
+
+def map_shared_trace(buf, capacity, n_channels):
+    # Zero-copy NumPy views over a shared trace buffer
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf)
+    times_ns = np.ndarray((capacity,), dtype="<f8", buffer=buf, offset=HEADER_SIZE)
+    counts = np.ndarray(
+        (n_channels, capacity),
+        dtype="<f8",
+        buffer=buf,
+        offset=HEADER_SIZE + 8 * capacity,
+    )
+    return header, times_ns, counts
+
+
+class SharedTracePublisher(DataSink):
+    # Publishes the most recent `seconds` of per-channel counts in a shared
+    # memory ring. The segment is kept after the acquisition ends so late
+    # readers can still attach, it is replaced by the next acquisition and
+    # removed by release().
+    name = "shared_trace"
+
+    def __init__(self, shm_name=DEFAULT_SHARED_TRACE_NAME, seconds=DEFAULT_SHARED_TRACE_SECONDS):
+        self.shm_name = shm_name
+        self.seconds = seconds
+        self.shm = None
+        self.records_dropped = 0
+
+    def open(self, metadata):
+        self.release()
+        self.records_dropped = 0
+        self.channels = list(metadata.get("channels", []))
+        bin_width_micros = metadata.get("bin_width_micros", 1000)
+        capacity = int(self.seconds * 1_000_000 / max(1, bin_width_micros))
+        capacity = max(1, min(capacity, MAX_SHARED_TRACE_POINTS))
+        metadata_json = json.dumps(
+            {
+                "channels": self.channels,
+                "bin_width_micros": bin_width_micros,
+                "channel_names": metadata.get("channel_names", {}),
+                "seconds": self.seconds,
+            }
+        ).encode("utf-8")
+        if METADATA_OFFSET + len(metadata_json) > HEADER_SIZE:
+            raise ValueError("Shared trace metadata too large")
+        size = shared_trace_size(capacity, len(self.channels))
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=size)
+        except FileExistsError:
+            # Left over by a previous run that did not exit cleanly
+            stale = shared_memory.SharedMemory(name=self.shm_name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=size)
+        self.capacity = capacity
+        self.header, self.times_ns, self.counts = map_shared_trace(
+            self.shm.buf, capacity, len(self.channels)
+        )
+        self.shm.buf[METADATA_OFFSET : METADATA_OFFSET + len(metadata_json)] = metadata_json
+        self.header["version"] = SHARED_TRACE_VERSION
+        self.header["sequence"] = 0
+        self.header["cursor"] = 0
+        self.header["capacity"] = capacity
+        self.header["n_channels"] = len(self.channels)
+        self.header["finished"] = 0
+        self.header["metadata_len"] = len(metadata_json)
+        self.header["dropped_records"] = 0
+        # Magic last: readers only attach to fully initialized segments
+        self.header["magic"] = SHARED_TRACE_MAGIC
+
+    def process(self, times_ns, counts):
+        n = len(times_ns)
+        if n > self.capacity:
+            times_ns = times_ns[-self.capacity :]
+            counts = counts[-self.capacity :]
+            skipped, n = n - self.capacity, self.capacity
+        else:
+            skipped = 0
+        cursor = int(self.header["cursor"]) + skipped
+        start = cursor % self.capacity
+        first = min(n, self.capacity - start)
+        channel_counts = counts[:, self.channels].T
+        sequence = int(self.header["sequence"])
+        self.header["sequence"] = sequence + 1
+        self.times_ns[start : start + first] = times_ns[:first]
+        self.counts[:, start : start + first] = channel_counts[:, :first]
+        if first < n:
+            self.times_ns[: n - first] = times_ns[first:]
+            self.counts[:, : n - first] = channel_counts[:, first:]
+        self.header["cursor"] = cursor + n
+        self.header["dropped_records"] = self.records_dropped
+        self.header["sequence"] = sequence + 2
+
+    def dropped(self, records_dropped):
+        # Producer thread: only stored here, the header is written by the
+        # worker thread (next process() or close())
+        self.records_dropped = records_dropped
+
+    def close(self):
+        if self.shm is not None:
+            self.header["dropped_records"] = self.records_dropped
+            self.header["finished"] = 1
+
+    def release(self):
+        if self.shm is None:
+            return
+        # Views must be dropped before the buffer can be closed
+        self.header = self.times_ns = self.counts = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+
+class SharedTraceReader:
+    # Attach from another process:
+    #   reader = SharedTraceReader("flim_labs_intensity_trace")
+    #   times_ns, counts = reader.read_latest(1000)
+    def __init__(self, shm_name=DEFAULT_SHARED_TRACE_NAME):
+        self.shm = SharedTraceReader.attach(shm_name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if bytes(header["magic"]) != SHARED_TRACE_MAGIC:
+            self.shm.close()
+            raise ValueError(f"'{shm_name}' is not an intensity tracing shared trace")
+        if int(header["version"]) != SHARED_TRACE_VERSION:
+            self.shm.close()
+            raise ValueError(f"'{shm_name}' uses shared trace version {int(header['version'])}")
+        metadata_len = int(header["metadata_len"])
+        self.metadata = json.loads(
+            bytes(self.shm.buf[METADATA_OFFSET : METADATA_OFFSET + metadata_len])
+        )
+        self.capacity = int(header["capacity"])
+        self.channels = self.metadata["channels"]
+        self.bin_width_micros = self.metadata["bin_width_micros"]
+        self.channel_names = self.metadata["channel_names"]
+        self.header, self.times_ns, self.counts = map_shared_trace(
+            self.shm.buf, self.capacity, int(header["n_channels"])
+        )
+
+    @staticmethod
+    def attach(shm_name):
+        try:
+            return shared_memory.SharedMemory(name=shm_name, track=False)
+        except TypeError:
+            # Python < 3.13: keep the resource tracker from unlinking the
+            # publisher's segment when this process exits
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+            return shm
+
+    @property
+    def cursor(self):
+        return int(self.header["cursor"])
+
+    @property
+    def finished(self):
+        return bool(self.header["finished"])
+
+    @property
+    def dropped_records(self):
+        return int(self.header["dropped_records"])
+
+    def channel_index(self, channel):
+        return self.channels.index(channel)
+
+    def latest_views(self, n=None):
+        # Zero-copy (times_ns, counts) segments of the last n records, oldest
+        # first. Views are not protected from concurrent writes: use
+        # read_latest() for a consistent copy.
+        cursor = self.cursor
+        available = min(cursor, self.capacity)
+        n = available if n is None else min(n, available)
+        if n == 0:
+            return [(self.times_ns[:0], self.counts[:, :0])]
+        start = (cursor - n) % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            return [(self.times_ns[start:end], self.counts[:, start:end])]
+        end -= self.capacity
+        return [
+            (self.times_ns[start:], self.counts[:, start:]),
+            (self.times_ns[:end], self.counts[:, :end]),
+        ]
+
+    def read_latest(self, n=None, retries=100):
+        # Consistent copy of the last n records (seqlock retry)
+        for _ in range(retries):
+            sequence = int(self.header["sequence"])
+            if sequence % 2 == 1:
+                time.sleep(0)
+                continue
+            segments = self.latest_views(n)
+            times_ns = np.concatenate([t for t, _ in segments])
+            counts = np.concatenate([c for _, c in segments], axis=1)
+            if int(self.header["sequence"]) == sequence:
+                return times_ns, counts
+        raise TimeoutError("Shared trace is being updated too fast to read")
+
+    def close(self):
+        self.header = self.times_ns = self.counts = None
+        self.shm.close()
@@ -0,0 +1,122 @@
+import numpy as np
+
+
+def last_of_bins(bin_indexes, counts):
+    # A bin written twice keeps its last record
+    if len(bin_indexes) == 0:
+        return bin_indexes, counts
+    last_of_bin = np.append(np.diff(bin_indexes) != 0, True)
+    if last_of_bin.all():
+        return bin_indexes, counts
+    return bin_indexes[last_of_bin], counts[:, last_of_bin]
+
+
+class SparseTrace:
+    # Intensity trace on a regular bin grid storing only the bins present in
+    # the file: `bin_indexes` (int64, relative to first_bin_index, increasing)
+    # and `counts` (uint32, one row per channel). Every other bin is zero.
+    def __init__(self, channels, bin_width_ns, first_bin_index, num_bins, bin_indexes, counts):
+        self.channels = channels
+        self.bin_width_ns = bin_width_ns
+        self.first_bin_index = first_bin_index
+        self.num_bins = num_bins
+        self.bin_indexes = bin_indexes
+        self.counts = counts
+
+    @staticmethod
+    def from_records(times_ns, counts, metadata, channels=None, final_time_marker=None):
+        # Grid from the first to the last bin with data, same rules as the
+        # full reconstruction (acquisition time, then final marker, then data)
+        channels = metadata["channels"] if channels is None else channels
+        bin_width_ns = metadata["bin_width_micros"] * 1000
+        if metadata["acquisition_time_millis"] is not None:
+            expected_bins = int(metadata["acquisition_time_millis"] * 1_000_000 / bin_width_ns)
+        elif final_time_marker is not None:
+            expected_bins = int(final_time_marker / bin_width_ns)
+        elif len(times_ns) > 0:
+            expected_bins = int(times_ns[-1] / bin_width_ns) + 1
+        else:
+            expected_bins = 0
+        if expected_bins <= 0 or len(times_ns) == 0:
+            return SparseTrace(
+                channels, bin_width_ns, 0, 0,
+                np.empty(0, dtype=np.int64), np.zeros((counts.shape[0], 0), dtype=np.uint32),
+            )
+        bin_indexes = (times_ns / bin_width_ns).astype(np.int64)
+        first_bin_index = int(bin_indexes[0])
+        bin_indexes, counts = last_of_bins(bin_indexes - first_bin_index, counts)
+        return SparseTrace(
+            channels, bin_width_ns, first_bin_index, int(bin_indexes[-1]) + 1,
+            bin_indexes, counts,
+        )
+
+    @staticmethod
+    def from_window(times_ns, counts, channels, bin_width_ns, t0_ns, t1_ns):
+        # Records read for the t0_ns..t1_ns interval (IT02Reader.read_range)
+        # on the grid of the bins covering that interval
+        first_bin_index = int(np.floor(t0_ns / bin_width_ns))
+        num_bins = max(0, int(np.floor(t1_ns / bin_width_ns)) - first_bin_index + 1)
+        bin_indexes = (times_ns / bin_width_ns).astype(np.int64) - first_bin_index
+        bin_indexes, counts = last_of_bins(bin_indexes, counts)
+        return SparseTrace(channels, bin_width_ns, first_bin_index, num_bins, bin_indexes, counts)
+
+    @property
+    def times_ns(self):
+        # Times of the stored bins only
+        return (self.first_bin_index + self.bin_indexes) * self.bin_width_ns
+
+    @property
+    def last_time_ns(self):
+        return (self.first_bin_index + self.num_bins - 1) * self.bin_width_ns
+
+    def bin_range(self, t0_ns=None, t1_ns=None):
+        # [start, stop) grid bins (relative to first_bin_index) covering t0_ns..t1_ns
+        start = 0 if t0_ns is None else int(np.floor(t0_ns / self.bin_width_ns)) - self.first_bin_index
+        stop = (
+            self.num_bins
+            if t1_ns is None
+            else int(np.floor(t1_ns / self.bin_width_ns)) - self.first_bin_index + 1
+        )
+        return max(0, start), min(self.num_bins, stop)
+
+    def window_dense(self, start, stop, positions):
+        # Full resolution bins [start, stop) as float64 (times_ns, counts)
+        lo, hi = np.searchsorted(self.bin_indexes, [start, stop])
+        times_ns = (self.first_bin_index + np.arange(start, stop, dtype=np.int64)) * self.bin_width_ns
+        counts = np.zeros((len(positions), stop - start), dtype=np.float64)
+        counts[:, self.bin_indexes[lo:hi] - start] = self.counts[positions, lo:hi]
+        return times_ns.astype(np.float64), counts
+
+    def envelope(self, n_columns, positions=None, t0_ns=None, t1_ns=None):
+        # Min/max per column over the grid (or its t0_ns..t1_ns window) without
+        # expanding zero bins, full resolution when there are fewer bins than columns.
+        # Returns x_ns (2 * columns) and y (len(positions), 2 * columns).
+        positions = list(range(self.counts.shape[0])) if positions is None else positions
+        n_columns = int(n_columns)
+        start, stop = self.bin_range(t0_ns, t1_ns)
+        n_bins = stop - start
+        if n_bins <= 0:
+            return np.empty(0, dtype=np.float64), np.zeros((len(positions), 0), dtype=np.float64)
+        if n_columns <= 0 or n_bins <= 2 * n_columns:
+            return self.window_dense(start, stop, positions)
+        # Column c holds the bins in [edges[c], edges[c + 1])
+        edges = start + (np.arange(n_columns + 1, dtype=np.int64) * n_bins + n_columns - 1) // n_columns
+        lo, hi = np.searchsorted(self.bin_indexes, [start, stop])
+        columns = np.searchsorted(edges, self.bin_indexes[lo:hi], side="right") - 1
+        y_min = np.zeros((len(positions), n_columns), dtype=np.float64)
+        y_max = np.zeros((len(positions), n_columns), dtype=np.float64)
+        if len(columns) > 0:
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+            used = columns[starts]
+            counts = self.counts[positions, lo:hi]
+            y_max[:, used] = np.maximum.reduceat(counts, starts, axis=1)
+            # Columns with a missing (zero) bin keep a zero minimum
+            full = np.diff(np.append(starts, len(columns))) == np.diff(edges)[used]
+            y_min[:, used[full]] = np.minimum.reduceat(counts, starts, axis=1)[:, full]
+        x = np.empty(2 * n_columns, dtype=np.float64)
+        x[0::2] = (self.first_bin_index + edges[:-1]) * self.bin_width_ns
+        x[1::2] = (self.first_bin_index + edges[1:] - 1) * self.bin_width_ns
+        y = np.empty((len(positions), 2 * n_columns), dtype=np.float64)
+        y[:, 0::2] = y_min
+        y[:, 1::2] = y_max
+        return x, y
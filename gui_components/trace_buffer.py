@@ -0,0 +1,93 @@
+import numpy as np
+
+
+# Upper bound for a single channel buffer (points), avoids huge allocations at 1µs bins
+MAX_TRACE_BUFFER_POINTS = 2_000_000
+MIN_TRACE_BUFFER_POINTS = 1024
+
+
+class TraceRingBuffer:
+    # Fixed-size (time, value) ring buffer.
+    # Every sample is written twice (at i and i + capacity) so that the latest
+    # `size` points are always available as a contiguous slice, without copies.
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.data = np.zeros((2, 2 * self.capacity), dtype=np.float64)
+        self.write_index = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.write_index = 0
+        self.size = 0
+
+    def append(self, x, y):
+        i = self.write_index
+        self.data[0, i] = x
+        self.data[1, i] = y
+        self.data[0, i + self.capacity] = x
+        self.data[1, i + self.capacity] = y
+        self.write_index = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        n = len(xs)
+        if n == 0:
+            return
+        if n > self.capacity:
+            xs = xs[-self.capacity:]
+            ys = ys[-self.capacity:]
+            n = self.capacity
+        indexes = (self.write_index + np.arange(n)) % self.capacity
+        self.data[0, indexes] = xs
+        self.data[1, indexes] = ys
+        self.data[0, indexes + self.capacity] = xs
+        self.data[1, indexes + self.capacity] = ys
+        self.write_index = (self.write_index + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def view(self, time_span=None):
+        # Contiguous views on the buffered points, oldest first
+        end = self.write_index + self.capacity
+        start = end - self.size
+        x = self.data[0, start:end]
+        y = self.data[1, start:end]
+        if time_span is not None and self.size > 0:
+            first = np.searchsorted(x, x[-1] - time_span, side="left")
+            x = x[first:]
+            y = y[first:]
+        return x, y
+
+
+class TraceStore:
+    # One ring buffer per channel, sized from the time span and the bin rate
+    def __init__(self, channels, time_span_seconds, bin_width_micros):
+        self.time_span_seconds = float(time_span_seconds)
+        self.capacity = TraceStore.calc_capacity(time_span_seconds, bin_width_micros)
+        self.buffers = {ch: TraceRingBuffer(self.capacity) for ch in channels}
+
+    @staticmethod
+    def calc_capacity(time_span_seconds, bin_width_micros):
+        bins_per_second = 1_000_000 / max(1, bin_width_micros)
+        points = int(np.ceil(float(time_span_seconds) * bins_per_second)) + 1
+        return int(min(MAX_TRACE_BUFFER_POINTS, max(MIN_TRACE_BUFFER_POINTS, points)))
+
+    def __contains__(self, channel):
+        return channel in self.buffers
+
+    def append(self, channel, x, y):
+        self.buffers[channel].append(x, y)
+
+    def extend(self, channel, xs, ys):
+        self.buffers[channel].extend(xs, ys)
+
+    def view(self, channel):
+        return self.buffers[channel].view(self.time_span_seconds)
+
+    def clear(self):
+        for buffer in self.buffers.values():
+            buffer.clear()
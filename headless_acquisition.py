@@ -0,0 +1,180 @@
+import argparse
+import os
+import signal
+import sys
+import time
+import numpy as np
+from flim_labs import flim_labs
+
+from gui_components.cps_engine import CPSEngine
+from gui_components.file_finalize import finalize_file
+from gui_components.format_utilities import FormatUtils
+from gui_components.queue_entries import drain_queue, parse_queue_entries
+from gui_components.settings import MAX_CHANNELS, QUEUE_IDLE_SLEEP_S
+
+FIRMWARES = {
+    "usb": "intensity_tracing_usb.flim",
+    "sma": "intensity_tracing_sma.flim",
+}
+
+# Headless runs drain larger batches than the GUI, nothing competes for the CPU
+HEADLESS_MAX_PULLS_PER_BATCH = 256
+
+
+def parse_channels(value):
+    # "1,3,4" -> [0, 2, 3]
+    channels = sorted({int(ch) - 1 for ch in value.split(",") if ch.strip()})
+    if not channels or channels[0] < 0 or channels[-1] >= MAX_CHANNELS:
+        raise argparse.ArgumentTypeError(
+            f"channels must be a comma separated list of values between 1 and {MAX_CHANNELS}"
+        )
+    return channels
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless FLIM LABS intensity tracing acquisition (no GUI)"
+    )
+    parser.add_argument(
+        "--channels", type=parse_channels, default=[0],
+        help="enabled channels, 1-based and comma separated (default: 1)",
+    )
+    parser.add_argument(
+        "--bin-width", type=int, default=1000,
+        help="bin width in microseconds, 1-1000000 (default: 1000)",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=0,
+        help="acquisition time in seconds, 0 for free running (default: 0)",
+    )
+    parser.add_argument(
+        "--firmware", default="usb",
+        help="'usb', 'sma' or a firmware file name (default: usb)",
+    )
+    parser.add_argument(
+        "--output", default=None,
+        help="path where the acquired .bin file is moved at the end of the run",
+    )
+    parser.add_argument(
+        "--no-write", action="store_true",
+        help="do not write the acquisition .bin file",
+    )
+    parser.add_argument(
+        "--summary-interval", type=float, default=5.0,
+        help="seconds between summary lines (default: 5)",
+    )
+    args = parser.parse_args(argv)
+    if not 1 <= args.bin_width <= 1_000_000:
+        parser.error("--bin-width must be between 1 and 1000000")
+    if args.duration < 0:
+        parser.error("--duration must be >= 0")
+    if args.output and args.no_write:
+        parser.error("--output can not be used together with --no-write")
+    args.firmware = FIRMWARES.get(args.firmware.lower(), args.firmware)
+    return args
+
+
+class AcquisitionStats:
+    # Rolling statistics over the whole run, updated once per drained batch
+    def __init__(self, channels):
+        self.channels = channels
+        self.cps = CPSEngine(channels)
+        self.total_counts = np.zeros(len(channels), dtype=np.float64)
+        self.max_cps = np.zeros(len(channels), dtype=np.float64)
+        self.entries = 0
+        self.batches = 0
+        self.last_time_ns = 0.0
+        self.started_at = time.perf_counter()
+
+    def update(self, times_ns, counts):
+        self.cps.update(times_ns, counts)
+        self.total_counts += counts[:, self.channels].sum(axis=0)
+        np.maximum(self.max_cps, self.cps.values, out=self.max_cps)
+        self.entries += len(times_ns)
+        self.batches += 1
+        self.last_time_ns = times_ns[-1]
+
+    def summary_line(self):
+        elapsed_s = time.perf_counter() - self.started_at
+        acquired_s = self.last_time_ns / 1_000_000_000
+        channels = " ".join(
+            f"Ch{ch + 1}={FormatUtils.format_cps(self.cps.values[i])} CPS"
+            for i, ch in enumerate(self.channels)
+        )
+        return (
+            f"[{acquired_s:.2f}s] entries={self.entries} batches={self.batches} "
+            f"entries/s={self.entries / max(elapsed_s, 1e-9):.0f} "
+            f"lag={max(0.0, elapsed_s - acquired_s):.2f}s {channels}"
+        )
+
+    def final_report(self):
+        lines = [self.summary_line()]
+        for i, ch in enumerate(self.channels):
+            lines.append(
+                f"Ch{ch + 1}: total counts={int(self.total_counts[i])} "
+                f"max CPS={FormatUtils.format_cps(self.max_cps[i])}"
+            )
+        return "\n".join(lines)
+
+
+def run_acquisition(args):
+    acquisition_time_millis = int(args.duration * 1000) if args.duration > 0 else None
+    result = flim_labs.start_intensity_tracing(
+        enabled_channels=args.channels,
+        bin_width_micros=args.bin_width,
+        channel_names={},
+        write_bin=False,
+        write_data=not args.no_write,
+        acquisition_time_millis=acquisition_time_millis,
+        firmware_file=args.firmware,
+    )
+    stats = AcquisitionStats(args.channels)
+    stop_requested = False
+
+    def request_stop(signum, frame):
+        nonlocal stop_requested
+        if not stop_requested:
+            print("Stop requested, waiting for the acquisition to end...")
+            stop_requested = True
+            flim_labs.request_stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    next_summary = time.perf_counter() + args.summary_interval
+    while True:
+        entries, _ = drain_queue(flim_labs.pull_from_queue, HEADLESS_MAX_PULLS_PER_BATCH)
+        if len(entries) == 0:
+            time.sleep(QUEUE_IDLE_SLEEP_S)
+        else:
+            times_ns, counts, ended = parse_queue_entries(entries)
+            if len(times_ns) > 0:
+                stats.update(times_ns, counts)
+            if ended:
+                break
+        if time.perf_counter() >= next_summary:
+            print(stats.summary_line(), flush=True)
+            next_summary += args.summary_interval
+    print("Acquisition ended")
+    print(stats.final_report())
+    return result
+
+
+def move_data_file(data_file, output):
+    if not data_file or not os.path.exists(data_file):
+        print("No data file to move")
+        return None
+    if os.path.isdir(output):
+        output = os.path.join(output, os.path.basename(data_file))
+    # A rename on the same volume, a link/clone/copy elsewhere
+    finalize_file(data_file, output, move=True)
+    return output
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = run_acquisition(args)
+    data_file = getattr(result, "data_file", "")
+    if args.output:
+        data_file = move_data_file(data_file, args.output)
+    if data_file:
+        print("Data file=" + str(data_file))
+    sys.exit(0)
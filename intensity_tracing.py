@@ -1,7 +1,9 @@
 from functools import partial
 import json
+import multiprocessing
 import os
 import sys
+import threading
 from PyQt6.QtCore import QTimer, Qt, QSettings, QEvent, QtMsgType, qInstallMessageHandler
 from PyQt6.QtWidgets import (
     QMainWindow,
@@ -16,14 +18,21 @@ from gui_components.buttons import ActionButtons, CollapseButton, ReadAcquireMod
 from gui_components.channels_control import ChannelsControl
 from gui_components.check_card import CheckCard
 from gui_components.controls_bar import ControlsBar
+from gui_components.data_sinks import NpyFileWriterSink, SinkPipeline, StatsSink
 from gui_components.data_export_controls import ExportDataControl
+from gui_components.decoded_cache import DECODED_CACHE_DIR, DecodedCache
+from gui_components.ingestion_monitor import IngestionMonitor
 from gui_components.input_params_controls import InputParamsControls
 from gui_components.intensity_tracing_controller import IntensityTracing
+from gui_components.it02_parallel import DecodePool
 from gui_components.layout_utilities import init_ui
 from gui_components.loading import LoadingOverlay
 from gui_components.logo_utilities import LogoOverlay
 from gui_components.read_data import ReadDataControls
+from gui_components.reader_view import ReaderViewRefresher
+from gui_components.render_scheduler import RenderScheduler
 from gui_components.settings import *
+from gui_components.shared_trace import SharedTracePublisher
 from gui_components.top_bar import TopBar
 
 current_path = os.path.dirname(os.path.abspath(__file__))
@@ -82,11 +91,22 @@ class PhotonsTracingWindow(QMainWindow):
         ]
         
         self.cps_threshold = int(self.settings.value(SETTINGS_CPS_THRESHOLD, DEFAULT_CPS_THRESHOLD))
+
+        self.render_fps = int(self.settings.value(SETTINGS_RENDER_FPS, DEFAULT_RENDER_FPS))
+        self.ingestion_monitor = IngestionMonitor(
+            max_lag_ms=int(self.settings.value(SETTINGS_MAX_INGESTION_LAG_MS, DEFAULT_MAX_INGESTION_LAG_MS)),
+            max_backlog=int(self.settings.value(SETTINGS_MAX_QUEUE_BACKLOG, DEFAULT_MAX_QUEUE_BACKLOG)),
+            max_batch_ms=int(self.settings.value(SETTINGS_MAX_BATCH_PROCESSING_MS, DEFAULT_MAX_BATCH_PROCESSING_MS)),
+        )
+        self.display_decimation_scale = 1
         
         self.write_data = self.settings.value(
             SETTINGS_WRITE_DATA, DEFAULT_WRITE_DATA
         ) in ["true", True]
         
+        self.analysis_copy_format = self.settings.value(
+            SETTINGS_ANALYSIS_COPY_FORMAT, DEFAULT_ANALYSIS_COPY_FORMAT
+        )
         time_tagger = self.settings.value(SETTINGS_TIME_TAGGER, DEFAULT_TIME_TAGGER)
         self.time_tagger = time_tagger == "true" or time_tagger == True
         
@@ -123,18 +143,53 @@ class PhotonsTracingWindow(QMainWindow):
         self.warning_box = None
         self.test_mode = False
         self.cps_ch = {}
-        self.cps_counts = {}
+        self.cps_engine = None
         self.cps_widgets_animation = {}
         self.cps_charts_widgets = []
         self.intensity_charts = []
         self.intensity_charts_wrappers = []
         self.only_cps_widgets = []
         self.intensity_lines = {}
+        self.trace_store = None
+        self.last_time_ns = None
         self.acquisition_time_countdown_widgets = {}
 
-        self.pull_from_queue_timer = QTimer()
-        self.pull_from_queue_timer.timeout.connect(
-            partial(IntensityTracing.pull_from_queue, self)
+        self.queue_consumer = None
+        # Stopped consumers kept alive until their thread returns
+        self.stopping_queue_consumers = []
+        self.acquisition_lock = threading.Lock()
+        # Live batches consumers (file writers, stats, custom analysis)
+        self.sink_pipeline = SinkPipeline()
+        self.stats_sink = self.sink_pipeline.attach(StatsSink())
+        self.npy_sink = None
+        if self.settings.value(SETTINGS_NPY_SINK_ENABLED, DEFAULT_NPY_SINK_ENABLED) in ["true", True]:
+            self.npy_sink = self.sink_pipeline.attach(NpyFileWriterSink())
+        self.shared_trace_publisher = None
+        if self.settings.value(SETTINGS_SHARED_TRACE_ENABLED, DEFAULT_SHARED_TRACE_ENABLED) in ["true", True]:
+            self.shared_trace_publisher = self.sink_pipeline.attach(
+                SharedTracePublisher(
+                    shm_name=self.settings.value(SETTINGS_SHARED_TRACE_NAME, DEFAULT_SHARED_TRACE_NAME),
+                    seconds=float(self.settings.value(SETTINGS_SHARED_TRACE_SECONDS, DEFAULT_SHARED_TRACE_SECONDS)),
+                )
+            )
+        self.render_scheduler = RenderScheduler(
+            partial(IntensityTracing.render_frame, self), self.render_fps
+        )
+        # Reader plots follow the visible interval
+        self.reader_view = ReaderViewRefresher(self)
+        # Recently decoded recordings, reopened without decoding again
+        spill_enabled = self.settings.value(SETTINGS_DECODED_CACHE_SPILL, DEFAULT_DECODED_CACHE_SPILL) in ["true", True]
+        self.decoded_cache = DecodedCache(
+            max_bytes=int(self.settings.value(SETTINGS_DECODED_CACHE_MB, DEFAULT_DECODED_CACHE_MB)) * 1024 * 1024,
+            spill_dir=DECODED_CACHE_DIR if spill_enabled else None,
+            spill_max_bytes=int(self.settings.value(SETTINGS_DECODED_CACHE_SPILL_MB, DEFAULT_DECODED_CACHE_SPILL_MB)) * 1024 * 1024,
+        )
+        # Worker processes decoding large recordings on several cores
+        self.decode_pool = DecodePool()
+        self.ingestion_monitor_timer = QTimer()
+        self.ingestion_monitor_timer.setInterval(INGESTION_MONITOR_INTERVAL_MS)
+        self.ingestion_monitor_timer.timeout.connect(
+            partial(IntensityTracing.check_ingestion, self)
         )
         self.overlay = LogoOverlay(self)
         self.installEventFilter(self)
@@ -269,6 +324,14 @@ class PhotonsTracingWindow(QMainWindow):
             self.widgets[READER_POPUP].close()        
         if READER_METADATA_POPUP in self.widgets:
             self.widgets[READER_METADATA_POPUP].close()                   
+        IntensityTracing.stop_queue_consumer(self)
+        # The application must not quit under a running QThread
+        for worker in list(self.stopping_queue_consumers):
+            worker.wait()
+        self.sink_pipeline.stop(timeout=None)
+        if self.shared_trace_publisher is not None:
+            self.shared_trace_publisher.release()
+        self.decode_pool.shutdown()
         event.accept()
 
     def eventFilter(self, source, event):
@@ -291,6 +354,8 @@ class PhotonsTracingWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    # Parallel file decoding spawns worker processes (also from the frozen exe)
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     window = PhotonsTracingWindow()
@@ -0,0 +1,52 @@
+import json
+import os
+import struct
+import sys
+import types
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from flim_labs import flim_labs
+except ImportError:
+    # The acquisition library is only needed to talk to the card,
+    # the tests feed the workers through their callbacks
+    flim_labs = types.ModuleType("flim_labs")
+    flim_labs.flim_labs = flim_labs
+    sys.modules["flim_labs"] = flim_labs
+
+
+def write_it02(path, channels, n_records, bin_width_micros=10, seed=0, marker=True):
+    # Random IT02 recording: skipped bins, zero counts and the acquisition time marker
+    rng = np.random.default_rng(seed)
+    metadata = {
+        "channels": channels,
+        "bin_width_micros": bin_width_micros,
+        "acquisition_time_millis": None,
+        "channel_names": {},
+    }
+    header = json.dumps(metadata).encode("utf-8")
+    data = bytearray(b"IT02" + struct.pack("<I", len(header)) + header)
+    bins = np.cumsum(1 + (rng.random(n_records) < 0.1))
+    counts = np.where(
+        rng.random((n_records, len(channels))) < 0.5, 0, rng.integers(1, 1000, (n_records, len(channels)))
+    )
+    for bin_index, record in zip(bins, counts):
+        mask = sum(1 << k for k, count in enumerate(record) if count)
+        data += struct.pack("<dB", float(bin_index * bin_width_micros * 1000), mask)
+        data += b"".join(struct.pack("<I", count) for count in record if count)
+    if marker:
+        data += struct.pack("<dB", float((bins[-1] + 1) * bin_width_micros * 1000), 0)
+    with open(path, "wb") as file:
+        file.write(bytes(data))
+    return bins * bin_width_micros * 1000, counts
+
+
+@pytest.fixture
+def it02_file(tmp_path):
+    path = str(tmp_path / "intensity-tracing_test.bin")
+    times_ns, counts = write_it02(path, [0, 2, 5], 20_000)
+    return path, times_ns, counts
@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+import pytest
+
+from gui_components.analysis_export import export_recording
+from gui_components.it02_reader import IT02_INDEX_SUFFIX
+
+
+@pytest.mark.parametrize("export_format", ["npz", "npy"])
+def test_export_streams_every_record_without_an_index_sidecar(it02_file, export_format):
+    path, times_ns, counts = it02_file
+    output_file_name = export_recording(path, export_format, chunk_records=3000)
+    assert not os.path.exists(path + IT02_INDEX_SUFFIX)
+    if export_format == "npz":
+        with np.load(output_file_name) as archive:
+            np.testing.assert_array_equal(archive["time_ns"], times_ns)
+            np.testing.assert_array_equal(archive["channel_3"], counts[:, 1])
+    else:
+        records = np.load(output_file_name)
+        np.testing.assert_array_equal(records["time_ns"], times_ns)
+        np.testing.assert_array_equal(records["channel_6"], counts[:, 2])
+
+
+def test_parquet_export(it02_file):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path, times_ns, counts = it02_file
+    table = pq.read_table(export_recording(path, "parquet", chunk_records=3000))
+    np.testing.assert_array_equal(table.column("time_ns").to_numpy(), times_ns)
+    np.testing.assert_array_equal(table.column("channel_1").to_numpy(), counts[:, 0])
@@ -0,0 +1,90 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from conftest import write_it02
+from gui_components.batch_conversion import (
+    BATCH_MANIFEST_NAME,
+    ITT1_MAGIC,
+    ITT1_RECORD_DTYPE,
+    read_manifest,
+    run_batch,
+    summarize_it02,
+)
+from gui_components.it02_reader import IT02Reader
+from gui_components.it03_reader import open_reader
+
+
+def write_itt1(path, events, times_ns):
+    header = json.dumps({"channels": [0, 1], "laser_period_ns": 12.5}).encode("utf-8")
+    records = np.empty(len(events), dtype=ITT1_RECORD_DTYPE)
+    records["event"] = events
+    records["time_ns"] = times_ns
+    with open(path, "wb") as file:
+        file.write(ITT1_MAGIC + struct.pack("<I", len(header)) + header + records.tobytes())
+
+
+def read_all(reader):
+    times_ns = np.concatenate([times_ns for times_ns, _ in reader.iter_chunks()])
+    counts = np.concatenate([counts for _, counts in reader.iter_chunks()], axis=1)
+    return times_ns, counts
+
+
+def make_folder(tmp_path):
+    root = tmp_path / "data"
+    (root / "day2").mkdir(parents=True)
+    write_it02(str(root / "a.bin"), [0, 3], 5000, seed=1)
+    write_it02(str(root / "day2" / "b.bin"), [1], 3000, seed=2)
+    write_itt1(str(root / "day2" / "tagger.bin"), [0, 1, 80, 0], [10.0, 20.0, 30.0, 40.0])
+    (root / "notes.bin").write_bytes(b"not a recording")
+    return str(root)
+
+
+def test_it03_batch_round_trip_and_resume(tmp_path):
+    root = make_folder(tmp_path)
+    output_dir = str(tmp_path / "out")
+    logs = []
+    totals = run_batch([root], "it03", output_dir=output_dir, workers=2, log=logs.append)
+    # Time tagger files have no IT03 conversion
+    assert totals == {"done": 2, "skipped": 0, "error": 0, "unsupported": 1}
+    for name in ("a", os.path.join("day2", "b")):
+        source = IT02Reader(os.path.join(root, name + ".bin"))
+        converted = open_reader(os.path.join(output_dir, name + ".it03.bin"))
+        assert converted.metadata == source.metadata
+        for expected, actual in zip(read_all(source), read_all(converted)):
+            np.testing.assert_array_equal(actual, expected)
+        assert converted.final_time_marker == source.final_time_marker
+
+    manifest = read_manifest(os.path.join(output_dir, BATCH_MANIFEST_NAME))
+    assert {entry["status"] for entry in manifest.values()} == {"done", "unsupported"}
+    # Nothing left to do, unless the source changed or force is set
+    assert run_batch([root], "it03", output_dir=output_dir, log=logs.append)["skipped"] == 3
+    write_it02(os.path.join(root, "a.bin"), [0, 3], 4000, seed=3)
+    assert run_batch([root], "it03", output_dir=output_dir, log=logs.append)["done"] == 1
+    assert run_batch([root], "it03", output_dir=output_dir, force=True, log=logs.append)["done"] == 2
+
+
+def test_summary_batch(tmp_path):
+    root = make_folder(tmp_path)
+    totals = run_batch([root], "summary", workers=1, log=lambda message: None)
+    assert totals["done"] == 3
+    manifest = read_manifest(os.path.join(root, BATCH_MANIFEST_NAME))
+    summaries = {os.path.basename(source): entry["summary"] for (source, _), entry in manifest.items()}
+    assert summaries["tagger.bin"]["events"] == {"channel_1": 2, "channel_2": 1, "pixel": 1}
+    times_ns, counts = write_it02(str(tmp_path / "c.bin"), [1], 3000, seed=2)
+    assert summaries["b.bin"] == summarize_it02(str(tmp_path / "c.bin"))
+    assert summaries["b.bin"]["records"] == 3000
+    assert summaries["b.bin"]["total_counts"] == [int(counts.sum())]
+
+
+def test_failed_files_are_recorded_and_retried(tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    (root / "broken.bin").write_bytes(b"IT02" + struct.pack("<I", 100) + b"{")
+    totals = run_batch([str(root)], "npz", log=lambda message: None)
+    assert totals["error"] == 1
+    assert not os.path.exists(root / "broken.npz.tmp")
+    # Errors are not final: the next run tries again
+    assert run_batch([str(root)], "npz", log=lambda message: None)["error"] == 1
@@ -0,0 +1,46 @@
+import numpy as np
+
+from gui_components.cps_engine import CPSEngine
+
+
+def batch(times_ns, channel_counts):
+    counts = np.zeros((len(times_ns), 8), dtype=np.uint32)
+    for channel, values in channel_counts.items():
+        counts[:, channel] = values
+    return np.array(times_ns, dtype=np.float64), counts
+
+
+def test_first_sample_only_opens_the_window():
+    engine = CPSEngine([2, 0], window_ns=1_000_000_000)
+    engine.update(*batch([0], {0: [100]}))
+    assert engine.snapshot() is None
+    engine.update(*batch([500_000_000], {0: [50], 2: [3]}))
+    assert engine.value(0) == 100
+    assert engine.value(2) == 6
+    np.testing.assert_array_equal(engine.snapshot(), [100, 6])
+    assert engine.snapshot() is None
+
+
+def test_old_batches_leave_the_window():
+    engine = CPSEngine([0], window_ns=1_000_000_000)
+    engine.update(*batch([0, 500_000_000], {0: [100, 50]}))
+    engine.update(*batch([1_000_000_000, 2_000_000_000], {0: [10, 20]}))
+    # The first batch is evicted, the window starts at its last sample
+    assert engine.value(0) == 30 / 1.5
+    assert len(engine.batches) == 1
+
+
+def test_a_single_batch_older_than_the_window_is_kept():
+    engine = CPSEngine([0], window_ns=1_000)
+    engine.update(*batch([0, 1_000_000_000], {0: [0, 40]}))
+    assert engine.value(0) == 40
+
+
+def test_threshold_and_reset():
+    engine = CPSEngine([0, 1])
+    engine.update(*batch([0, 1_000_000_000], {0: [0, 5], 1: [0, 50]}))
+    np.testing.assert_array_equal(engine.above_threshold(10), [False, True])
+    np.testing.assert_array_equal(engine.above_threshold(0), [False, False])
+    engine.reset()
+    np.testing.assert_array_equal(engine.values, [0, 0])
+    assert engine.snapshot() is None
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from gui_components.decoded_cache import DecodedCache
+from gui_components.it02_pyramid import IT02_PYRAMID_SUFFIX, build_pyramid
+from gui_components.it02_reader import IT02_INDEX_SUFFIX, IT02Reader
+from gui_components.it03_reader import IT03Reader, convert_it02_to_it03, open_reader
+from gui_components.read_data import DataReaderWorker, ProcessBinDataWorkerSignals
+
+
+def load(path, cache=None):
+    reader = IT02Reader(path)
+    file_name, reader, pyramid, metadata = DataReaderWorker(path, ProcessBinDataWorkerSignals(), cache).load(reader)
+    assert file_name == path
+    return reader, pyramid, metadata
+
+
+def test_first_load_is_one_pass_without_decoded_arrays(it02_file, qtbot, monkeypatch):
+    path, times_ns, _ = it02_file
+    expected = build_pyramid(IT02Reader(path))
+    passes = []
+    iter_chunks = IT02Reader.iter_chunks
+    monkeypatch.setattr(
+        IT02Reader, "iter_chunks", lambda self, *args, **kwargs: passes.append(1) or iter_chunks(self, *args, **kwargs)
+    )
+    monkeypatch.setattr(IT02Reader, "read_sparse", None)
+
+    reader, pyramid, metadata = load(path)
+    assert passes == [1]
+    assert reader.index_complete
+    assert metadata["channels"] == [0, 2, 5]
+    np.testing.assert_array_equal(pyramid.levels[0]["max"], expected.levels[0]["max"])
+    assert os.path.exists(path + IT02_INDEX_SUFFIX)
+    assert os.path.exists(path + IT02_PYRAMID_SUFFIX)
+
+    # Sidecars answer the next load
+    reader, pyramid, _ = load(path)
+    assert passes == [1]
+    assert reader.index_complete
+    assert pyramid.total_bins == expected.total_bins
+
+
+def test_cached_load_restores_the_index(it02_file, qtbot):
+    path, times_ns, _ = it02_file
+    cache = DecodedCache(max_bytes=1 << 30)
+    load(path, cache)
+    os.remove(path + IT02_INDEX_SUFFIX)
+    os.remove(path + IT02_PYRAMID_SUFFIX)
+    reader, pyramid, _ = load(path, cache)
+    assert cache.get_stats()["hits"] == 1
+    assert reader.index_complete
+    assert not os.path.exists(path + IT02_INDEX_SUFFIX)
+    np.testing.assert_array_equal(reader.read_range(times_ns[10], times_ns[20])[0], times_ns[10:21])
+
+
+def test_it03_container_loads_from_its_footer_index(it02_file, qtbot):
+    path, times_ns, _ = it02_file
+    it03_path = convert_it02_to_it03(path)
+    expected = build_pyramid(IT02Reader(path))
+    reader = open_reader(it03_path)
+    _, reader, pyramid, metadata = DataReaderWorker(it03_path, ProcessBinDataWorkerSignals(), None).load(reader)
+    assert isinstance(reader, IT03Reader)
+    assert not os.path.exists(it03_path + IT02_INDEX_SUFFIX)
+    np.testing.assert_array_equal(pyramid.levels[0]["max"], expected.levels[0]["max"])
+    np.testing.assert_array_equal(reader.read_range(times_ns[10], times_ns[20])[0], times_ns[10:21])
@@ -0,0 +1,28 @@
+import numpy as np
+
+from gui_components.data_sinks import NpyFileWriterSink, SinkPipeline, StatsSink
+
+
+def test_stats_and_npy_sinks(tmp_path):
+    pipeline = SinkPipeline()
+    stats_sink = pipeline.attach(StatsSink())
+    npy_sink = pipeline.attach(NpyFileWriterSink(str(tmp_path)))
+    pipeline.start({"channels": [0, 2]})
+    times_ns = np.arange(0, 2_000_000_000, 500_000_000, dtype=np.float64)
+    counts = np.tile(np.arange(8, dtype=np.float64), (len(times_ns), 1))
+    pipeline.publish(times_ns[:2], counts[:2])
+    pipeline.publish(times_ns[2:], counts[2:])
+    pipeline.stop(timeout=None)
+
+    assert pipeline.wait(stats_sink, 0)
+    summary = stats_sink.get_summary()
+    assert summary["records"] == 4
+    assert summary["duration_s"] == 1.5
+    assert summary["total_counts"] == {0: 0, 2: 8}
+    assert summary["mean_cps"][2] == 8 / 1.5
+
+    rows = np.load(npy_sink.file_path, mmap_mode="r")
+    assert rows.shape == (4, 3)
+    np.testing.assert_array_equal(rows[:, 0], times_ns)
+    np.testing.assert_array_equal(rows[:, 2], [2, 2, 2, 2])
+    assert all(stats["batches_dropped"] == 0 and stats["errors"] == 0 for stats in pipeline.get_stats())
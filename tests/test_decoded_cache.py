@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from gui_components.decoded_cache import DecodedCache, cache_key
+from gui_components.it02_pyramid import build_pyramid
+from gui_components.it02_reader import IT02Reader
+
+
+def test_evicted_entries_come_back_from_the_spill(it02_file, tmp_path):
+    path, times_ns, _ = it02_file
+    reader = IT02Reader(path)
+    pyramid = build_pyramid(reader)
+    spill_dir = str(tmp_path / "spill")
+    # Nothing fits in memory: every entry goes straight to the spill directory
+    cache = DecodedCache(max_bytes=0, spill_dir=spill_dir, spill_max_bytes=1 << 30)
+    key = cache_key(path)
+    cache.put(key, reader.metadata, reader.index_state(), pyramid)
+    assert len(os.listdir(spill_dir)) == 1
+
+    metadata, index_state, spilled_pyramid = cache.get(key)
+    assert metadata == reader.metadata
+    assert cache.get_stats()["spill_hits"] == 1
+    np.testing.assert_array_equal(spilled_pyramid.levels[0]["max"], pyramid.levels[0]["max"])
+
+    restored = IT02Reader(path)
+    restored.restore_index(index_state)
+    assert restored.index_complete
+    assert restored.index_offsets == reader.index_offsets
+    np.testing.assert_array_equal(restored.read_range(times_ns[100], times_ns[200])[0], times_ns[100:201])
+
+
+def test_least_recently_used_entry_is_evicted(it02_file):
+    path, _, _ = it02_file
+    reader = IT02Reader(path)
+    pyramid = build_pyramid(reader)
+    entry_bytes = pyramid.nbytes + reader.index_state()["offsets"].nbytes + reader.index_state()["times"].nbytes
+    cache = DecodedCache(max_bytes=2 * entry_bytes)
+    for key in ("a", "b", "c"):
+        cache.put(key, reader.metadata, reader.index_state(), pyramid)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from gui_components import file_finalize
+from gui_components.data_export_controls import FinalizeFilesTask, FinalizeFilesWorkerSignals
+from gui_components.file_checksum import read_checksum, verify_file, write_checksum, new_hasher
+from verify_checksums import find_checked_files
+
+
+@pytest.fixture
+def saved(it02_file, tmp_path):
+    path, _, _ = it02_file
+    saved_dir = tmp_path / "saved"
+    saved_dir.mkdir()
+    return path, str(saved_dir / "acquisition.bin")
+
+
+def finalize_files(qtbot, transfers, rehash=False):
+    signals = FinalizeFilesWorkerSignals()
+    errors = []
+    signals.error.connect(errors.append)
+    with qtbot.waitSignal(signals.success, timeout=5000) as blocker:
+        FinalizeFilesTask(transfers, signals, rehash).run()
+    assert errors == []
+    return blocker.args[0]
+
+
+def test_copied_file_is_hashed_while_written(saved, qtbot, monkeypatch):
+    source, destination = saved
+    monkeypatch.setattr(os, "link", lambda *args: (_ for _ in ()).throw(OSError()))
+    monkeypatch.setattr(file_finalize, "clone_file", lambda *args: False)
+    monkeypatch.setattr(file_finalize, "copy_range", lambda *args: 0)
+    assert finalize_files(qtbot, [(source, destination)]) == ["copy"]
+    manifest = read_checksum(destination)
+    assert manifest["method"] == "copy"
+    assert manifest["format"] == "IT02"
+    assert manifest["metadata"]["channels"] == [0, 2, 5]
+    assert manifest["digest"] == new_hasher().__class__(open(source, "rb").read()).hexdigest()
+    assert verify_file(destination)[0] == "ok"
+
+    with open(destination, "r+b") as file:
+        file.seek(100)
+        file.write(b"\xff")
+    assert verify_file(destination) == ("mismatch", "blake2b digest differs")
+
+
+def test_linked_file_gets_a_sidecar_without_digest(saved, qtbot):
+    source, destination = saved
+    assert finalize_files(qtbot, [(source, destination)]) == ["hardlink"]
+    manifest = read_checksum(destination)
+    assert manifest["digest"] is None
+    assert manifest["size"] == os.path.getsize(source)
+    status, detail = verify_file(destination)
+    assert status == "unchanged"
+    assert "hardlink" in detail
+    os.utime(destination, ns=(0, 0))
+    assert verify_file(destination)[0] == "mismatch"
+
+
+def test_rehash_reads_linked_files_once(saved, qtbot):
+    source, destination = saved
+    assert finalize_files(qtbot, [(source, destination)], rehash=True) == ["hardlink"]
+    assert read_checksum(destination)["digest"] is not None
+    assert verify_file(destination)[0] == "ok"
+
+
+def test_verify_missing_files_and_folders(saved, tmp_path):
+    source, destination = saved
+    assert verify_file(destination) == ("missing", "file not found")
+    with open(destination, "wb") as file:
+        file.write(b"data")
+    assert verify_file(destination) == ("missing", "no checksum sidecar")
+    write_checksum(destination, new_hasher())
+    assert verify_file(destination)[0] == "mismatch"
+    assert verify_file(destination, quick=True)[0] == "unchanged"
+    assert list(find_checked_files([str(tmp_path)])) == [destination]
@@ -0,0 +1,167 @@
+import hashlib
+import os
+
+import pytest
+
+from gui_components import file_finalize
+from gui_components.file_finalize import finalize_file
+from gui_components.load_progress import LoadProgress
+
+CONTENT = os.urandom(3 * 1024 * 1024 + 123)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "data" / "intensity-tracing.bin"
+    path.parent.mkdir()
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@pytest.fixture
+def no_link(monkeypatch):
+    def link(source, destination):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(os, "link", link)
+
+
+@pytest.fixture
+def no_clone(monkeypatch):
+    monkeypatch.setattr(file_finalize, "clone_file", lambda source_file, destination_file: False)
+
+
+@pytest.fixture
+def no_copy_range(monkeypatch):
+    def copy_file_range(*args):
+        raise OSError("not supported")
+
+    monkeypatch.setattr(os, "copy_file_range", copy_file_range, raising=False)
+
+
+@pytest.fixture
+def cross_device(monkeypatch):
+    # os.replace only works for the temporary file next to the destination
+    replace = os.replace
+
+    def cross_device_replace(source, destination):
+        if not source.endswith(".tmp"):
+            raise OSError("cross-device rename")
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", cross_device_replace)
+
+
+def finalize(source, destination, **kwargs):
+    progress = LoadProgress(len(CONTENT))
+    method = finalize_file(source, destination, progress=progress, **kwargs)
+    assert progress.done_bytes == len(CONTENT)
+    with open(destination, "rb") as file:
+        assert file.read() == CONTENT
+    assert not os.path.exists(destination + ".tmp")
+    return method
+
+
+def test_move_renames_the_file(source, tmp_path):
+    destination = str(tmp_path / "saved.bin")
+    assert finalize(source, destination, move=True) == "replace"
+    assert not os.path.exists(source)
+
+
+def test_move_to_another_volume_links_or_copies(source, tmp_path, cross_device):
+    destination = str(tmp_path / "saved.bin")
+    assert finalize(source, destination, move=True) == "hardlink"
+    assert not os.path.exists(source)
+
+
+def test_copy_is_a_hardlink_on_the_same_volume(source, tmp_path):
+    destination = str(tmp_path / "saved.bin")
+    assert finalize(source, destination) == "hardlink"
+    assert os.path.samefile(source, destination)
+
+
+def test_reflink_clone(source, tmp_path, no_link, monkeypatch):
+    def clone_file(source_file, destination_file):
+        destination_file.write(source_file.read())
+        destination_file.flush()
+        return True
+
+    monkeypatch.setattr(file_finalize, "clone_file", clone_file)
+    assert finalize(source, str(tmp_path / "saved.bin")) == "reflink"
+
+
+@pytest.mark.skipif(not hasattr(os, "copy_file_range"), reason="no os.copy_file_range")
+def test_copy_file_range(source, tmp_path, no_link, no_clone):
+    assert finalize(source, str(tmp_path / "saved.bin")) == "copy_file_range"
+
+
+def test_chunked_copy(source, tmp_path, no_link, no_clone, no_copy_range):
+    destination = str(tmp_path / "saved.bin")
+    assert finalize(source, destination) == "copy"
+    assert os.path.exists(source)
+
+
+@pytest.mark.parametrize("tier", ["replace", "hardlink", "reflink", "copy_file_range"])
+def test_files_put_in_place_by_the_file_system_are_not_read(source, tmp_path, request, monkeypatch, tier):
+    if tier not in ("replace", "hardlink"):
+        request.getfixturevalue("no_link")
+    if tier == "reflink":
+        monkeypatch.setattr(file_finalize, "clone_file", lambda source_file, destination_file: True)
+    else:
+        request.getfixturevalue("no_clone")
+    if tier == "copy_file_range" and not hasattr(os, "copy_file_range"):
+        pytest.skip("no os.copy_file_range")
+
+    def hash_file(*args):
+        raise AssertionError("the file was read again")
+
+    monkeypatch.setattr(file_finalize, "hash_file", hash_file)
+    hasher = hashlib.blake2b()
+    destination = str(tmp_path / "saved.bin")
+    assert finalize_file(source, destination, move=tier == "replace", hasher=hasher) == tier
+    assert hasher.hexdigest() == hashlib.blake2b().hexdigest()
+
+
+@pytest.mark.parametrize("tier", ["hardlink", "copy_file_range", "copy"])
+def test_hasher_receives_the_destination_content(source, tmp_path, request, tier):
+    if tier != "hardlink":
+        request.getfixturevalue("no_link")
+        request.getfixturevalue("no_clone")
+    if tier == "copy_file_range" and not hasattr(os, "copy_file_range"):
+        pytest.skip("no os.copy_file_range")
+    if tier == "copy":
+        request.getfixturevalue("no_copy_range")
+    hasher = hashlib.blake2b()
+    # The chunked copy hashes what it writes, the other tiers need rehash
+    assert finalize(source, str(tmp_path / "saved.bin"), hasher=hasher, rehash=tier != "copy") == tier
+    assert hasher.hexdigest() == hashlib.blake2b(CONTENT).hexdigest()
+
+
+def test_partial_copy_file_range_is_completed_and_hashed(source, tmp_path, no_link, no_clone, monkeypatch):
+    def copy_range(source_file, destination_file, size, progress):
+        destination_file.write(source_file.read(1000))
+        source_file.seek(0)
+        return 1000
+
+    monkeypatch.setattr(file_finalize, "copy_range", copy_range)
+    hasher = hashlib.blake2b()
+    destination = str(tmp_path / "saved.bin")
+    assert finalize_file(source, destination, hasher=hasher) == "copy"
+    assert open(destination, "rb").read() == CONTENT
+    assert hasher.hexdigest() == hashlib.blake2b(CONTENT).hexdigest()
+
+
+def test_failed_copy_leaves_no_temporary_file(
+    source, tmp_path, cross_device, no_link, no_clone, no_copy_range, monkeypatch
+):
+    def copy_chunks(source_file, destination_file, start, progress, hasher=None):
+        destination_file.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_finalize, "copy_chunks", copy_chunks)
+    destination = str(tmp_path / "saved.bin")
+    with pytest.raises(OSError):
+        finalize_file(source, destination, move=True)
+    assert os.listdir(tmp_path) == ["data"]
+    # A failed move keeps the source
+    assert open(source, "rb").read() == CONTENT
@@ -0,0 +1,83 @@
+import argparse
+import os
+import signal
+import types
+
+import numpy as np
+import pytest
+
+import headless_acquisition
+from headless_acquisition import (
+    AcquisitionStats,
+    move_data_file,
+    parse_args,
+    parse_channels,
+    run_acquisition,
+)
+
+
+def test_parse_channels():
+    assert parse_channels("3,1, 3") == [0, 2]
+    for value in ("", "0", "9"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_channels(value)
+
+
+def test_parse_args():
+    args = parse_args(["--channels", "1,2", "--firmware", "SMA", "--duration", "2"])
+    assert args.channels == [0, 1]
+    assert args.firmware == "intensity_tracing_sma.flim"
+    for argv in (["--bin-width", "0"], ["--duration", "-1"], ["--output", "x", "--no-write"]):
+        with pytest.raises(SystemExit):
+            parse_args(argv)
+
+
+def test_run_acquisition_drains_until_the_end_entry(monkeypatch):
+    pulls = [
+        [((0,), (1, 0, 2, 0, 0, 0, 0, 0)), ((1_000_000_000,), (10, 0, 20, 0, 0, 0, 0, 0))],
+        [],
+        [((2_000_000_000,), (30, 0, 40, 0, 0, 0, 0, 0)), ("end",)],
+    ]
+    flim_labs = headless_acquisition.flim_labs
+    started = {}
+    monkeypatch.setattr(
+        flim_labs,
+        "start_intensity_tracing",
+        lambda **kwargs: started.update(kwargs) or types.SimpleNamespace(data_file="data.bin"),
+        raising=False,
+    )
+    monkeypatch.setattr(flim_labs, "pull_from_queue", lambda: pulls.pop(0) if pulls else [], raising=False)
+    monkeypatch.setattr(signal, "signal", lambda *args: None)
+
+    args = parse_args(["--channels", "1,3", "--duration", "2", "--summary-interval", "1000"])
+    result = run_acquisition(args)
+    assert result.data_file == "data.bin"
+    assert started["enabled_channels"] == [0, 2]
+    assert started["acquisition_time_millis"] == 2000
+    assert pulls == []
+
+
+def test_acquisition_stats():
+    stats = AcquisitionStats([0, 2])
+    counts = np.zeros((3, 8), dtype=np.uint32)
+    counts[:, 0] = [1, 10, 30]
+    counts[:, 2] = [2, 20, 40]
+    stats.update(np.array([0.0, 1e9, 2e9]), counts)
+    np.testing.assert_array_equal(stats.total_counts, [41, 62])
+    assert stats.entries == 3
+    assert stats.last_time_ns == 2e9
+    report = stats.final_report()
+    assert "Ch1: total counts=41" in report
+    assert "Ch3: total counts=62" in report
+
+
+def test_move_data_file(tmp_path):
+    data_file = tmp_path / "intensity-tracing.bin"
+    data_file.write_bytes(b"IT02data")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    output = move_data_file(str(data_file), str(output_dir))
+    assert output == os.path.join(str(output_dir), "intensity-tracing.bin")
+    assert open(output, "rb").read() == b"IT02data"
+    assert not data_file.exists()
+    assert move_data_file(str(data_file), str(output_dir)) is None
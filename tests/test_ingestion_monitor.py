@@ -0,0 +1,40 @@
+import time
+
+from gui_components.ingestion_monitor import (
+    DEGRADATION_COARSE_DECIMATION,
+    DEGRADATION_NORMAL,
+    HEALTHY_CHECKS_TO_RECOVER,
+    OVERLOAD_CHECKS_TO_DEGRADE,
+    IngestionMonitor,
+)
+
+
+def record(monitor, capped, pending_entries):
+    monitor.record_batch(time.perf_counter_ns(), 0.001, capped, pending_entries)
+
+
+def test_large_batches_without_backlog_stay_normal():
+    # Drains emptying the queue never degrade the display, however many entries they carry
+    monitor = IngestionMonitor(max_backlog=5000)
+    for _ in range(OVERLOAD_CHECKS_TO_DEGRADE + 1):
+        record(monitor, False, 0)
+        assert monitor.check() == DEGRADATION_NORMAL
+    assert monitor.get_status_text().startswith("Queue: caught up |")
+
+
+def test_pending_entries_degrade_and_recover():
+    monitor = IngestionMonitor(max_backlog=5000)
+    for pending_entries in range(OVERLOAD_CHECKS_TO_DEGRADE):
+        record(monitor, True, 80_000 * (pending_entries + 1))
+        level = monitor.check()
+    assert level == DEGRADATION_COARSE_DECIMATION
+    assert "160000 entries pending, pull cap hit 1x" in monitor.get_status_text()
+
+    # A capped drain with a small backlog is not healthy yet
+    for _ in range(HEALTHY_CHECKS_TO_RECOVER):
+        record(monitor, True, 100)
+        assert monitor.check() == DEGRADATION_COARSE_DECIMATION
+    for _ in range(HEALTHY_CHECKS_TO_RECOVER):
+        record(monitor, False, 0)
+        level = monitor.check()
+    assert level == DEGRADATION_NORMAL
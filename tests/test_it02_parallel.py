@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from gui_components.it02_parallel import DecodePool, build_pyramid_parallel, decode_parallel, split_segments
+from gui_components.it02_reader import IT02Reader
+from gui_components.load_progress import LoadCancelled, LoadProgress
+
+
+@pytest.fixture
+def pool():
+    pool = DecodePool(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_segments_are_stitched_back_in_order(it02_file, pool):
+    path, times_ns, counts = it02_file
+    reader = IT02Reader(path, block_bytes=4096)
+    segments = split_segments(reader, pool.max_workers * 4)
+    assert len(segments) > 2
+    whole_times, whole_counts = reader.decode_segment(reader.data_offset, reader.scanned_offset)
+
+    parallel_times, parallel_counts = decode_parallel(reader, pool)
+    # Same records as a single decode_segment(), without the acquisition time marker
+    np.testing.assert_array_equal(parallel_times, whole_times[:-1])
+    np.testing.assert_array_equal(parallel_counts, whole_counts[:, :-1])
+    np.testing.assert_array_equal(parallel_times, times_ns)
+    assert reader.final_time_marker == whole_times[-1]
+
+    parallel_times, parallel_counts = decode_parallel(reader, pool, channels=[5])
+    np.testing.assert_array_equal(parallel_counts[0], counts[:, 2])
+
+
+def test_the_pool_is_kept_between_decodes(it02_file, pool):
+    path, _, _ = it02_file
+    reader = IT02Reader(path, block_bytes=4096)
+    decode_parallel(reader, pool)
+    executor = pool.executor
+    build_pyramid_parallel(reader, pool)
+    assert pool.executor is executor
+    pool.shutdown()
+    assert pool.executor is None
+    decode_parallel(reader, pool)
+    assert pool.executor is not None
+
+
+def test_cancelled_decode(it02_file, pool):
+    path, _, _ = it02_file
+    reader = IT02Reader(path, block_bytes=4096)
+    reader.open_index()
+    progress = LoadProgress(reader.file_size, 1, lambda *args: None)
+    progress.cancel_event.set()
+    with pytest.raises(LoadCancelled):
+        decode_parallel(reader, pool, progress=progress)
@@ -0,0 +1,80 @@
+import numpy as np
+
+from gui_components import it02_pyramid
+from gui_components.it02_parallel import DecodePool, build_pyramid_parallel
+from gui_components.it02_pyramid import PyramidBuilder, build_pyramid
+from gui_components.it02_reader import IT02Reader
+
+
+def reference_level0(times_ns, counts, bin_width_ns, base_bins):
+    # Dense grid from the first to the last record, bins missing from the file are zeros
+    bins = (times_ns / bin_width_ns).astype(np.int64)
+    dense = np.zeros((counts.shape[1], bins[-1] - bins[0] + 1), dtype=np.uint32)
+    dense[:, bins - bins[0]] = counts.T
+    n_buckets = (dense.shape[1] + base_bins - 1) // base_bins
+    # Padding after the last bin is not part of the last bucket
+    padded = np.full((dense.shape[0], n_buckets * base_bins), np.nan)
+    padded[:, : dense.shape[1]] = dense
+    buckets = padded.reshape(dense.shape[0], n_buckets, base_bins)
+    return np.nanmin(buckets, axis=2), np.nanmax(buckets, axis=2), np.nansum(buckets, axis=2)
+
+
+def test_streaming_folds_match_the_dense_grid(it02_file, monkeypatch):
+    path, times_ns, counts = it02_file
+    # Forces several folds of level 0 while streaming
+    monkeypatch.setattr(it02_pyramid, "PYRAMID_MAX_BASE_BUCKETS", 64)
+    reader = IT02Reader(path, block_bytes=4096)
+    pyramid = build_pyramid(reader)
+    assert reader.index_complete
+    assert pyramid.total_bins == int(times_ns[-1] - times_ns[0]) // reader.bin_width_ns + 1
+    assert len(pyramid.levels[0]["count"]) <= 64
+    assert pyramid.base_bins > it02_pyramid.PYRAMID_MIN_BASE_BINS
+
+    level_min, level_max, level_sum = reference_level0(times_ns, counts, reader.bin_width_ns, pyramid.base_bins)
+    np.testing.assert_array_equal(pyramid.levels[0]["min"], level_min)
+    np.testing.assert_array_equal(pyramid.levels[0]["max"], level_max)
+    np.testing.assert_array_equal(pyramid.levels[0]["sum"], level_sum)
+    assert pyramid.levels[0]["count"].sum() == pyramid.total_bins
+    assert len(pyramid.levels[-1]["count"]) == 1
+    assert pyramid.levels[-1]["max"][:, 0].tolist() == counts.max(axis=0).tolist()
+
+
+def assert_same_pyramid(pyramid, expected):
+    assert (pyramid.first_bin_index, pyramid.total_bins, pyramid.base_bins) == (
+        expected.first_bin_index,
+        expected.total_bins,
+        expected.base_bins,
+    )
+    assert len(pyramid.levels) == len(expected.levels)
+    for level, expected_level in zip(pyramid.levels, expected.levels):
+        for key in it02_pyramid.LEVEL_KEYS:
+            np.testing.assert_array_equal(level[key], expected_level[key])
+
+
+def test_chunked_and_whole_builds_agree(it02_file):
+    path, _, _ = it02_file
+    reader = IT02Reader(path)
+    sparse = reader.read_sparse()
+    whole = PyramidBuilder(reader.channels, reader.bin_width_ns)
+    whole.add(sparse.times_ns, sparse.counts)
+    builder = PyramidBuilder(reader.channels, reader.bin_width_ns)
+    for times_ns, counts in reader.iter_chunks(chunk_records=1000):
+        builder.add(times_ns, counts)
+    assert_same_pyramid(builder.finish(), whole.finish())
+
+
+def test_parallel_build_matches_the_streaming_build(it02_file, monkeypatch):
+    path, _, _ = it02_file
+    monkeypatch.setattr(it02_pyramid, "PYRAMID_MAX_BASE_BUCKETS", 64)
+    reader = IT02Reader(path, block_bytes=4096)
+    expected = build_pyramid(reader)
+    assert reader.index_complete
+    pool = DecodePool(max_workers=2)
+    try:
+        assert_same_pyramid(build_pyramid_parallel(reader, pool), expected)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_empty_builder():
+    assert PyramidBuilder([0], 10_000).finish() is None
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+from gui_components.it02_reader import IT02Reader
+
+
+def test_decode_pass_collects_the_index(it02_file):
+    path, times_ns, counts = it02_file
+    scanned = IT02Reader(path, block_bytes=4096)
+    scanned.extend_index()
+
+    reader = IT02Reader(path, block_bytes=4096)
+    assert not reader.open_index(scan=False)
+    sparse = reader.read_sparse()
+    assert reader.index_complete
+    assert reader.index_offsets == scanned.index_offsets
+    assert reader.index_times == scanned.index_times
+    assert reader.scanned_records == scanned.scanned_records == len(times_ns) + 1
+    np.testing.assert_array_equal(sparse.times_ns, times_ns)
+    assert not os.path.exists(reader.index_path())
+
+    assert reader.save_index()
+    loaded = IT02Reader(path)
+    assert loaded.open_index(scan=False)
+    assert loaded.index_offsets == scanned.index_offsets
+
+
+def test_read_range_after_decode(it02_file):
+    path, times_ns, counts = it02_file
+    reader = IT02Reader(path, block_bytes=4096)
+    reader.read_sparse()
+    t0, t1 = times_ns[5000], times_ns[12000]
+    range_times, range_counts = reader.read_range(t0, t1, [2])
+    np.testing.assert_array_equal(range_times, times_ns[5000:12001])
+    np.testing.assert_array_equal(range_counts[0], counts[5000:12001, 1])
+
+
+def test_partial_scan_continues_in_decode(it02_file):
+    path, times_ns, _ = it02_file
+    scanned = IT02Reader(path, block_bytes=4096)
+    scanned.extend_index()
+
+    reader = IT02Reader(path, block_bytes=4096)
+    reader.seek(times_ns[7000])
+    assert not reader.index_complete
+    reader.read_sparse()
+    assert reader.index_complete
+    assert reader.index_offsets == scanned.index_offsets
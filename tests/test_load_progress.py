@@ -0,0 +1,62 @@
+import os
+import threading
+
+import pytest
+
+from gui_components import load_progress
+from gui_components.it02_pyramid import IT02_PYRAMID_SUFFIX
+from gui_components.load_progress import LoadCancelled, LoadProgress, format_eta
+from gui_components.read_data import DataReaderWorker, ProcessBinDataWorkerSignals
+
+
+def test_format_eta():
+    assert format_eta(-1) == "estimating time left..."
+    assert format_eta(0.4) == "0s left"
+    assert format_eta(59.6) == "1m 00s left"
+    assert format_eta(125) == "2m 05s left"
+
+
+def test_progress_over_passes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(load_progress.time, "monotonic", lambda: now[0])
+    reports = []
+    progress = LoadProgress(1000, passes=2, callback=lambda *args: reports.append(args))
+    assert progress.eta() == -1.0
+    now[0] = 101.0
+    progress.advance(500)
+    assert reports == [(500.0, 2000.0, 3.0)]
+    # Reports are throttled
+    progress.advance(100)
+    assert len(reports) == 1
+    # A pass never runs into the next one, finish_pass rounds up to its end
+    progress.advance(10_000)
+    assert progress.done_bytes == 1000
+    progress.finish_pass()
+    assert progress.done_bytes == 1000
+    progress.skip_pass()
+    assert progress.total_bytes == 1000
+    assert progress.eta() == 0
+
+
+def test_cancel_stops_the_next_step():
+    cancel_event = threading.Event()
+    progress = LoadProgress(1000, cancel_event=cancel_event)
+    progress.advance(10)
+    cancel_event.set()
+    assert progress.cancelled
+    for step in (lambda: progress.advance(10), progress.finish_pass, progress.check):
+        with pytest.raises(LoadCancelled):
+            step()
+
+
+def test_cancelled_reader_load_emits_cancelled(it02_file, qtbot):
+    path, _, _ = it02_file
+    signals = ProcessBinDataWorkerSignals()
+    worker = DataReaderWorker(path, signals)
+    results = []
+    signals.success.connect(results.append)
+    signals.progress.connect(lambda *args: worker.cancel())
+    with qtbot.waitSignal(signals.cancelled, timeout=5000):
+        worker.run()
+    assert results == []
+    assert not os.path.exists(path + IT02_PYRAMID_SUFFIX)
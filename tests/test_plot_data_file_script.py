@@ -0,0 +1,83 @@
+import os
+
+import matplotlib
+import numpy as np
+from conftest import write_it02
+from gui_components.it02_reader import IT02Reader
+
+matplotlib.use("Agg")
+
+SCRIPT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "export_data_scripts", "plot_data_file.py"
+)
+
+
+def run_script(file_name, monkeypatch):
+    # Runs the exported script the way ScriptFileUtils writes it, returns its globals
+    import matplotlib.pyplot as plt
+
+    monkeypatch.setattr(plt, "show", lambda: None)
+    with open(SCRIPT_PATH, encoding="utf-8") as file:
+        source = file.read().replace("<FILE-PATH>", file_name).replace("<CHANNEL-NAMES>", "{}")
+    namespace = {"__name__": "__main__"}
+    exec(compile(source, SCRIPT_PATH, "exec"), namespace)
+    plt.close("all")
+    return namespace
+
+
+def dense_lines(times_ns, counts, bin_width_ns):
+    bins = (times_ns / bin_width_ns).astype(np.int64)
+    lines = np.zeros((counts.shape[1], bins[-1] - bins[0] + 1), dtype=np.uint32)
+    lines[:, bins - bins[0]] = counts.T
+    return bins[0], lines
+
+
+def test_script_chunks_match_the_reader(it02_file, monkeypatch):
+    path, _, _ = it02_file
+    script = run_script(path, monkeypatch)
+    reader = IT02Reader(path)
+    expected_times = np.concatenate([times_ns for times_ns, _ in reader.iter_chunks()])
+    expected_counts = np.concatenate([counts for _, counts in reader.iter_chunks()], axis=1)
+    with open(path, "rb") as file:
+        file.seek(reader.data_offset)
+        # Small reads: records are split across chunk boundaries
+        chunks = list(script["iter_chunks"](file, 3, chunk_bytes=1000))
+    times_ns = np.concatenate([times_ns for times_ns, _ in chunks])
+    counts = np.concatenate([counts for _, counts in chunks], axis=1)
+    # The script also yields the acquisition time marker
+    np.testing.assert_array_equal(times_ns[:-1], expected_times)
+    np.testing.assert_array_equal(counts[:, :-1], expected_counts)
+    assert times_ns[-1] == reader.final_time_marker
+    assert script["final_time_marker"] == reader.final_time_marker
+
+
+def test_short_recording_is_plotted_bin_by_bin(tmp_path, monkeypatch):
+    path = str(tmp_path / "short.bin")
+    times_ns, counts = write_it02(path, [1, 4], 3000)
+    script = run_script(path, monkeypatch)
+    first_bin, lines = dense_lines(times_ns, counts, 10_000)
+    assert script["envelope"].bucket_bins == 1
+    assert script["final_time_marker"] == (first_bin + lines.shape[1]) * 10_000
+    np.testing.assert_array_equal(script["times"], (first_bin + np.arange(lines.shape[1])) * 10_000)
+    np.testing.assert_array_equal(script["channel_lines"], lines)
+
+
+def test_long_recording_is_plotted_as_a_bounded_envelope(it02_file, monkeypatch):
+    path, times_ns, counts = it02_file
+    script = run_script(path, monkeypatch)
+    monkeypatch.setitem(script, "PLOT_COLUMNS", 64)
+    envelope = script["TraceEnvelope"](3, 10_000)
+    for start in range(0, len(times_ns), 3000):
+        envelope.add(times_ns[start : start + 3000], counts[start : start + 3000].T.astype(np.uint32))
+    x, y = envelope.lines()
+    assert envelope.max.shape == (3, 128)
+    first_bin, lines = dense_lines(times_ns, counts, 10_000)
+    bucket_bins = envelope.bucket_bins
+    n = -(-lines.shape[1] // bucket_bins)
+    assert len(x) == 2 * n
+    for bucket in (0, n // 2, n - 1):
+        window = lines[:, bucket * bucket_bins : (bucket + 1) * bucket_bins]
+        np.testing.assert_array_equal(y[:, 2 * bucket], window.min(axis=1))
+        np.testing.assert_array_equal(y[:, 2 * bucket + 1], window.max(axis=1))
+        assert x[2 * bucket] == (first_bin + bucket * bucket_bins) * 10_000
+        assert x[2 * bucket + 1] == (first_bin + bucket * bucket_bins + window.shape[1] - 1) * 10_000
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+
+from gui_components.queue_consumer import QueueConsumerWorker
+from gui_components.settings import QUEUE_MAX_PULLS_PER_TICK
+
+
+def make_entries(times_ns, value):
+    return [((time_ns,), tuple(value + channel for channel in range(8))) for time_ns in times_ns]
+
+
+def fake_queue(pulls):
+    pulls = list(pulls)
+
+    def pull():
+        return pulls.pop(0) if pulls else []
+
+    return pull
+
+
+def test_batches_and_acquisition_ended(qtbot):
+    # An empty pull closes a batch, ("end",) closes the acquisition
+    pull = fake_queue(
+        [
+            make_entries([1_000, 2_000], 10),
+            make_entries([3_000], 20),
+            [],
+            make_entries([4_000, 5_000], 30) + [("end",)],
+        ]
+    )
+    batches = []
+    emitted = []
+    worker = QueueConsumerWorker(
+        lambda times_ns, counts, *backlog: batches.append((times_ns.copy(), counts.copy())),
+        pull_cb=pull,
+        idle_sleep_s=0,
+    )
+    worker.batch_received.connect(lambda: emitted.append(True))
+    with qtbot.waitSignal(worker.acquisition_ended, timeout=5000):
+        worker.start()
+    assert worker.wait(5000)
+    qtbot.waitUntil(lambda: len(emitted) == 2, timeout=5000)
+
+    assert len(batches) == 2
+    np.testing.assert_array_equal(batches[0][0], [1_000, 2_000, 3_000])
+    np.testing.assert_array_equal(batches[1][0], [4_000, 5_000])
+    assert batches[0][1].shape == (3, 8)
+    np.testing.assert_array_equal(batches[0][1][0], np.arange(10, 18))
+    np.testing.assert_array_equal(batches[0][1][2], np.arange(20, 28))
+    np.testing.assert_array_equal(batches[1][1][1], np.arange(30, 38))
+    assert worker.batches_processed == 2
+    assert worker.entries_processed == 5
+
+
+def test_capped_drains_count_pending_entries(qtbot):
+    # Two drains stop at the pull cap, the third empties the queue
+    pulls = [make_entries([index * 10, index * 10 + 1], 0) for index in range(2 * QUEUE_MAX_PULLS_PER_TICK + 1)]
+    pull = fake_queue(pulls + [[], [("end",)]])
+    backlog = []
+    worker = QueueConsumerWorker(
+        lambda times_ns, counts, capped, pending_entries: backlog.append((capped, pending_entries)),
+        pull_cb=pull,
+        idle_sleep_s=0,
+    )
+    with qtbot.waitSignal(worker.acquisition_ended, timeout=5000):
+        worker.start()
+    assert worker.wait(5000)
+
+    per_drain = 2 * QUEUE_MAX_PULLS_PER_TICK
+    assert backlog == [(True, per_drain), (True, 2 * per_drain), (False, 0)]
+
+
+def test_stop_without_end_entry(qtbot):
+    pull = fake_queue([make_entries([1_000], 1)])
+    received = threading.Event()
+    worker = QueueConsumerWorker(
+        lambda times_ns, counts, *backlog: received.set(), pull_cb=pull, idle_sleep_s=0.001
+    )
+    ended = []
+    worker.acquisition_ended.connect(lambda: ended.append(True))
+    worker.start()
+    assert received.wait(5)
+    worker.stop()
+    assert worker.wait(5000)
+    assert worker.batches_processed == 1
+    assert ended == []
+
+
+def test_error_signal(qtbot):
+    def pull():
+        raise RuntimeError("queue closed")
+
+    worker = QueueConsumerWorker(lambda times_ns, counts, *backlog: None, pull_cb=pull)
+    with qtbot.waitSignal(worker.error, timeout=5000) as blocker:
+        worker.start()
+    assert worker.wait(5000)
+    assert blocker.args == ["queue closed"]
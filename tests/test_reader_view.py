@@ -0,0 +1,46 @@
+import numpy as np
+
+from gui_components.it02_pyramid import build_pyramid
+from gui_components.it02_reader import IT02Reader
+from gui_components.reader_view import visible_envelope
+
+
+def open_recording(path):
+    reader = IT02Reader(path)
+    pyramid = build_pyramid(reader)
+    return reader, reader.read_sparse(), pyramid
+
+
+def test_zoomed_view_reads_the_visible_records(it02_file, monkeypatch):
+    path, times_ns, _ = it02_file
+    reader, sparse, pyramid = open_recording(path)
+    ranges = []
+    read_range = reader.read_range
+    monkeypatch.setattr(
+        reader, "read_range", lambda t0, t1, channels: ranges.append((t0, t1)) or read_range(t0, t1, channels)
+    )
+    t0_ns, t1_ns = times_ns[3000] + 2500, times_ns[3400]
+    for n_columns in (50, 1000):
+        x, y = visible_envelope(reader, pyramid, 2, t0_ns, t1_ns, n_columns)
+        expected_x, expected_y = sparse.envelope(n_columns, [1], t0_ns, t1_ns)
+        np.testing.assert_array_equal(x, expected_x)
+        np.testing.assert_array_equal(y, expected_y[0])
+    assert ranges == [(times_ns[3000], t1_ns)] * 2
+
+
+def test_coarse_view_uses_the_pyramid(it02_file, monkeypatch):
+    path, _, _ = it02_file
+    reader, _, pyramid = open_recording(path)
+    monkeypatch.setattr(reader, "read_range", None)
+    x, y = visible_envelope(reader, pyramid, 5, 0, 10**12, 100)
+    expected_x, expected_y = pyramid.envelope(2, 100)
+    np.testing.assert_array_equal(x, expected_x)
+    np.testing.assert_array_equal(y, expected_y)
+    assert x[0] == pyramid.first_time_ns
+
+
+def test_view_outside_the_recording(it02_file):
+    path, _, _ = it02_file
+    reader, _, pyramid = open_recording(path)
+    x, y = visible_envelope(reader, pyramid, 0, pyramid.last_time_ns + 1, pyramid.last_time_ns + 10**6, 100)
+    assert len(x) == len(y) == 0
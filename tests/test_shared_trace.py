@@ -0,0 +1,103 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from gui_components.data_sinks import SinkWorker
+from gui_components.shared_trace import SharedTracePublisher, SharedTraceReader
+
+METADATA = {"channels": [1, 4], "bin_width_micros": 100_000, "channel_names": {"1": "A"}}
+
+
+def batch(start, n):
+    times_ns = np.arange(start, start + n, dtype=np.float64) * 1e8
+    counts = np.zeros((n, 8), dtype=np.uint32)
+    counts[:, 1] = np.arange(start, start + n)
+    counts[:, 4] = 2 * np.arange(start, start + n)
+    return times_ns, counts
+
+
+@pytest.fixture
+def publisher():
+    # 1 s of 100 ms bins: a 10 record ring
+    publisher = SharedTracePublisher(shm_name=f"test_trace_{os.getpid()}", seconds=1)
+    publisher.open(METADATA)
+    yield publisher
+    publisher.release()
+
+
+def test_reader_sees_the_latest_records_across_the_wrap(publisher):
+    reader = SharedTraceReader(publisher.shm_name)
+    try:
+        assert reader.capacity == 10
+        assert reader.channels == [1, 4]
+        assert reader.channel_names == {"1": "A"}
+        publisher.process(*batch(0, 7))
+        publisher.process(*batch(7, 6))
+        assert reader.cursor == 13
+        times_ns, counts = reader.read_latest()
+        np.testing.assert_array_equal(times_ns, np.arange(3, 13) * 1e8)
+        np.testing.assert_array_equal(counts[reader.channel_index(4)], 2 * np.arange(3, 13))
+        assert len(reader.latest_views(4)) == 2
+        times_ns, _ = reader.read_latest(2)
+        np.testing.assert_array_equal(times_ns, [11e8, 12e8])
+        # A batch larger than the ring keeps its last records
+        publisher.process(*batch(13, 25))
+        assert reader.cursor == 38
+        np.testing.assert_array_equal(reader.read_latest()[0], np.arange(28, 38) * 1e8)
+        publisher.close()
+        assert reader.finished
+    finally:
+        reader.close()
+
+
+def test_read_latest_retries_while_the_writer_is_updating(publisher):
+    reader = SharedTraceReader(publisher.shm_name)
+    try:
+        publisher.header["sequence"] = 1
+        with pytest.raises(TimeoutError):
+            reader.read_latest(retries=3)
+    finally:
+        reader.close()
+
+
+def test_concurrent_reads_are_consistent(publisher):
+    reader = SharedTraceReader(publisher.shm_name)
+    stop = threading.Event()
+
+    def write():
+        start = 0
+        while not stop.is_set():
+            publisher.process(*batch(start, 3))
+            start += 3
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(2000):
+            times_ns, counts = reader.read_latest()
+            # Consecutive records, counts matching their time
+            np.testing.assert_array_equal(np.diff(times_ns), 1e8)
+            np.testing.assert_array_equal(counts[0] * 1e8, times_ns)
+    finally:
+        stop.set()
+        writer.join()
+        reader.close()
+
+
+def test_dropped_batches_are_counted_in_the_header(publisher):
+    reader = SharedTraceReader(publisher.shm_name)
+    try:
+        worker = SinkWorker(publisher, METADATA, max_queue_batches=1)
+        assert worker.submit(*batch(0, 3))
+        assert not worker.submit(*batch(3, 4))
+        assert reader.dropped_records == 0
+        publisher.process(*worker.queue.get_nowait())
+        assert reader.dropped_records == 4
+        assert worker.submit(*batch(7, 2))
+        assert not worker.submit(*batch(9, 2))
+        publisher.close()
+        assert reader.dropped_records == 6
+    finally:
+        reader.close()
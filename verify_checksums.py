@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from gui_components.file_checksum import CHECKSUM_SUFFIX, verify_file
+
+
+def find_checked_files(paths):
+    # Files given directly, or every file with a checksum sidecar below a folder
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for folder, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.endswith(CHECKSUM_SUFFIX):
+                    yield os.path.join(folder, name[: -len(CHECKSUM_SUFFIX)])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Verify saved data files against their checksum sidecars "
+        f"(*{CHECKSUM_SUFFIX}) written during export"
+    )
+    parser.add_argument(
+        "paths", nargs="+",
+        help="data files, or folders searched recursively for checksum sidecars",
+    )
+    parser.add_argument(
+        "--quick", action="store_true",
+        help="skip files whose size and mtime still match the sidecar (nothing is read)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4,
+        help="files hashed in parallel (default: 4)",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    files = list(find_checked_files(args.paths))
+    failed = 0
+    # hashlib releases the GIL on large buffers, threads hash files in parallel
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = executor.map(lambda file_name: verify_file(file_name, args.quick), files)
+        for file_name, (status, detail) in zip(files, results):
+            if status not in ("ok", "unchanged"):
+                failed += 1
+            print(f"{status.upper():<9} {file_name} ({detail})", flush=True)
+    print(f"{len(files)} file(s) checked, {failed} failed")
+    sys.exit(1 if failed > 0 else 0)